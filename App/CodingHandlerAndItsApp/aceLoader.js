@@ -0,0 +1,59 @@
+// Loads the Ace bundle on demand instead of blocking the first paint.
+// loadAce() is single-flight: the editor, the terminal and the idle prefetch all share one load.
+const ACE_BASE = '../App/aceEditorLib/';
+const ACE_EXTRAS = ['mode-python.js', 'ext-language_tools.js', 'theme-terminal.js'];
+
+// tools/build.py concatenates the four files into one hashed bundle and names it here
+const ACE_BUNDLE = document.currentScript ? document.currentScript.dataset.aceBundle : undefined;
+
+let acePromise = null;
+
+function loadScript(src) {
+    return new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.async = false;
+        script.onload = resolve;
+        script.onerror = () => reject(new Error(`Failed to load ${src}`));
+        document.head.appendChild(script);
+    });
+}
+
+function loadAce() {
+    if (!acePromise) {
+        acePromise = (async () => {
+            if (ACE_BUNDLE) {
+                await loadScript(ACE_BUNDLE);
+            } else {
+                // Extensions register themselves through ace.define, so ace.js goes first
+                await loadScript(ACE_BASE + 'ace.js');
+                await Promise.all(ACE_EXTRAS.map(file => loadScript(ACE_BASE + file)));
+                window.ace.config.set('basePath', ACE_BASE);
+            }
+
+            if (window.__pythology_startup) {
+                window.__pythology_startup.mark('ace_loaded');
+            }
+            return window.ace;
+        })().catch(error => {
+            // Let the next caller try again (e.g. after a flaky connection)
+            acePromise = null;
+            throw error;
+        });
+    }
+    return acePromise;
+}
+
+// Warm the bundle once the page is idle, before anyone opens the editor
+function prefetchAce() {
+    const start = () => loadAce().catch(error => console.warn('Ace prefetch failed:', error));
+    if (window.requestIdleCallback) {
+        requestIdleCallback(start, { timeout: 3000 });
+    } else {
+        setTimeout(start, 200);
+    }
+}
+
+window.loadAce = loadAce;
+window.prefetchAce = prefetchAce;
+window.addEventListener('load', prefetchAce);
@@ -0,0 +1,139 @@
+from pyscript import window
+from proxyRegistry import proxy_registry
+from terminalWorker import current_terminal, learner_namespace, terminal
+from perfMonitor import perf
+from memoryGuard import memory_guard
+import asyncio
+
+# Callbacks made by the programs being graded, released once grading ends
+CASES_SCOPE = "run:cases"
+
+
+class CaseSession:
+    """
+    Stands in for a terminal while one test case runs
+
+    input() takes the next stdin fixture instead of waiting for a person, and
+    print() output is collected here (TerminalWriter finds this session through
+    current_terminal, just like a terminal's own runs).
+    """
+
+    def __init__(self, stdin):
+        self.stdin = list(stdin or [])
+        self.lines = []
+        self.pending_output = ""
+
+    async def custom_input(self, prompt_text=""):
+        # Prompts are not part of the expected output, only what is printed
+        self.flush_output()
+        if not self.stdin:
+            raise EOFError("the program asked for more input than this case gives")
+        return str(self.stdin.pop(0))
+
+    def create_proxy(self, func):
+        return proxy_registry.create(func, CASES_SCOPE)
+    
+    def write(self, text):
+        if str(text).strip():
+            self.lines.append(str(text))
+
+    def write_output(self, text):
+        *lines, self.pending_output = (self.pending_output + text).split('\n')
+        for line in lines:
+            self.write(line)
+
+    def flush_output(self):
+        if self.pending_output:
+            line, self.pending_output = self.pending_output, ""
+            self.write(line)
+
+    def write_error(self, text):
+        self.write(f"Error: {text}")
+
+    def output(self):
+        return '\n'.join(self.lines)
+
+
+class CaseResult:
+    """Outcome of one case: status is passed, failed, error or skipped"""
+
+    def __init__(self, index, case):
+        self.index = index
+        self.name = case.get("name") or f"case {index + 1}"
+        self.case = case
+        self.status = "skipped"
+        self.output = ""
+        self.namespace = {}
+        self.error = None
+        self.peak_memory = None  # bytes
+
+    @property
+    def passed(self):
+        return self.status == "passed"
+
+
+async def run_case(code, result, check, failed):
+    """Run the code against one case in its own context and namespace"""
+    # Cases that haven't started when another one fails are skipped
+    if failed.is_set():
+        return result
+    session = CaseSession(result.case.get("stdin"))
+    # This task has its own copy of the context, so other cases keep theirs
+    current_terminal.set(session)
+    namespace = learner_namespace(session)
+    with memory_guard.run() as memory:
+        try:
+            outcome = eval(terminal.compile_code(code), namespace)
+            if asyncio.iscoroutine(outcome):
+                await outcome
+            memory_guard.check(memory)
+        except (Exception, SystemExit) as e:
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            session.flush_output()
+            result.output = session.output()
+            result.namespace = namespace
+    result.peak_memory = memory.peak if memory_guard.available else None
+
+    if result.error:
+        result.status = "error"
+    else:
+        result.status = "passed" if check(result) else "failed"
+    if not result.passed:
+        failed.set()
+    return result
+
+
+@perf.timed("grade_cases")
+async def grade_cases(code, cases, check, timeout=5.0):
+    """
+    Run every case concurrently, stopping at the first one that fails
+
+    check(result) decides whether a finished case passed. Returns one CaseResult
+    per case, in case order; cases stopped early stay "skipped".
+    """
+    results = [CaseResult(index, case) for index, case in enumerate(cases)]
+    failed = asyncio.Event()
+    tasks = {asyncio.ensure_future(run_case(code, result, check, failed)): result for result in results}
+    pending = set(tasks)
+
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Waiting on something that never comes (e.g. a sleep in a loop)
+                for task in pending:
+                    tasks[task].status = "error"
+                    tasks[task].error = f"still running after {timeout:g} s"
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if failed.is_set():
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        proxy_registry.release(CASES_SCOPE)
+    window.console.log(f"🧪 Graded {sum(r.status != 'skipped' for r in results)} of {len(results)} cases")
+    return results
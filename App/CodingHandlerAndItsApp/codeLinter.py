@@ -0,0 +1,158 @@
+from pyscript import window
+from pyodide.ffi import to_js
+from proxyRegistry import proxy_registry
+from readiness import next_idle
+from editorComp import editor_manager
+from matcher import goal_tracker
+from functools import lru_cache
+import asyncio
+import builtins
+import ast
+
+# must_have patterns that can be checked on the syntax tree, with the hint shown when missing
+NODE_PATTERNS = {
+    "for": ((ast.For, ast.AsyncFor, ast.comprehension), "no for loop yet"),
+    "while": ((ast.While,), "no while loop yet"),
+    "if": ((ast.If, ast.IfExp), "no if statement yet"),
+    "def": ((ast.FunctionDef, ast.AsyncFunctionDef), "no function defined yet"),
+    "return": ((ast.Return,), "no return yet"),
+    "class": ((ast.ClassDef,), "no class defined yet"),
+    "import": ((ast.Import, ast.ImportFrom), "nothing imported yet"),
+    "+=": ((ast.AugAssign,), "no += yet"),
+}
+
+# Parsing runs on the main thread and can't be split up, so longer documents
+# (a big paste, far beyond a level's solution) are not linted while typing
+MAX_LINT_SIZE = 10000
+
+
+@lru_cache(maxsize=16)
+def parse(source):
+    """Parse once per document version: (tree, None) or (None, SyntaxError)"""
+    try:
+        flags = ast.PyCF_ONLY_AST | ast.PyCF_ALLOW_TOP_LEVEL_AWAIT
+        return compile(source, "<editor>", "exec", flags=flags), None
+    except SyntaxError as e:
+        return None, e
+
+
+@lru_cache(maxsize=16)
+def node_names(source):
+    """Node types and called/used names of a parsed document"""
+    tree, error = parse(source)
+    types, names = set(), set()
+    if tree is not None:
+        for node in ast.walk(tree):
+            types.add(type(node))
+            if isinstance(node, ast.Name):
+                names.add(node.id)
+            elif isinstance(node, ast.Attribute):
+                names.add(node.attr)
+    return frozenset(types), frozenset(names)
+
+
+def missing_patterns(source, must_have):
+    """Hints for must_have patterns the code does not use yet"""
+    types, names = node_names(source)
+    names = {name.lower() for name in names}
+    hints = []
+    for pattern in must_have:
+        key = pattern.strip().lower()
+        if key in NODE_PATTERNS:
+            node_types, hint = NODE_PATTERNS[key]
+            if not any(node_type in types for node_type in node_types):
+                hints.append(hint)
+        elif key.isidentifier():
+            if key not in names:
+                call = "()" if callable(getattr(builtins, key, None)) else ""
+                hints.append(f"no {key}{call} yet")
+        elif key not in source.lower():
+            # Same substring check the goal tracker grades with
+            hints.append(f"missing '{pattern}'")
+    return hints
+
+
+def analyze(source, must_have=()):
+    """Ace annotations for a document: syntax error first, then goal hints"""
+    if len(source) > MAX_LINT_SIZE:
+        text = f"Too long to check while typing ({len(source)} characters), errors show when you run it"
+        return [{"row": 0, "column": 0, "text": text, "type": "info"}]
+
+    tree, error = parse(source)
+    if error is not None:
+        row = max((error.lineno or 1) - 1, 0)
+        column = max((error.offset or 1) - 1, 0)
+        return [{"row": row, "column": column, "text": f"SyntaxError: {error.msg}", "type": "error"}]
+
+    annotations = []
+    if must_have:
+        for hint in missing_patterns(source, must_have):
+            annotations.append({"row": 0, "column": 0, "text": f"Goal: {hint}", "type": "info"})
+    return annotations
+
+
+class CodeLinter:
+    """
+    Lints the editor whenever the learner stops typing
+
+    Every edit only bumps a version number. One pending task waits until edits
+    stop for `delay` seconds (longer for big documents), then until the browser
+    is idle, and drops the result if the document changed again in the
+    meantime. The parse itself still runs on the main thread in one go, which
+    is why documents over MAX_LINT_SIZE characters are not parsed at all.
+    """
+
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.version = 0
+        self.task = None
+        self.runs = 0
+        self.shown = None
+
+    def quiet_time(self, size):
+        # ~0.1 s more per 20k characters, at most 1.5 s
+        return min(self.delay + size / 200000, 1.5)
+
+    def handle_change(self, delta=None, editor=None):
+        self.schedule()
+
+    def schedule(self):
+        self.version += 1
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            version = self.version
+            size = len(editor_manager.editor.getValue())
+            await asyncio.sleep(self.quiet_time(size))
+            if version != self.version:
+                continue  # still typing
+            await next_idle()
+            if version == self.version:
+                break
+        self.lint()
+
+    def lint(self):
+        """Analyze the current document and show the result in the editor"""
+        source = editor_manager.get_code()
+        must_have = goal_tracker.must_have if goal_tracker.goal_set and not goal_tracker.goal_completed else []
+        annotations = analyze(source, must_have)
+        self.runs += 1
+
+        # Leave Ace alone when nothing changed, e.g. after an edit inside a comment
+        if annotations == self.shown:
+            return annotations
+        self.shown = annotations
+        session = editor_manager.editor.session
+        session.setAnnotations(to_js(annotations, dict_converter=window.Object.fromEntries))
+        return annotations
+
+
+code_linter = CodeLinter()
+
+
+def setup():
+    editor_manager.editor.on('change', proxy_registry.create(code_linter.handle_change))
+    window.code_linter = code_linter
+    code_linter.schedule()
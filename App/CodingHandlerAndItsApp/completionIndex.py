@@ -0,0 +1,168 @@
+from pyscript import window
+from pyodide.ffi import to_js
+from proxyRegistry import proxy_registry
+from readiness import next_idle
+from terminalWorker import learner_namespace, on_any_finished
+from bisect import bisect_left, insort
+import importlib
+import asyncio
+import builtins
+import keyword
+import re
+
+# Offered as `import` names; their members are indexed the first time someone types `math.`
+STDLIB_MODULES = [
+    "math", "random", "string", "time", "datetime", "itertools", "collections",
+    "functools", "json", "re", "statistics", "fractions", "decimal",
+]
+
+# Ace sorts by score, higher first
+SCORES = {"session": 1000, "attribute": 900, "keyword": 600, "builtin": 500, "module": 400}
+
+ATTRIBUTE_PATTERN = re.compile(r"([A-Za-z_][\w.]*)\.\w*$")
+
+
+class SymbolTable:
+    """Names sorted case-insensitively, with prefix lookup by bisect"""
+
+    def __init__(self, names=(), meta="builtin"):
+        self.items = sorted((name.lower(), name, meta) for name in names)
+
+    def add(self, name, meta):
+        insort(self.items, (name.lower(), name, meta))
+
+    def remove(self, name, meta):
+        item = (name.lower(), name, meta)
+        index = bisect_left(self.items, item)
+        if index < len(self.items) and self.items[index] == item:
+            del self.items[index]
+
+    def lookup(self, prefix):
+        """Every (name, meta) whose name starts with prefix, ignoring case"""
+        key = prefix.lower()
+        start = bisect_left(self.items, (key,))
+        end = bisect_left(self.items, (key + "\uffff",))
+        return [(name, meta) for _, name, meta in self.items[start:end]]
+
+    def __len__(self):
+        return len(self.items)
+
+
+def public_names(obj):
+    try:
+        return [name for name in dir(obj) if not name.startswith("_")]
+    except Exception:
+        return []
+
+
+class CompletionIndex:
+    """
+    Symbols for editor completion: keywords, builtins, stdlib modules and the
+    names defined by the learner's last run
+
+    The global table is built once; attribute tables (`math.`, `my_list.`) are
+    built on first use and cached. After each run only the names that appeared
+    or disappeared are moved in or out of the sorted table.
+    """
+
+    def __init__(self):
+        self.globals = None
+        self.session = {}  # name -> value from the last run
+        self.members = {}  # module name / id of a session object -> SymbolTable
+        self.base_names = set(learner_namespace(None))  # what every run starts with
+
+    def build(self):
+        if self.globals is None:
+            table = SymbolTable(keyword.kwlist, "keyword")
+            for name in public_names(builtins):
+                table.add(name, "builtin")
+            for name in STDLIB_MODULES:
+                table.add(name, "module")
+            self.globals = table
+        return self.globals
+
+    def update_session(self, namespace):
+        """Index the learner's names after a run, touching only what changed"""
+        table = self.build()
+        session = {
+            name: value for name, value in namespace.items()
+            if name not in self.base_names and not name.startswith("_")
+        }
+        for name in self.session.keys() - session.keys():
+            table.remove(name, "session")
+        for name in session.keys() - self.session.keys():
+            table.add(name, "session")
+        self.session = session
+
+        # Objects may have changed, modules have not
+        self.members = {key: value for key, value in self.members.items() if isinstance(key, str)}
+
+    def resolve(self, path):
+        """Object for a dotted name typed in the editor, or None"""
+        head, *rest = path.split(".")
+        if head in self.session:
+            obj = self.session[head]
+        elif head in STDLIB_MODULES:
+            obj = importlib.import_module(head)
+        elif hasattr(builtins, head):
+            obj = getattr(builtins, head)
+        else:
+            return None
+        for name in rest:
+            obj = getattr(obj, name, None)
+            if obj is None:
+                return None
+        return obj
+
+    def member_table(self, path):
+        key = path if path in STDLIB_MODULES else None
+        if key is not None and key in self.members:
+            return self.members[key]
+
+        obj = self.resolve(path)
+        if obj is None:
+            return None
+        key = key or id(obj)
+        if key not in self.members:
+            self.members[key] = SymbolTable(public_names(obj), "attribute")
+        return self.members[key]
+
+    def complete(self, line, prefix):
+        """Completions for the text left of the cursor; prefix is the word being typed"""
+        match = ATTRIBUTE_PATTERN.search(line)
+        if match:
+            table = self.member_table(match.group(1))
+            return table.lookup(prefix) if table is not None else []
+        return self.build().lookup(prefix)
+
+
+completion_index = CompletionIndex()
+
+
+def get_completions(editor, session, pos, prefix, callback):
+    """Ace completer entry point"""
+    try:
+        line = session.getLine(pos.row)[:pos.column]
+        items = [
+            {"caption": name, "value": name, "meta": meta, "score": SCORES[meta]}
+            for name, meta in completion_index.complete(line, prefix)
+        ]
+        callback(None, to_js(items, dict_converter=window.Object.fromEntries))
+    except Exception as e:
+        window.console.error(f"Completion failed: {e}")
+        callback(None, to_js([]))
+
+
+async def build_when_idle():
+    await next_idle()
+    completion_index.build()
+
+
+def setup():
+    completer = window.Object.new()
+    completer.getCompletions = proxy_registry.create(get_completions)
+    window.ace.require("ace/ext/language_tools").addCompleter(completer)
+
+    on_any_finished(completion_index.update_session)
+    window.completion_index = completion_index
+    asyncio.ensure_future(build_when_idle())
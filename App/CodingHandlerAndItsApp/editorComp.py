@@ -1,48 +1,167 @@
-from js import ace
 from pyscript import window, document
-import sys
+from proxyRegistry import proxy_registry
+from terminalWorker import terminal
+from startupTiming import startup
+import json
+
+
+class DraftStore:
+    """
+    Per-level code drafts, kept in memory and written to localStorage in batches
+
+    Edits only mark a level dirty; one debounced flush writes every dirty draft
+    with a single setItem, so typing never touches storage on each keystroke.
+    """
+
+    def __init__(self, storage_key="pythology_drafts", delay=800):
+        self.storage_key = storage_key
+        self.delay = delay
+        self.drafts = None  # level -> code, read from storage on first use
+        self.dirty = False
+        self.timer = None
+        self.flush_proxy = None
+        self.writes = 0
+
+    def _load(self):
+        if self.drafts is None:
+            self.drafts = {}
+            try:
+                saved = window.localStorage.getItem(self.storage_key)
+                if saved:
+                    self.drafts = json.loads(saved)
+            except Exception as e:
+                window.console.warn(f"Could not load code drafts: {e}")
+        return self.drafts
+
+    def get(self, level):
+        return self._load().get(str(level))
+
+    def put(self, level, code):
+        """Remember a draft and schedule a flush"""
+        drafts = self._load()
+        if drafts.get(str(level)) == code:
+            return
+        drafts[str(level)] = code
+        self.dirty = True
+        self._schedule()
+
+    def _schedule(self):
+        if self.timer is not None:
+            window.clearTimeout(self.timer)
+        if self.flush_proxy is None:
+            self.flush_proxy = proxy_registry.create(self.flush)
+        self.timer = window.setTimeout(self.flush_proxy, self.delay)
+
+    def flush(self, *args):
+        """Write all pending drafts at once"""
+        self.timer = None
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            window.localStorage.setItem(self.storage_key, json.dumps(self.drafts))
+            self.writes += 1
+        except Exception as e:
+            window.console.warn(f"Could not save code drafts: {e}")
+
+    def clear(self):
+        self.drafts = {}
+        self.dirty = False
+        window.localStorage.removeItem(self.storage_key)
 
-terminal = window.terminal
 
 class AceEditorManager:
+    """The one code editor: owns the Ace instance, level drafts and running code"""
+
     def __init__(self, editor_element=None):
         if editor_element is None:
             editor_element = window.editor
-        
-        self.editor = window.ace.edit(editor_element)
+
+        self.editor_element = editor_element
+        self.editor = None
+        self.drafts = DraftStore()
+        self.level = None  # level whose draft the editor shows
+        self.is_updating = False
+        self.run_listeners = []
+        self.run_stdin = None  # function returning input() answers for the next run, or None
+
+    async def load(self):
+        """Create the Ace editor once the Ace bundle is available"""
+        ace = await window.loadAce()
+        self.editor = ace.edit(self.editor_element)
         self._configure_editor()
-        
+        self.editor.on('change', proxy_registry.create(self.handle_change))
+        return self
+
     def _configure_editor(self):
         self.editor.session.setMode("ace/mode/python")
-        
+
         self.editor.setOptions({
             "fontSize": "14px",
             'enableBasicAutocompletion': True,
             'enableLiveAutocompletion': True,
         })
 
-        self.editor.setValue("print('Hello from Ace and PyScript!')", -1)
-        
+        self.set_code("print('Hello from Ace and PyScript!')")
+
+    def handle_change(self, delta, editor):
+        """Autosave learner edits as a draft of the current level"""
+        if self.is_updating or self.level is None:
+            return
+        self.drafts.put(self.level, self.editor.getValue())
+
+    def open_level(self, level, starter_code=None):
+        """Show a level's saved draft, or its starter code if it has none"""
+        if self.level is not None and self.editor is not None:
+            self.drafts.put(self.level, self.editor.getValue())
+        self.level = level
+
+        code = self.drafts.get(level)
+        if code is None:
+            code = starter_code
+        if code is not None and self.editor is not None:
+            self.set_code(code)
+
     def get_code(self):
         return self.editor.getValue()
-    
+
     def set_code(self, code):
-        self.editor.setValue(code, -1)
-        
+        # Programmatic changes are not learner edits
+        self.is_updating = True
+        try:
+            self.editor.setValue(code, -1)
+        finally:
+            self.is_updating = False
+
     def clear(self):
         self.editor.setValue("", -1)
 
+    def on_run(self, listener):
+        """Call listener(code) after code from the editor starts a run in the terminal"""
+        self.run_listeners.append(listener)
+
+    def run(self):
+        code = self.get_code() # получаем код
+
+        if not code.strip(): # если в редакторе нет кода
+            return
+
+        stdin = self.run_stdin() if self.run_stdin else None
+        if not terminal.execute_code(code, stdin=stdin): # отправляем код
+            return # терминал ещё занят прошлой программой
+
+        for listener in self.run_listeners:
+            try:
+                listener(code)
+            except Exception as e:
+                window.console.error(f"Error in run listener: {e}")
+
 
 editor_manager = AceEditorManager("editor")
 
 
 def run_code(event):
-    code = editor_manager.get_code() # получаем код
-    
-    if not code.strip(): # если в редакторе нет кода
-        return
-    
-    terminal.execute_code(code) # отправляем код
+    editor_manager.run()
 
 
 def clear_code(event):
@@ -52,6 +171,19 @@ def clear_code(event):
 def clear_terminal(event):
     terminal.clear()
 
-window.run_code = run_code
-window.clear_code = clear_code
-window.clear_terminal = clear_terminal
\ No newline at end of file
+
+def flush_drafts(event=None):
+    """Write pending drafts right away, e.g. when the page is hidden"""
+    editor_manager.drafts.flush()
+
+
+async def setup():
+    with startup.phase("ace_init:editor"):
+        await editor_manager.load()
+
+    window.run_code = proxy_registry.create(run_code)
+    window.clear_code = proxy_registry.create(clear_code)
+    window.clear_terminal = proxy_registry.create(clear_terminal)
+    window.editor_manager = editor_manager
+
+    window.addEventListener('pagehide', proxy_registry.create(flush_drafts))
@@ -1,7 +1,11 @@
-from js import ace
 from pyscript import window, document
-from pyodide.ffi import create_proxy
-import sys
+from proxyRegistry import proxy_registry
+from readiness import ready
+from terminalWorker import terminal
+from editorComp import editor_manager
+from perfMonitor import perf
+from outputDiff import diff_lines, summary_lines
+from memoryGuard import format_bytes, memory_guard
 import asyncio
 
 class GoalTracker:
@@ -10,11 +14,13 @@ class GoalTracker:
         self.goal_output = ""
         self.goal_variables = {}  # Track expected variables with values
         self.must_have = []  # Required code patterns
+        self.cases = []  # Test cases with stdin fixtures, graded without the terminal
+        self.max_memory_kb = None  # Peak memory a run may use
         self.checking_enabled = True
         self.goal_completed = False  # Track if current goal is completed
         self.goal_set = False  # Track if any goal has been set
         
-    def set_goal(self, code, expected_output, variables=None, must_have=None):
+    def set_goal(self, code, expected_output, variables=None, must_have=None, cases=None, max_memory_kb=None):
         """
         Set the goal code and expected output
         
@@ -25,25 +31,45 @@ class GoalTracker:
                       Example: {5: "a number", "hello": "a greeting"}
             must_have: List of required patterns/keywords in code
                       Example: ["for", "range", "if"] or ["def ", "return"]
+            cases: List of test cases, each a dict with "stdin" (answers given to
+                   input() in order), "output" and optionally "name" and "variables".
+                   When set, they replace expected_output and variables.
+                   Example: [{"stdin": ["3", "4"], "output": "7"}]
+            max_memory_kb: Highest peak memory a run (or each case) may reach
         """
         self.goal_code = code.strip() if code else ""
-        self.goal_output = expected_output.strip()
+        self.goal_output = (expected_output or "").strip()
         self.goal_variables = variables or {}
         self.must_have = must_have or []
+        self.cases = cases or []
+        self.max_memory_kb = max_memory_kb
         self.goal_completed = False  # Reset completion status
         self.goal_set = True  # Mark that a goal has been set
         
         window.console.log("✅ Goal set!")
         if self.goal_code:
             window.console.log(f"Expected code: {self.goal_code}")
-        window.console.log(f"Expected output: {self.goal_output}")
+        if self.cases:
+            window.console.log(f"Test cases: {len(self.cases)}")
+        else:
+            window.console.log(f"Expected output: {self.goal_output}")
         if self.goal_variables:
             window.console.log(f"Expected variables with values: {self.goal_variables}")
         if self.must_have:
             window.console.log(f"Must contain: {self.must_have}")
+        if self.max_memory_kb:
+            window.console.log(f"Memory limit: {self.max_memory_kb} KB")
     
-    def check_match(self, current_code, current_output):
-        """Check if current code and output match the goal (case-insensitive)"""
+    @perf.timed("check_match")
+    def check_match(self, current_code, current_output, case_results=None, peak_memory=None, namespace=None):
+        """
+        Check if current code and output match the goal (case-insensitive)
+        
+        With test cases, case_results (from grade_cases) decide output and
+        variables instead of current_output. peak_memory is the run's peak in
+        bytes, for goals with a memory limit; namespace holds the run's
+        globals, for goals with variables.
+        """
         # Don't check if no goal has been set yet
         if not self.goal_set:
             return False
@@ -61,28 +87,44 @@ class GoalTracker:
         if self.goal_code:
             code_match = current_code.strip().lower() == self.goal_code.lower()
         
-        # Check output match (case-insensitive)
-        output_match = current_output.strip().lower() == self.goal_output.lower()
-        
-        # Check variables (if any are specified)
-        variables_match = True
-        if self.goal_variables:
-            variables_match = self._check_variables(current_code)
+        if self.cases:
+            # Each case already checked its own output and variables
+            output_match = variables_match = case_results is not None and all(r.passed for r in case_results)
+        else:
+            # Check output match (case-insensitive)
+            output_match = current_output.strip().lower() == self.goal_output.lower()
+            
+            # Check variables (if any are specified)
+            variables_match = True
+            if self.goal_variables:
+                variables_match = self._variables_in(namespace or {}, self.goal_variables)
         
         # Check must_have patterns
         must_have_match = True
         if self.must_have:
             must_have_match = self._check_must_have(current_code)
         
-        if code_match and output_match and variables_match and must_have_match:
+        # Check peak memory (if limited); with cases, the hungriest case counts
+        memory_match = True
+        if self.max_memory_kb:
+            if self.cases:
+                peaks = [r.peak_memory for r in case_results or [] if r.peak_memory is not None]
+                peak_memory = max(peaks) if peaks else None
+            memory_match = peak_memory is not None and peak_memory <= self.max_memory_kb * 1024
+        
+        if code_match and output_match and variables_match and must_have_match and memory_match:
             window.console.log("🎉 SUCCESS! Everything is correct!")
             if self.goal_code:
                 window.console.log("✓ Code matches goal")
             window.console.log("✓ Output matches goal")
+            if self.cases:
+                window.console.log(f"✓ All {len(self.cases)} test cases pass")
             if self.goal_variables:
                 window.console.log("✓ Variables match goal")
             if self.must_have:
                 window.console.log("✓ Required patterns found")
+            if self.max_memory_kb:
+                window.console.log(f"✓ Peak memory {format_bytes(peak_memory)} within {self.max_memory_kb} KB")
             
             # Mark goal as completed
             self.goal_completed = True
@@ -93,16 +135,65 @@ class GoalTracker:
                 window.console.log("❌ Code doesn't match goal")
                 window.console.log(f"Current: '{current_code.strip()}'")
                 window.console.log(f"Expected: '{self.goal_code}'")
-            if not output_match:
-                window.console.log("❌ Output doesn't match goal")
-                window.console.log(f"Current: '{current_output.strip()}'")
-                window.console.log(f"Expected: '{self.goal_output}'")
-            if not variables_match:
-                window.console.log("❌ Variables don't match goal")
+            if self.cases:
+                if not output_match:
+                    self._report_cases(case_results or [])
+            else:
+                if not output_match:
+                    self._report_output_diff(current_output)
+                if not variables_match:
+                    window.console.log("❌ Variables don't match goal")
             if not must_have_match:
                 window.console.log("❌ Required patterns not found")
+            if not memory_match:
+                used = format_bytes(peak_memory) if peak_memory is not None else "unknown"
+                message = f"❌ Peak memory {used}, the goal allows {self.max_memory_kb} KB"
+                window.console.log(message)
+                terminal.write(message)
             return False
     
+    def check_case(self, result):
+        """Does a finished test case have the expected output and variables"""
+        expected = str(result.case.get("output", "")).strip()
+        if result.output.strip().lower() != expected.lower():
+            return False
+        variables = result.case.get("variables")
+        return not variables or self._variables_in(result.namespace, variables)
+    
+    def _report_cases(self, case_results):
+        """One line per case in the terminal, with the diff of the one that failed"""
+        lines = []
+        for result in case_results:
+            label = f"🧪 Case {result.index + 1}/{len(self.cases)} ({result.name})"
+            if result.passed:
+                lines.append(f"{label}: ✓ passed")
+            elif result.status == "skipped":
+                lines.append(f"{label}: skipped")
+            elif result.error:
+                lines.append(f"{label}: ✗ {result.error}")
+            else:
+                lines.append(f"{label}: ✗ failed")
+                expected = str(result.case.get("output", ""))
+                summary = summary_lines(diff_lines(expected, result.output))
+                if summary:
+                    lines.extend("   " + line for line in summary)
+                else:
+                    lines.append("   ❌ Variables don't match goal")
+        for line in lines:
+            window.console.log(line)
+        if lines:
+            terminal.write("\n".join(lines))
+    
+    def _report_output_diff(self, current_output):
+        """Show where the output first differs instead of dumping both outputs"""
+        summary = summary_lines(diff_lines(self.goal_output, current_output))
+        if not summary:
+            # Same lines, so the difference is only in surrounding whitespace
+            summary = ["❌ Output doesn't match goal"]
+        for line in summary:
+            window.console.log(line)
+        terminal.write("\n".join(summary))
+    
     def _check_must_have(self, code):
         """Check if code contains all required patterns"""
         code_lower = code.lower()
@@ -117,36 +208,27 @@ class GoalTracker:
         
         return len(missing) == 0
     
-    def _check_variables(self, code):
-        """Check if code creates variables with expected values"""
-        try:
-            # Create a clean namespace to execute code
-            namespace = {}
-            exec(code, namespace)
-            
-            # Check if any variable has the expected values
-            for expected_value, description in self.goal_variables.items():
-                found = False
-                for var_name, var_value in namespace.items():
-                    # Skip built-in variables
-                    if var_name.startswith('__'):
-                        continue
-                    
-                    # Check if value matches (handle both string and number comparisons)
-                    if self._values_match(var_value, expected_value):
-                        found = True
-                        window.console.log(f"✓ Found variable '{var_name}' = {var_value} ({description})")
-                        break
+    def _variables_in(self, namespace, expected_variables):
+        """Check if a namespace has variables with the expected values"""
+        # Check if any variable has the expected values
+        for expected_value, description in expected_variables.items():
+            found = False
+            for var_name, var_value in namespace.items():
+                # Skip built-in variables
+                if var_name.startswith('__'):
+                    continue
                 
-                if not found:
-                    window.console.log(f"✗ No variable found with value {expected_value} ({description})")
-                    return False
-            
-            return True
+                # Check if value matches (handle both string and number comparisons)
+                if self._values_match(var_value, expected_value):
+                    found = True
+                    window.console.log(f"✓ Found variable '{var_name}' = {var_value} ({description})")
+                    break
             
-        except Exception as e:
-            window.console.error(f"Error checking variables: {e}")
-            return False
+            if not found:
+                window.console.log(f"✗ No variable found with value {expected_value} ({description})")
+                return False
+        
+        return True
     
     def _values_match(self, actual, expected):
         """Compare two values (handles strings case-insensitively)"""
@@ -165,86 +247,51 @@ class GoalTracker:
         window.console.log("Goal checking disabled")
 
 
-class AceEditorManager:
-    def __init__(self, editor_element=None):
-        if editor_element is None:
-            editor_element = window.editor
-        
-        self.editor = window.ace.edit(editor_element)
-        self._configure_editor()
-        
-    def _configure_editor(self):
-        self.editor.session.setMode("ace/mode/python")
-        
-        self.editor.setOptions({
-            'enableBasicAutocompletion': True,
-            'enableLiveAutocompletion': True,
-        })
-
-        self.editor.setValue("print('Hello from Ace and PyScript!')", -1)
-        
-    def get_code(self):
-        return self.editor.getValue()
-    
-    def set_code(self, code):
-        self.editor.setValue(code, -1)
-        
-    def clear(self):
-        self.editor.setValue("", -1)
-
-
 # Initialize components
-editor_manager = AceEditorManager("editor")
 goal_tracker = GoalTracker()
 
 
-def run_code(event):
-    """Execute code from editor in terminal"""
-    code = editor_manager.get_code()
-    window.console.log("Executing code in terminal:", code)
+def check_goal(code):
+    """Check the goal once the run started by the editor has finished"""
+    task = terminal.task
     
-    # Get terminal directly from window
-    try:
-        terminal_obj = window.terminal
-    except Exception as e:
-        window.console.error(f"Cannot access terminal: {e}")
-        return
-    
-    # Execute the code
-    try:
-        terminal_obj.execute_code(code)
-        window.console.log("Code sent to terminal")
-    except Exception as e:
-        window.console.error(f"Error calling execute_code: {e}")
-        return
-    
-    # Check goal after execution using asyncio instead of setTimeout
     async def check_goal_async():
-        await asyncio.sleep(0.6)  # Wait for output
+        if goal_tracker.cases and goal_tracker.checking_enabled and not goal_tracker.goal_completed:
+            # input() gets the fixtures, so nobody has to type into the terminal
+            try:
+                # Only levels with test cases need the grader, so keep it off the boot path
+                from caseGrader import grade_cases
+                results = await grade_cases(code, goal_tracker.cases, goal_tracker.check_case)
+                goal_tracker.check_match(code, "", case_results=results)
+            except Exception as e:
+                window.console.error(f"Error grading test cases: {e}")
+            return
+        
+        try:
+            memory = await task
+        except asyncio.CancelledError:
+            return  # Rolled back before it finished, nothing to grade
         try:
             # Get all execution output instead of just last line
-            current_output = terminal_obj.get_execution_output()
-            goal_tracker.check_match(code, current_output)
+            current_output = terminal.get_execution_output()
+            # The figures of this run, read after it ended
+            peak_memory = memory.peak if memory_guard.available else None
+            goal_tracker.check_match(code, current_output, peak_memory=peak_memory, namespace=terminal.last_namespace)
         except Exception as e:
             window.console.error(f"Error checking goal: {e}")
     
     asyncio.create_task(check_goal_async())
 
 
-def clear_code(event):
-    editor_manager.clear()
-    window.console.log("Editor cleared")
-
-
-def clear_terminal(event):
-    try:
-        window.terminal.clear()
-        window.console.log("Terminal cleared")
-    except Exception as e:
-        window.console.error(f"Error clearing terminal: {e}")
+def first_case_stdin():
+    """Answers for the editor's own run on a level with test cases: the first case's"""
+    # Otherwise that run waits for typing while the grader runs the cases
+    if goal_tracker.cases and goal_tracker.checking_enabled:
+        return goal_tracker.cases[0].get("stdin") or []
+    return None
 
 
-def set_goal(code, expected_output, variables=None, must_have=None):
+def set_goal(code, expected_output, variables=None, must_have=None, cases=None, max_memory_kb=None):
     """
     Function to set a new goal - call this from console or code
     
@@ -255,34 +302,27 @@ def set_goal(code, expected_output, variables=None, must_have=None):
                   Example: {5: "a number", "hello": "a greeting"}
         must_have: List of required patterns/keywords in code
                   Example: ["for", "range"] or ["def ", "return"]
+        cases: List of {"stdin": [...], "output": ..., "variables": ...} test cases
+        max_memory_kb: Highest peak memory a run may reach
     """
-    goal_tracker.set_goal(code, expected_output, variables, must_have)
+    goal_tracker.set_goal(code, expected_output, variables, must_have, cases, max_memory_kb)
 
-# Expose functions globally
-window.run_code = run_code
-window.clear_code = clear_code
-window.clear_terminal = clear_terminal
-window.set_goal = set_goal
-window.goal_tracker = goal_tracker
-window.editor_manager = editor_manager
-
-# Wait for terminal to be ready
-async def wait_for_terminal():
-    """Wait for terminal to initialize before showing ready message"""
-    for i in range(50):  # Try for 5 seconds
-        await asyncio.sleep(0.1)
-        try:
-            if hasattr(window, 'terminal') and window.terminal is not None:
-                terminal_obj = window.terminal
-                if hasattr(terminal_obj, 'execute_code'):
-                    window.console.log("📝 Use: set_goal(code, output) to set a goal")
-                    break
-        except:
-            pass
-    else:
-        window.console.warn("⚠️ Terminal not fully initialized. Waiting...")
+def setup():
+    # Runs are started by the shared editor in editorComp
+    editor_manager.on_run(check_goal)
+    editor_manager.run_stdin = first_case_stdin
+    
+    # Expose functions globally
+    window.set_goal = proxy_registry.create(set_goal)
+    window.goal_tracker = goal_tracker
+    
+    asyncio.create_task(announce_when_terminal_ready())
+    ready.set("goals")
 
-asyncio.create_task(wait_for_terminal())
+async def announce_when_terminal_ready():
+    """Show the goal hint once the terminal is up"""
+    await ready.wait("terminal")
+    window.console.log("📝 Use: set_goal(code, output) to set a goal")
 
 # Example usage (uncomment to test):
 # Example 1: Simple goal with specific code
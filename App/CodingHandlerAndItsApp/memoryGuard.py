@@ -0,0 +1,201 @@
+from pyscript import window
+from contextvars import ContextVar
+from contextlib import contextmanager
+import sys
+
+tracemalloc = None  # imported by the first run, it pulls in pickle and linecache
+
+# Memory account of the run in progress, per task like current_terminal
+current_run = ContextVar("current_run_memory", default=None)
+
+# Learner code is compiled under this name (terminal and test cases alike)
+LEARNER_FILENAME = "<terminal>"
+
+# Most lines between two samples, which bounds how far a run that suddenly starts
+# allocating can overshoot the cap (small ints are cached: counting down allocates nothing)
+MAX_INTERVAL = 64
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class RunMemory:
+    """Memory allocated by one run, counted from what was allocated when it started"""
+
+    def __init__(self, cap_bytes=None):
+        self.cap_bytes = cap_bytes
+        self.start = 0
+        self.offset = 0  # counted before the last pause
+        self.current = 0
+        self.peak = 0
+        self.interval = 1  # lines between samples
+        self.countdown = 1
+        self.last_current = 0
+
+    def sample(self):
+        if tracemalloc is None or not tracemalloc.is_tracing():
+            return self.current
+        current, peak = tracemalloc.get_traced_memory()
+        self.current = self.offset + max(current - self.start, 0)
+        # tracemalloc's peak also catches what came and went between samples
+        self.peak = max(self.peak, self.current, self.offset + peak - self.start)
+        return self.current
+
+    def over_cap(self):
+        if self.cap_bytes is None:
+            return False
+        self.sample()
+        return self.peak > self.cap_bytes
+
+    def next_interval(self):
+        """Lines until the next sample: fewer the faster memory grows and the closer it gets to the cap"""
+        grown = self.current - self.last_current
+        self.last_current = self.current
+        if grown <= 0:
+            interval = MAX_INTERVAL
+        else:
+            # At the rate of the last interval, sample again before half the headroom is used
+            per_line = grown / self.interval
+            interval = int((self.cap_bytes - self.current) / (2 * per_line))
+        # Lengthen at most twofold, so one quiet interval can't jump straight to the longest
+        self.interval = max(1, min(MAX_INTERVAL, interval, 2 * self.interval))
+        return self.interval
+
+    def describe(self):
+        return format_bytes(self.peak)
+
+
+class MemoryGuard:
+    """
+    Per-run memory accounting with a cap, so a runaway list can't crash the tab
+
+    While a run is active, tracemalloc counts allocations and a trace function
+    on the learner's own frames samples the total. Sampling every line would
+    be several times slower still, so the interval adapts: up to MAX_INTERVAL
+    lines while memory stays flat, down to every line when it grows fast or
+    nears the cap. Going over `cap_mb` raises MemoryError inside the learner's
+    program, long before the Wasm heap runs out, and check() catches what the
+    last lines allocated once the run ends. Library and app code is not
+    line-traced.
+
+    tracemalloc makes every allocation several times slower, so it is only on
+    while a run is executing, and paused while the run waits for input().
+    Runs that overlap (several terminals, test cases) share one tracemalloc,
+    so each one's figure includes what the others allocated meanwhile. A single
+    allocation bigger than the cap is only noticed after the line that made it.
+    """
+
+    def __init__(self, cap_mb=256):
+        self.cap_mb = cap_mb
+        self.active = 0
+        self.previous_trace = None
+        self.started_tracemalloc = False
+        # One bound method, not a new one (allocation) per traced line
+        self.line_tracer = self.trace_lines
+
+    @property
+    def available(self):
+        global tracemalloc
+        if tracemalloc is None:
+            try:
+                import tracemalloc
+            except ImportError:  # not every Pyodide build ships it
+                return False
+        return True
+
+    def trace_calls(self, frame, event, arg):
+        if frame.f_code.co_filename == LEARNER_FILENAME and current_run.get() is not None:
+            return self.line_tracer
+        return None
+
+    def cap_error(self):
+        return MemoryError(f"program used more than {self.cap_mb:g} MB of memory (see set_memory_cap)")
+
+    def trace_lines(self, frame, event, arg):
+        memory = current_run.get()
+        if memory is not None and memory.cap_bytes is not None:
+            memory.countdown -= 1
+            if memory.countdown <= 0:
+                if memory.over_cap():
+                    # CPython drops the trace function after this; the next run sets it again
+                    raise self.cap_error()
+                memory.countdown = memory.next_interval()
+        return self.line_tracer
+
+    def check(self, memory):
+        """Raise MemoryError if a run went over the cap; its last line has no line event after it"""
+        if memory.over_cap():
+            raise self.cap_error()
+
+    def start_tracking(self):
+        if self.active == 0:
+            self.previous_trace = sys.gettrace()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracemalloc = True
+            else:
+                tracemalloc.reset_peak()
+        self.active += 1
+        # Also after a MemoryError unset it
+        sys.settrace(self.trace_calls)
+
+    def stop_tracking(self):
+        self.active -= 1
+        if self.active > 0:
+            return
+        sys.settrace(self.previous_trace)
+        self.previous_trace = None
+        if self.started_tracemalloc:
+            # tracemalloc slows every allocation, so only keep it on during runs
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    @contextmanager
+    def run(self):
+        """Account the memory of the code run inside this block (in this task)"""
+        cap_bytes = int(self.cap_mb * 1024 * 1024) if self.cap_mb else None
+        memory = RunMemory(cap_bytes)
+        if not self.available:
+            yield memory
+            return
+
+        self.start_tracking()
+        memory.start = tracemalloc.get_traced_memory()[0]
+        token = current_run.set(memory)
+        try:
+            yield memory
+        finally:
+            memory.sample()
+            current_run.reset(token)
+            self.stop_tracking()
+
+    @contextmanager
+    def paused(self):
+        """Stop accounting while the current run waits (e.g. for input), keeping its total"""
+        memory = current_run.get()
+        if memory is None or not self.available:
+            yield
+            return
+
+        memory.sample()
+        memory.offset = memory.current
+        self.stop_tracking()
+        try:
+            yield
+        finally:
+            self.start_tracking()
+            memory.start = tracemalloc.get_traced_memory()[0]
+
+
+memory_guard = MemoryGuard()
+
+
+def set_memory_cap(cap_mb):
+    """Change the per-run memory cap in MB (0 or None: no cap, only accounting)"""
+    memory_guard.cap_mb = float(cap_mb) if cap_mb else None
+    window.console.log(f"🧠 Memory cap: {f'{memory_guard.cap_mb:g} MB' if memory_guard.cap_mb else 'off'}")
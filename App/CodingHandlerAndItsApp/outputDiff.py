@@ -0,0 +1,181 @@
+"""
+Line diff of expected and actual program output, for grading feedback
+
+Myers' algorithm with two bounds so a runaway program can't stall the page:
+at most `max_lines` lines of each side are compared, and the search gives up
+after `max_edits` edits (the outputs are then simply "too different").
+Lines are compared the way GoalTracker grades: case-insensitively.
+"""
+
+EQUAL, INSERT, DELETE = "equal", "insert", "delete"
+
+
+class OutputDiff:
+    """Result of diff_lines: an edit script over the compared lines"""
+
+    def __init__(self, expected, actual, ops, truncated, gave_up):
+        self.expected = expected  # original lines
+        self.actual = actual
+        self.ops = ops  # [(op, expected_index, actual_index)], None if gave_up
+        self.truncated = truncated  # inputs were cut to max_lines
+        self.gave_up = gave_up  # more than max_edits edits
+
+    @property
+    def changed_lines(self):
+        """Lines that differ; a deleted line replaced by an inserted one counts once"""
+        if self.ops is None:
+            return None
+        changed = deletes = inserts = 0
+        for op, _, _ in self.ops + [(EQUAL, None, None)]:
+            if op == EQUAL:
+                changed += max(deletes, inserts)
+                deletes = inserts = 0
+            elif op == DELETE:
+                deletes += 1
+            else:
+                inserts += 1
+        return changed
+
+    def first_difference(self):
+        """(line index, expected line or None, actual line or None) of the first mismatch, or None"""
+        if self.ops is None:
+            # Still worth pointing at the first line that differs
+            for index in range(max(len(self.expected), len(self.actual))):
+                expected = self.expected[index] if index < len(self.expected) else None
+                actual = self.actual[index] if index < len(self.actual) else None
+                if normalize(expected) != normalize(actual):
+                    return index, expected, actual
+            return None
+
+        ops = self.ops
+        for position, (op, e, a) in enumerate(ops):
+            if op == EQUAL:
+                continue
+            # A delete followed by an insert is one changed line
+            if op == DELETE and position + 1 < len(ops) and ops[position + 1][0] == INSERT:
+                return e, self.expected[e], self.actual[ops[position + 1][2]]
+            if op == DELETE:
+                return e, self.expected[e], None
+            return a, None, self.actual[a]
+        return None
+
+
+def normalize(line):
+    return line.lower() if line is not None else None
+
+
+def myers(a, b, max_edits):
+    """Edit script turning a into b, or None if it needs more than max_edits edits"""
+    n, m = len(a), len(b)
+    offset = max_edits + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+
+    for d in range(max_edits + 1):
+        trace.append(list(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]  # down: insert from b
+            else:
+                x = v[offset + k - 1] + 1  # right: delete from a
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return backtrack(trace, v, offset, n, m, d)
+    return None
+
+
+def backtrack(trace, v, offset, n, m, d):
+    ops = []
+    x, y = n, m
+    for depth in range(d, 0, -1):
+        previous = trace[depth]
+        k = x - y
+        if k == -depth or (k != depth and previous[offset + k - 1] < previous[offset + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = previous[offset + prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            ops.append((EQUAL, x, y))
+        if x == prev_x:
+            y -= 1
+            ops.append((INSERT, x, y))
+        else:
+            x -= 1
+            ops.append((DELETE, x, y))
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        ops.append((EQUAL, x, y))
+    ops.reverse()
+    return ops
+
+
+def diff_lines(expected, actual, max_lines=2000, max_edits=200):
+    """Diff two outputs line by line, bounded in input size and edit distance"""
+    expected, actual = expected.strip(), actual.strip()
+    expected_lines = expected.split("\n", max_lines)
+    actual_lines = actual.split("\n", max_lines)
+    truncated = len(expected_lines) > max_lines or len(actual_lines) > max_lines
+    expected_lines = expected_lines[:max_lines]
+    actual_lines = actual_lines[:max_lines]
+
+    # Lowercasing once is much cheaper than per line
+    a = normalize(expected).split("\n", max_lines)[:max_lines]
+    b = normalize(actual).split("\n", max_lines)[:max_lines]
+
+    # Outputs are usually right up to one spot, so skip the common ends first
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+
+    middle = myers(a[start:len(a) - end], b[start:len(b) - end], max_edits)
+    if middle is None:
+        return OutputDiff(expected_lines, actual_lines, None, truncated, True)
+
+    ops = [(EQUAL, i, i) for i in range(start)]
+    ops += [(op, e + start, ac + start) for op, e, ac in middle]
+    tail_a, tail_b = len(a) - end, len(b) - end
+    ops += [(EQUAL, tail_a + i, tail_b + i) for i in range(end)]
+    return OutputDiff(expected_lines, actual_lines, ops, truncated, False)
+
+
+def shorten(text, width=60):
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def summary_lines(diff):
+    """A few lines for the terminal: where the first difference is and what it is"""
+    first = diff.first_difference()
+    if first is None:
+        return []
+
+    index, expected, actual = first
+    lines = [f"❌ Output differs from line {index + 1}:"]
+    if expected is not None and actual is not None:
+        lines.append(f"   expected: {shorten(expected)!r}")
+        lines.append(f"   got:      {shorten(actual)!r}")
+        column = next((i for i, (x, y) in enumerate(zip(expected.lower(), actual.lower())) if x != y), min(len(expected), len(actual)))
+        lines.append(f"   (first different character at column {column + 1})")
+    elif expected is not None:
+        lines.append(f"   missing line: {shorten(expected)!r}")
+    else:
+        lines.append(f"   extra line:   {shorten(actual)!r}")
+
+    if diff.gave_up:
+        lines.append("   The rest of the output is too different to compare line by line.")
+    elif diff.changed_lines > 1:
+        lines.append(f"   ({diff.changed_lines - 1} more lines differ after this one)")
+    if diff.truncated:
+        lines.append("   (only the first lines were compared)")
+    return lines
@@ -0,0 +1,130 @@
+from pyscript import window
+from terminalWorker import terminal
+from perfMonitor import perf
+from memoryGuard import LEARNER_FILENAME
+from importlib.machinery import EXTENSION_SUFFIXES
+import builtins
+import sys
+import time
+
+# sys attributes a learner's program can rebind
+SYS_ATTRIBUTES = ["stdin", "stdout", "stderr", "displayhook", "excepthook", "breakpointhook"]
+
+# Modules whose import ran under learner code (terminal runs and test cases alike).
+# Only these are forgotten on rollback: the app imports some modules lazily
+# (caseGrader, tracemalloc) and those must keep their module-level state.
+learner_imports = set()
+import_hook_installed = False
+
+
+def record_learner_import(event, args):
+    """Audit hook: note modules imported with learner code somewhere up the stack"""
+    if event != "import":
+        return
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_filename == LEARNER_FILENAME:
+            learner_imports.add(args[0])
+            return
+        frame = frame.f_back
+
+
+def track_learner_imports():
+    # Audit hooks can't be removed, so there is only ever one
+    global import_hook_installed
+    if not import_hook_installed:
+        sys.addaudithook(record_learner_import)
+        import_hook_installed = True
+
+
+def is_compiled(module):
+    """Extension and built-in modules can't be imported a second time safely"""
+    name = getattr(module, "__name__", "")
+    return name in sys.builtin_module_names or str(getattr(module, "__file__", "")).endswith(tuple(EXTENSION_SUFFIXES))
+
+
+class InterpreterSnapshot:
+    """
+    The interpreter state a level starts from, to undo whatever an attempt changed
+
+    Records which modules are imported, the builtins, a few sys attributes
+    (stdout, hooks, sys.path, the recursion limit) and the main terminal's
+    session namespace; other terminal windows keep theirs. Restoring forgets
+    only the modules learner code imported since. All of it is shallow:
+    restoring puts the same objects back, so it takes milliseconds, but a list
+    the learner mutated in place stays mutated, and attributes patched on a
+    module imported before the snapshot stay too.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.taken = None
+
+    @perf.timed("state_snapshot")
+    def take(self):
+        track_learner_imports()
+        self.modules = dict(sys.modules)
+        self.builtins = dict(builtins.__dict__)
+        self.sys_attributes = {name: getattr(sys, name) for name in SYS_ATTRIBUTES if hasattr(sys, name)}
+        self.sys_path = list(sys.path)
+        self.recursion_limit = sys.getrecursionlimit()
+        self.namespace = dict(self.session.namespace) if self.session.namespace is not None else None
+        self.taken = time.perf_counter()
+
+    def restore_modules(self):
+        """Forget modules learner code imported since the snapshot and put back replaced ones; returns how many"""
+        added = [name for name in sys.modules if name not in self.modules and name in learner_imports]
+
+        # A package with compiled parts (numpy, say) has to stay imported as a whole
+        keep = {name.partition(".")[0] for name in added if is_compiled(sys.modules[name])}
+        keep |= {name.partition(".")[0] for name, module in self.modules.items() if is_compiled(module)}
+
+        removed = 0
+        for name in added:
+            if name.partition(".")[0] not in keep:
+                del sys.modules[name]
+                removed += 1
+        learner_imports.difference_update(added)
+        for name, module in self.modules.items():
+            if sys.modules.get(name) is not module:
+                sys.modules[name] = module
+        return removed
+
+    def restore_builtins(self):
+        current = builtins.__dict__
+        for name in [name for name in current if name not in self.builtins]:
+            del current[name]
+        for name, value in self.builtins.items():
+            if current.get(name) is not value:
+                current[name] = value
+
+    @perf.timed("state_rollback")
+    def restore(self):
+        """Put the interpreter back as it was when take() ran; returns modules forgotten"""
+        if self.taken is None:
+            return 0
+
+        # An attempt still waiting for input belongs to the state being undone
+        if self.session.is_running():
+            self.session.task.cancel()
+
+        removed = self.restore_modules()
+        self.restore_builtins()
+        for name, value in self.sys_attributes.items():
+            setattr(sys, name, value)
+        sys.path[:] = self.sys_path
+        sys.setrecursionlimit(self.recursion_limit)
+        self.session.namespace = dict(self.namespace) if self.namespace is not None else None
+        return removed
+
+
+level_snapshot = InterpreterSnapshot(terminal)
+
+
+def rollback():
+    """Undo the current attempt's changes to the interpreter, and say how long it took"""
+    started = time.perf_counter()
+    removed = level_snapshot.restore()
+    took = (time.perf_counter() - started) * 1000
+    window.console.log(f"⏪ Interpreter state rolled back in {took:.1f} ms ({removed} modules forgotten)")
+    return took
@@ -1,12 +1,40 @@
 from pyscript import document, window
-from js import ace, console
-from pyodide.ffi import create_proxy
+from proxyRegistry import proxy_registry
+from readiness import ready
+from startupTiming import startup
+from perfMonitor import perf
+from windowManager import window_manager
+from movableDiv import make_draggable
+from resizableDiv import make_resizable, forget_resizable
+from memoryGuard import memory_guard, set_memory_cap
+from contextvars import ContextVar
 import sys
 import asyncio
+import ast
+import builtins
+import re
+
+# Terminal of the run in progress; each run is its own task with its own copy,
+# so print() in concurrent runs never ends up in the wrong terminal
+current_terminal = ContextVar("current_terminal", default=None)
+
+# Called after a run in any terminal, including ones opened later
+any_finished_listeners = []
+
+# create_proxy() calls in learner code, not attribute calls like ffi.create_proxy()
+CREATE_PROXY_CALL = re.compile(r'(?<![\w.])create_proxy\(')
+
+
+def learner_namespace(session):
+    """Fresh globals for learner code: a plain __main__, none of the app's modules"""
+    return {"__name__": "__main__", "__builtins__": builtins, "__terminal__": session}
+
 
 class AceTerminal:
     def __init__(self, terminal_element_id):
         self.terminal_id = terminal_element_id
+        self.window_scope = f"window:{terminal_element_id}-modal"  # handlers of the window it lives in
+        self.run_scope = f"run:{terminal_element_id}"  # callbacks made by this terminal's current run
         self.editor = None
         self.history = []
         self.history_index = -1
@@ -17,15 +45,22 @@ class AceTerminal:
         self.is_updating = False
         self.last_output = ""  # Track last output
         self.execution_output = []  # Track all output from current execution
-        
-    def setup_ace(self):
-        """Initialize Ace Editor as terminal"""
+        self.namespace = None  # Globals shared by this terminal's runs
+        self.last_namespace = {}  # Globals of the last run, for completions
+        self.task = None  # Run in progress
+        self.pending_output = ""  # print() text waiting for the end of its line
+        self.finished_listeners = []
+        self.answers = None  # input() answers the current run was given, instead of a person typing
+        
+    async def setup_ace(self):
+        """Initialize Ace Editor as terminal, loading the Ace bundle first if needed"""
         try:
             element = document.getElementById(self.terminal_id)
             if not element:
-                console.error(f"Element with id '{self.terminal_id}' not found!")
+                window.console.error(f"Element with id '{self.terminal_id}' not found!")
                 return False
-                
+            
+            ace = await window.loadAce()
             self.editor = ace.edit(self.terminal_id)
             
             self.editor.setTheme("ace/theme/terminal")
@@ -50,17 +85,17 @@ class AceTerminal:
             return True
             
         except Exception as e:
-            console.error(f"Error initializing terminal: {e}")
+            window.console.error(f"Error initializing terminal: {e}")
             return False
         
     def setup_event_listeners(self):
         """Setup event listeners on the text input"""
         textarea = self.editor.textInput.getElement()
         
-        keydown_proxy = create_proxy(self.handle_keydown)
+        keydown_proxy = proxy_registry.create(self.handle_keydown, self.window_scope)
         textarea.addEventListener('keydown', keydown_proxy)
         
-        change_proxy = create_proxy(self.handle_change)
+        change_proxy = proxy_registry.create(self.handle_change, self.window_scope)
         self.editor.on('change', change_proxy)
         
     def handle_change(self, delta, editor):
@@ -181,6 +216,10 @@ class AceTerminal:
             if command.strip() == "clear":
                 self.clear()
                 return
+            elif command.strip() == "reset":
+                self.reset_namespace()
+                self.write("Variables cleared, this terminal starts fresh.")
+                return
             elif command.strip() == "next_lvl":
                 self.clear()
                 window.next_lvl()
@@ -228,16 +267,18 @@ class AceTerminal:
         self.editor.navigateFileEnd()
         self.is_updating = False
         
-    def write(self, text):
+    @perf.timed("terminal_write")
+    def write(self, text, record=True):
+        """Show a line above the prompt; record=False keeps it out of the graded output"""
         if not self.editor:
             return
             
         if not text.strip():
             return
         
-        self.last_output = str(text)
-
-        self.execution_output.append(str(text))
+        if record:
+            self.last_output = str(text)
+            self.execution_output.append(str(text))
         
         content = self.editor.getValue()
         lines = content.split('\n')
@@ -255,6 +296,17 @@ class AceTerminal:
         self.editor.navigateFileEnd()
         self.is_updating = False
         
+    def write_output(self, text):
+        """stdout data: print('a', 1) arrives in pieces, so write whole lines only"""
+        *lines, self.pending_output = (self.pending_output + text).split('\n')
+        for line in lines:
+            self.write(line)
+    
+    def flush_output(self):
+        if self.pending_output:
+            line, self.pending_output = self.pending_output, ""
+            self.write(line)
+    
     def write_error(self, text):
         """Write error text"""
         self.write(f"Error: {text}")
@@ -288,68 +340,224 @@ class AceTerminal:
     
     async def custom_input(self, prompt_text=""):
         """Async input implementation"""
+        self.flush_output()
         if prompt_text:
             self.write(prompt_text)
         
+        if self.answers is not None:
+            if not self.answers:
+                raise EOFError("the program asked for more input than this run was given")
+            answer = self.answers.pop(0)
+            self.write(answer, record=False)  # shown like a typed answer, not graded output
+            return answer
+        
         self.input_promise = asyncio.Future()
         self.waiting_for_input = True
         
-        result = await self.input_promise
+        # Nobody allocates while a person types, and the app shouldn't pay for tracemalloc meanwhile;
+        # the wait isn't part of the run's execute_code span either
+        with memory_guard.paused(), perf.paused():
+            result = await self.input_promise
         return result
             
-    def execute_code(self, code):
+    def create_proxy(self, func):
+        """create_proxy() for learner code: freed when the next run starts instead of leaking"""
+        return proxy_registry.create(func, self.run_scope)
+    
+    def compile_code(self, code):
+        """Compile learner code, with input() and create_proxy() routed to the terminal"""
+        modified_code = code.replace('input(', 'await __terminal__.custom_input(')
+        modified_code = CREATE_PROXY_CALL.sub('__terminal__.create_proxy(', modified_code)
+        
+        # Top-level await keeps learner names in the run's globals (and line numbers as written)
+        return compile(modified_code, '<terminal>', 'exec', flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+    
+    def reset_namespace(self):
+        """Start over with a fresh set of globals for this terminal"""
+        proxy_registry.release(self.run_scope)
+        self.namespace = learner_namespace(self)
+    
+    def is_running(self):
+        return self.task is not None and not self.task.done()
+    
+    def execute_code(self, code, stdin=None):
+        """
+        Start running code as self.task (its result is the run's RunMemory)
+        
+        With stdin (a list of answers), input() takes those instead of waiting
+        for someone to type. Returns False if no run was started.
+        """
         if not code.strip():
             self.write("No code to execute")
-            return
+            return False
+        
+        if self.is_running():
+            self.write("⏳ A program is still running in this terminal, open another one with +")
+            return False
         
         self.clear_execution_output()
+        self.answers = [str(answer) for answer in stdin] if stdin is not None else None
+        
+        # Callbacks left over from the previous run are no longer needed
+        proxy_registry.release(self.run_scope)
+        
+        if self.namespace is None:
+            self.reset_namespace()
+        exec_globals = self.namespace
         
         async def run():
-            try:
-                modified_code = code.replace('input(', 'await terminal.custom_input(')
-                
-                code_obj = compile(
-                    f"async def __exec_wrapper():\n" + 
-                    "\n".join(f"    {line}" for line in modified_code.split('\n')) +
-                    "\n",
-                    '<terminal>',
-                    'exec'
-                )
-                
-                exec_globals = globals().copy()
-                exec(code_obj, exec_globals)
+            # Output of this run, and of tasks it starts, goes to this terminal
+            current_terminal.set(self)
+            with memory_guard.run() as memory:
+                try:
+                    with perf.span("execute_code"):
+                        result = eval(self.compile_code(code), exec_globals)
+                        if asyncio.iscoroutine(result):
+                            await result
+                        memory_guard.check(memory)
+                        
+                except MemoryError as e:
+                    self.write_error(f"MemoryError: {e}")
+                    # The cap trips after the allocation, so whatever got bound still holds it
+                    exec_globals.clear()
+                    exec_globals.update(learner_namespace(self))
+                    self.write("🧹 Variables cleared to free the memory, this terminal starts fresh.", record=False)
+                except Exception as e:
+                    import traceback
+                    self.write_error(f"{type(e).__name__}: {e}")
+                    window.console.error(traceback.format_exc())
+                finally:
+                    self.flush_output()
+                    self.last_namespace = exec_globals
+                    for listener in self.finished_listeners + any_finished_listeners:
+                        try:
+                            listener(exec_globals)
+                        except Exception as e:
+                            window.console.error(f"Error in run listener: {e}")
+            if memory_guard.available:
+                self.write(f"📊 Peak memory: {memory.describe()}", record=False)
+            return memory
+        
+        self.task = asyncio.create_task(run())
+        return True
+    
+    def close(self):
+        """End this session for good: its run, its program's callbacks and its editor"""
+        if self.is_running():
+            self.task.cancel()
+        proxy_registry.release(self.run_scope)
+        if self.editor:
+            self.editor.destroy()
+            self.editor = None
+    
+    def on_finished(self, listener):
+        """Call listener(namespace) after each run, with the globals the code ran in"""
+        self.finished_listeners.append(listener)
+
+
+def on_any_finished(listener):
+    """Call listener(namespace) after each run in every terminal"""
+    any_finished_listeners.append(listener)
+
+
+class TerminalWriter:
+    """sys.stdout/sys.stderr: writes to the terminal of the current run, else to `terminal`"""
+    
+    def __init__(self, terminal, is_error=False):
+        self.terminal = terminal
+        self.is_error = is_error
+        
+    def write(self, text):
+        terminal = current_terminal.get() or self.terminal
+        if self.is_error:
+            if text.strip():
+                terminal.write_error(text.strip())
+        else:
+            terminal.write_output(text)
                 
-                await exec_globals['__exec_wrapper']()
-                    
-            except Exception as e:
-                import traceback
-                self.write_error(f"{type(e).__name__}: {e}")
-                console.error(traceback.format_exc())
-        
-        asyncio.create_task(run())
+    def flush(self):
+        if not self.is_error:
+            (current_terminal.get() or self.terminal).flush_output()
 
 
 # Initialize terminal
 terminal = AceTerminal("terminal")
+terminals = {terminal.terminal_id: terminal}  # element id -> session
+
+terminal_window_html = '''
+    <header class="top-bar">
+        <div class="flexy items">
+            <h1 class="top-bar-h1">{title}</h1>
+            <div class="window-controls">
+                <button class="window-btn close-terminal-btn" title="Close">X</button>
+            </div>
+        </div>
+    </header>
+    <div id="{terminal_id}" class="terminal-session"></div>
+'''
 
-async def init_terminal():
-    await asyncio.sleep(0.1)
-    if terminal.setup_ace():
-        class TerminalWriter:
-            def __init__(self, terminal, is_error=False):
-                self.terminal = terminal
-                self.is_error = is_error
-                
-            def write(self, text):
-                if text.strip():
-                    if self.is_error:
-                        self.terminal.write_error(text.strip())
-                    else:
-                        self.terminal.write(text.strip())
-                        
-            def flush(self):
-                pass
 
+async def new_terminal(event=None):
+    """Open another terminal window with its own namespace, history and runs"""
+    number = len(terminals) + 1
+    while f"terminal-{number}" in terminals:
+        number += 1
+    terminal_id = f"terminal-{number}"
+    offset = 30 * (number - 1)
+    
+    dialog = document.createElement("dialog")
+    dialog.id = f"{terminal_id}-modal"
+    dialog.className = "container movable-div resizable-div"
+    dialog.setAttribute("style", f"left: {100 + offset}px; top: {100 + offset}px; width: 500px; height: 400px;")
+    dialog.innerHTML = terminal_window_html.format(title=f"Terminal {number}", terminal_id=terminal_id)
+    document.body.appendChild(dialog)
+    
+    make_draggable(dialog)
+    make_resizable(dialog)
+    dialog.querySelector(".close-terminal-btn").onclick = proxy_registry.create(close_terminal, f"window:{dialog.id}")
+    window_manager.restore(dialog)
+    
+    session = AceTerminal(terminal_id)
+    if not await session.setup_ace():
+        return None
+    terminals[terminal_id] = session
+    session.write(f"Terminal {number}: its own variables and runs, independent of the others.")
+    return session
+
+
+def open_new_terminal(event=None):
+    asyncio.ensure_future(new_terminal())
+
+
+async def close_terminal_window(dialog):
+    """Remove an extra terminal window with its session and every handler it owns"""
+    session = terminals.pop(dialog.id.removesuffix("-modal"), None)
+    if session is not None:
+        session.close()
+    forget_resizable(dialog)
+    window_manager.forget(dialog)
+    dialog.remove()
+    released = proxy_registry.release(f"window:{dialog.id}")
+    window.console.log(f"🗑️ Closed {dialog.id}, {released} handlers released")
+
+
+def close_terminal(event):
+    dialog = event.target.closest('dialog')
+    if dialog:
+        # After this click handler returns, since its own proxy is released too
+        asyncio.ensure_future(close_terminal_window(dialog))
+    event.stopPropagation()
+    event.preventDefault()
+
+async def setup():
+    # Usually already prefetched at idle by aceLoader.js
+    with startup.phase("ace_load"):
+        await window.loadAce()
+    
+    with startup.phase("ace_init:terminal"):
+        terminal_ok = await terminal.setup_ace()
+    
+    if terminal_ok:
         sys.stdout = TerminalWriter(terminal)
         sys.stderr = TerminalWriter(terminal, is_error=True)
 
@@ -358,7 +566,12 @@ async def init_terminal():
         
         # Expose terminal to window after setup
         window.terminal = terminal
+        window.new_terminal = proxy_registry.create(open_new_terminal)
+        window.set_memory_cap = proxy_registry.create(set_memory_cap)
+        
+        new_button = document.querySelector("#terminal-modal .new-terminal-btn")
+        if new_button:
+            new_button.onclick = proxy_registry.create(open_new_terminal)
+        ready.set("terminal")
     else:
-        console.error("Failed to initialize terminal!")
-
-asyncio.create_task(init_terminal())
\ No newline at end of file
+        window.console.error("Failed to initialize terminal!")
@@ -1,87 +1,102 @@
 from pyscript import window, document
-from pyodide.ffi import create_proxy
-
-last_active_div = None
-
-def set_window_active(move_div, z_index=1):
-    """Centralized function to set a window as active"""
-    global last_active_div
-    
-    # Get all movable divs (including dialogs)
-    all_windows = document.querySelectorAll('.movable-div')
-    
-    # Reset all windows to inactive state
-    for win in all_windows:
-        win.style.zIndex = str(z_index - 1)
-        win.style.backgroundColor = "#000000"
-        top_bar = win.querySelector(".top-bar")
-        if top_bar:
-            top_bar.style.backgroundColor = "#1e1e1e"
-    
-    # Set the clicked window as active
-    move_div.style.zIndex = str(z_index + 1)
-    move_div.style.backgroundColor = "#1a1a1a"
-    top_bar = move_div.querySelector(".top-bar")
-    if top_bar:
-        top_bar.style.backgroundColor = "#007acc"
-    
-    last_active_div = move_div
+from proxyRegistry import proxy_registry
+from windowManager import window_manager
+from perfMonitor import perf
 
 def make_draggable(move_div):
+    scope = f"window:{move_div.id}"
     top_bar = move_div.querySelector(".top-bar")
 
-    offset_x = 0
-    offset_y = 0
+    grab_x = 0
+    grab_y = 0
+    start_left = 0
+    start_top = 0
+    pointer_x = 0
+    pointer_y = 0
+    frame_id = None
+    
+    def applyFrame(timestamp):
+        """Write the latest pointer position once per animation frame"""
+        nonlocal frame_id
+        frame_id = None
+        
+        # Transform keeps the move on the compositor, no layout per frame
+        with perf.span("window_drag"):
+            move_div.style.transform = f"translate({pointer_x - grab_x}px, {pointer_y - grab_y}px)"
     
     def draggableMove(event):
-        nonlocal offset_x, offset_y
+        nonlocal pointer_x, pointer_y, frame_id
         
-        position_x = event.clientX - offset_x
-        position_y = event.clientY - offset_y
+        pointer_x = event.clientX
+        pointer_y = event.clientY
         
-        move_div.style.left = f"{position_x}px"
-        move_div.style.top = f"{position_y}px"
+        # Coalesce all moves of this frame into a single style write
+        if frame_id is None:
+            frame_id = window.requestAnimationFrame(apply_frame_proxy)
     
     def holdingMouse(event):
-        # Make active when starting to drag
-        set_window_active(move_div, 100)
-        
-        nonlocal offset_x, offset_y
+        nonlocal grab_x, grab_y, start_left, start_top, pointer_x, pointer_y
         
         rect = move_div.getBoundingClientRect()
-        offset_x = event.clientX - rect.left
-        offset_y = event.clientY - rect.top
+        start_left = rect.left
+        start_top = rect.top
+        grab_x = pointer_x = event.clientX
+        grab_y = pointer_y = event.clientY
+        
+        move_div.classList.add("dragging")
         
         document.addEventListener("mousemove", draggable_move_proxy)
+        document.addEventListener("mouseup", release_mouse_proxy)
     
     def releaseMouse(event):
+        nonlocal frame_id, pointer_x, pointer_y
+        
         document.removeEventListener("mousemove", draggable_move_proxy)
+        document.removeEventListener("mouseup", release_mouse_proxy)
+        
+        if frame_id is not None:
+            window.cancelAnimationFrame(frame_id)
+            frame_id = None
+        
+        pointer_x = event.clientX
+        pointer_y = event.clientY
+        
+        # Commit the final position and drop the temporary transform
+        with perf.span("window_drop"):
+            move_div.style.left = f"{start_left + pointer_x - grab_x}px"
+            move_div.style.top = f"{start_top + pointer_y - grab_y}px"
+            move_div.style.transform = ""
+            move_div.classList.remove("dragging")
+            
+            window_manager.save_layout()
     
     def handleClick(event):
         """Handle click anywhere on the window to make it active"""
         # Don't activate if clicking on resize handles
         if 'resize-handle' in event.target.className:
             return
-        set_window_active(move_div, 100)
+        window_manager.focus(move_div)
     
-    draggable_move_proxy = create_proxy(draggableMove)
-    holding_mouse_proxy = create_proxy(holdingMouse)
-    release_mouse_proxy = create_proxy(releaseMouse)
-    click_proxy = create_proxy(handleClick)
+    apply_frame_proxy = proxy_registry.create(applyFrame, scope)
+    draggable_move_proxy = proxy_registry.create(draggableMove, scope)
+    holding_mouse_proxy = proxy_registry.create(holdingMouse, scope)
+    release_mouse_proxy = proxy_registry.create(releaseMouse, scope)
+    click_proxy = proxy_registry.create(handleClick, scope)
     
     if top_bar:
         top_bar.addEventListener("mousedown", holding_mouse_proxy)
     
     # Add click listener to entire div to handle focus
+    # (also covers mousedown on the top bar, which bubbles up here)
     move_div.addEventListener("mousedown", click_proxy)
+    
+    window_manager.register(move_div)
 
-    document.addEventListener("mouseup", release_mouse_proxy)
-
-# Initialize all movable divs
-all_movable_divs = document.querySelectorAll(".movable-div")
-
-for div in all_movable_divs:
-    make_draggable(div)
-
-# Expose the set_window_active function for use by modal system
-window.set_window_active = set_window_active
\ No newline at end of file
+def setup():
+    """Initialize all movable divs"""
+    all_movable_divs = document.querySelectorAll(".movable-div")
+    
+    for div in all_movable_divs:
+        make_draggable(div)
+    
+    window_manager.restore_layout()
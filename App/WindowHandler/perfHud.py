@@ -0,0 +1,108 @@
+from pyscript import window, document
+from pyodide.ffi import to_js
+from proxyRegistry import proxy_registry
+from windowManager import window_manager
+from windowDiv import open_modal_by_id
+from perfMonitor import perf
+
+hud_id = "perf-hud"
+refresh_delay = 1000
+refresh_timer = None
+refresh_proxy = None
+
+
+def is_open():
+    hud = document.getElementById(hud_id)
+    return hud is not None and hud.style.display != 'none' and not window_manager.is_minimized(hud)
+
+
+def render():
+    """p50/p95 per span, JS -> Python calls and the proxy counts, as a small text table"""
+    report = perf.report()
+    lines = [f"{'span':<16}{'n':>6}{'p50':>9}{'p95':>9}{'max':>9}  ms"]
+    for name, stats in report["spans"].items():
+        lines.append(f"{name:<16}{stats['count']:>6}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['max']:>9.2f}")
+    if not report["spans"]:
+        lines.append("(nothing measured yet)")
+
+    stalls = report.get("stalls")
+    if stalls:
+        lines.append("")
+        lines.append(f"stalls: {stalls['count']}, {stalls['total_ms']:.0f} of {stalls['budget_ms']} ms budget")
+        for name, total in sorted(stalls["by_blame"].items(), key=lambda item: item[1], reverse=True)[:3]:
+            lines.append(f"  {name}: {total:.0f} ms")
+
+    ffi = report["ffi"]
+    lines.append("")
+    lines.append(f"JS → Python calls: {ffi['calls_from_js']} (Python → JS calls not counted)")
+    for label, count in list(ffi["calls_by_label"].items())[:3]:
+        lines.append(f"  {label}: {count}")
+    lines.append(f"Proxies: {ffi['proxies_created']} created, {ffi['proxies_destroyed']} destroyed")
+    for scope, count in ffi["proxies_live"].items():
+        lines.append(f"  live in {scope}: {count}")
+
+    document.getElementById("perf-hud-body").textContent = "\n".join(lines)
+
+
+def refresh(*args):
+    """Redraw while the HUD is visible, then stop polling"""
+    global refresh_timer
+    refresh_timer = None
+    if not is_open():
+        return
+    render()
+    refresh_timer = window.setTimeout(refresh_proxy, refresh_delay)
+
+
+def toggle_hud(event=None):
+    hud = document.getElementById(hud_id)
+    if hud is None:
+        return
+    if is_open():
+        window_manager.minimize(hud)
+    else:
+        open_modal_by_id(hud_id)
+        if refresh_timer is None:
+            refresh()
+
+
+def handle_keydown(event):
+    """Ctrl+Alt+P toggles the HUD"""
+    if event.ctrlKey and event.altKey and event.code == "KeyP":
+        event.preventDefault()
+        toggle_hud()
+
+
+def export_report(event=None):
+    """Download the full report (all spans, recent samples, proxies) as JSON"""
+    blob = window.Blob.new(to_js([perf.export_json()]), to_js({"type": "application/json"}, dict_converter=window.Object.fromEntries))
+    url = window.URL.createObjectURL(blob)
+    link = document.createElement("a")
+    link.href = url
+    link.download = "pythology-perf.json"
+    link.click()
+    window.URL.revokeObjectURL(url)
+
+
+def reset_report(event=None):
+    perf.reset()
+    render()
+
+
+def setup():
+    global refresh_proxy
+    refresh_proxy = proxy_registry.create(refresh)
+
+    document.addEventListener("keydown", proxy_registry.create(handle_keydown))
+
+    export_button = document.getElementById("perf-hud-export")
+    if export_button:
+        export_button.onclick = proxy_registry.create(export_report)
+
+    reset_button = document.getElementById("perf-hud-reset")
+    if reset_button:
+        reset_button.onclick = proxy_registry.create(reset_report)
+
+    # Console access, e.g. perf.export_json() or toggle_perf_hud()
+    window.perf = perf
+    window.toggle_perf_hud = proxy_registry.create(toggle_hud)
@@ -1,5 +1,25 @@
 from pyscript import window, document
-from pyodide.ffi import create_proxy
+from proxyRegistry import proxy_registry
+from windowManager import window_manager
+
+# Ace editors looked up once per element id instead of on every resize
+ace_editors = {}
+relayout_delay = 100
+relayout_timers = {}
+relayout_proxies = {}
+
+def get_ace_editor(editor_element):
+    """Return the cached Ace editor for an element, looking it up only once"""
+    editor_id = editor_element.id
+    if not editor_id:
+        return None
+    
+    editor = ace_editors.get(editor_id)
+    ace = getattr(window, 'ace', None)  # not there until aceLoader.js has run
+    if editor is None and ace is not None:
+        editor = ace.edit(editor_id)
+        ace_editors[editor_id] = editor
+    return editor
 
 def resize_ace_editor(container_div):
     """Force Ace Editor to recalculate its dimensions"""
@@ -7,15 +27,52 @@ def resize_ace_editor(container_div):
         # Find ace editor element inside the container
         editor_element = container_div.querySelector('.ace_editor')
         if editor_element:
-            editor_id = editor_element.id
-            if editor_id and hasattr(window.ace, 'edit'):
-                editor = window.ace.edit(editor_id)
+            editor = get_ace_editor(editor_element)
+            if editor:
                 editor.resize()
     except Exception as e:
         window.console.error(f"Error resizing ace editor: {e}")
 
+def schedule_relayout(container_div):
+    """Debounce Ace relayout until the container stops changing size"""
+    container_id = container_div.id
+    
+    timer = relayout_timers.get(container_id)
+    if timer is not None:
+        window.clearTimeout(timer)
+    
+    proxy = relayout_proxies.get(container_id)
+    if proxy is None:
+        def relayout():
+            relayout_timers.pop(container_id, None)
+            resize_ace_editor(container_div)
+        
+        proxy = proxy_registry.create(relayout, f"window:{container_id}")
+        relayout_proxies[container_id] = proxy
+    
+    relayout_timers[container_id] = window.setTimeout(proxy, relayout_delay)
+
+def forget_resizable(resize_div):
+    """Drop what make_resizable keeps for a window that is going away"""
+    container_id = resize_div.id
+    timer = relayout_timers.pop(container_id, None)
+    if timer is not None:
+        window.clearTimeout(timer)
+    relayout_proxies.pop(container_id, None)
+    editor_element = resize_div.querySelector('.ace_editor')
+    if editor_element:
+        ace_editors.pop(editor_element.id, None)
+    if resize_observer is not None:
+        resize_observer.unobserve(resize_div)
+
+def on_container_resized(entries, observer=None):
+    """ResizeObserver callback for every resizable window"""
+    for entry in entries:
+        schedule_relayout(entry.target)
+
 def make_resizable(resize_div):
     """Make a div resizable by adding resize handles"""
+    scope = f"window:{resize_div.id}"
     
     # Add resize handles to the div
     resize_div.insertAdjacentHTML('beforeend', '''
@@ -40,11 +97,17 @@ def make_resizable(resize_div):
     start_left = 0
     start_top = 0
     current_handle = None
+    pointer_x = 0
+    pointer_y = 0
+    frame_id = None
     
     def start_resize(event):
         nonlocal is_resizing, start_x, start_y, start_width, start_height
         nonlocal start_left, start_top, current_handle
         
+        if is_resizing:
+            return
+        
         is_resizing = True
         start_x = event.clientX
         start_y = event.clientY
@@ -60,17 +123,35 @@ def make_resizable(resize_div):
         # Add no-select class to prevent text selection
         document.body.classList.add('no-select')
         
+        # Listen to the document only while this resize is active
+        document.addEventListener('mousemove', do_resize_proxy)
+        document.addEventListener('mouseup', stop_resize_proxy)
+        
         event.stopPropagation()
         event.preventDefault()
     
     def do_resize(event):
-        nonlocal is_resizing
+        nonlocal pointer_x, pointer_y, frame_id
+        
+        if not is_resizing:
+            return
+        
+        pointer_x = event.clientX
+        pointer_y = event.clientY
+        
+        # Coalesce all moves of this frame into a single size update
+        if frame_id is None:
+            frame_id = window.requestAnimationFrame(apply_frame_proxy)
+    
+    def apply_frame(timestamp=None):
+        nonlocal frame_id
+        frame_id = None
         
         if not is_resizing or current_handle is None:
             return
         
-        dx = event.clientX - start_x
-        dy = event.clientY - start_y
+        dx = pointer_x - start_x
+        dy = pointer_y - start_y
         
         # Minimum dimensions
         min_width = 200
@@ -138,29 +219,54 @@ def make_resizable(resize_div):
             resize_div.style.height = f"{new_height}px"
     
     def stop_resize(event):
-        nonlocal is_resizing, current_handle
+        nonlocal is_resizing, current_handle, frame_id, pointer_x, pointer_y
+        
+        document.removeEventListener('mousemove', do_resize_proxy)
+        document.removeEventListener('mouseup', stop_resize_proxy)
+        
+        if frame_id is not None:
+            window.cancelAnimationFrame(frame_id)
+            frame_id = None
+        
+        # Apply the final size right away
+        pointer_x = event.clientX
+        pointer_y = event.clientY
+        apply_frame()
+        
         is_resizing = False
         current_handle = None
         document.body.classList.remove('no-select')
         
-        # Trigger resize event for Ace Editor
-        resize_ace_editor(resize_div)
+        window_manager.save_layout()
+        
+        # Ace relayout is normally driven by the ResizeObserver
+        if resize_observer is None:
+            resize_ace_editor(resize_div)
     
     # Create proxies
-    start_resize_proxy = create_proxy(start_resize)
-    do_resize_proxy = create_proxy(do_resize)
-    stop_resize_proxy = create_proxy(stop_resize)
+    start_resize_proxy = proxy_registry.create(start_resize, scope)
+    do_resize_proxy = proxy_registry.create(do_resize, scope)
+    apply_frame_proxy = proxy_registry.create(apply_frame, scope)
+    stop_resize_proxy = proxy_registry.create(stop_resize, scope)
     
     # Add event listeners to all handles
     for handle in handles:
         handle.addEventListener('mousedown', start_resize_proxy)
     
-    document.addEventListener('mousemove', do_resize_proxy)
-    document.addEventListener('mouseup', stop_resize_proxy)
-
+    if resize_observer is not None:
+        resize_observer.observe(resize_div)
 
-# Make all resizable divs resizable
-all_resizable_divs = document.querySelectorAll('.resizable-div')
+# One observer relayouts Ace for every resizable window
+resize_observer = None
 
-for div in all_resizable_divs:
-    make_resizable(div)
\ No newline at end of file
+def setup():
+    """Make all resizable divs resizable"""
+    global resize_observer
+    
+    if hasattr(window, 'ResizeObserver'):
+        resize_observer = window.ResizeObserver.new(proxy_registry.create(on_container_resized))
+    
+    all_resizable_divs = document.querySelectorAll('.resizable-div')
+    
+    for div in all_resizable_divs:
+        make_resizable(div)
@@ -1,10 +1,9 @@
 from pyscript import window, document
-from pyodide.ffi import create_proxy
-import asyncio
+from proxyRegistry import proxy_registry
+from windowManager import window_manager
 
-async def wait_for_dom():
-    """Wait for DOM to be ready"""
-    await asyncio.sleep(0.3)
+# Windows hosting an Ace editor; opening one starts loading Ace if it isn't yet
+ace_windows = {"editor-modal", "terminal-modal"}
 
 def close_all_modals_on_start():
     """Ensure all dialogs are closed when page loads (except tutorial dialog)"""
@@ -31,20 +30,11 @@ def open_modal_by_id(modal_id):
         window.console.error(f"Dialog '{modal_id}' not found")
         return
     
-    # Make it visible first
-    dialog.style.display = ''
+    if modal_id in ace_windows:
+        window.loadAce()
     
-    # Then open the dialog
-    try:
-        if not dialog.open:
-            dialog.show()
-    except Exception as e:
-        window.console.error(f"Error opening dialog: {e}")
-        return
-    
-    # Make it active using the unified system
-    if hasattr(window, 'set_window_active'):
-        window.set_window_active(dialog, 100)
+    # Show it and make it active using the window manager
+    window_manager.restore(dialog)
 
 def handle_level_button(event):
     """Handle level button click"""
@@ -70,40 +60,34 @@ def minimize_modal(event):
     dialog = button.closest('dialog')
     
     if dialog:
-        dialog.style.display = 'none'
+        window_manager.minimize(dialog)
     
     event.stopPropagation()
     event.preventDefault()
 
-async def init_modal_system():
+def setup():
     """Initialize the modal system"""
-    await wait_for_dom()
-    
     # Hide all dialogs
     close_all_modals_on_start()
     
     # Setup level button
     level_button = document.querySelector("#level-modal-btn")
     if level_button:
-        level_button.onclick = create_proxy(handle_level_button)
+        level_button.onclick = proxy_registry.create(handle_level_button)
     
     # Setup modal buttons
     editor_button = document.querySelector("#editor-modal-btn")
     if editor_button:
-        editor_button.onclick = create_proxy(handle_modal_button)
+        editor_button.onclick = proxy_registry.create(handle_modal_button)
     
     terminal_button = document.querySelector("#terminal-modal-btn")
     if terminal_button:
-        terminal_button.onclick = create_proxy(handle_modal_button)
+        terminal_button.onclick = proxy_registry.create(handle_modal_button)
     
     # Setup minimize buttons
     minimize_buttons = document.querySelectorAll('.minimize-modal-btn')
     for button in minimize_buttons:
-        button.onclick = create_proxy(minimize_modal)
+        button.onclick = proxy_registry.create(minimize_modal)
     
-
-# Initialize
-asyncio.create_task(init_modal_system())
-
-# Expose functions
-window.open_modal_by_id = open_modal_by_id
\ No newline at end of file
+    # Expose functions
+    window.open_modal_by_id = proxy_registry.create(open_modal_by_id)
@@ -0,0 +1,191 @@
+from pyscript import window
+from proxyRegistry import proxy_registry
+import json
+
+
+class WindowManager:
+    """Keeps focus order, z-order and layout of all desktop windows"""
+
+    def __init__(self, storage_key="pythology_layout", base_z_index=100):
+        self.storage_key = storage_key
+        self.windows = {}  # window id -> element
+        self.focus_stack = {}  # ordered window ids, most recently focused last
+        self.minimized = set()
+        self.active = None
+        self.top_z_index = base_z_index
+        self.active_class = "window-active"
+        self.close_proxy = None  # one "close" listener shared by every dialog
+
+    def register(self, win):
+        """Start tracking a window"""
+        if win.id not in self.windows:
+            self.windows[win.id] = win
+            if win.tagName == 'DIALOG':
+                # close() from anywhere (modal.close(), Escape, textHandler.js) fires it
+                if self.close_proxy is None:
+                    self.close_proxy = proxy_registry.create(self.handle_close)
+                win.addEventListener('close', self.close_proxy)
+        return win
+
+    def handle_close(self, event):
+        win = self.windows.get(event.target.id)
+        if win is not None:
+            self.closed(win)
+
+    def closed(self, win):
+        """A dialog was closed: take it off the focus stack so focus_top() skips it"""
+        win.classList.remove(self.active_class)
+        self.focus_stack.pop(win.id, None)
+
+        if self.active is not None and self.active.id == win.id:
+            self.active = None
+            self.focus_top()
+
+    def focus(self, win):
+        """Make a window active, touching only the old and the new active window"""
+        if win is None:
+            return
+
+        self.register(win)
+
+        if self.active is not None and self.active.id == win.id:
+            return
+
+        if self.active is not None:
+            self.active.classList.remove(self.active_class)
+
+        self.top_z_index += 1
+        win.style.zIndex = str(self.top_z_index)
+        win.classList.add(self.active_class)
+
+        # Re-insert to move the window to the top of the stack
+        self.focus_stack.pop(win.id, None)
+        self.focus_stack[win.id] = True
+        self.active = win
+
+    def focus_top(self):
+        """Focus the most recently used window that is still visible"""
+        if not self.focus_stack:
+            self.active = None
+            return None
+
+        top_id = next(reversed(self.focus_stack))
+        win = self.windows[top_id]
+        self.focus(win)
+        return win
+
+    def forget(self, win):
+        """Stop tracking a window that is removed from the page"""
+        self.windows.pop(win.id, None)
+        self.minimized.discard(win.id)
+        self.focus_stack.pop(win.id, None)
+
+        if self.active is not None and self.active.id == win.id:
+            self.active = None
+            self.focus_top()
+
+        self.save_layout()
+
+    def minimize(self, win):
+        """Hide a window and hand focus to the next one in the stack"""
+        if win is None:
+            return
+
+        self.register(win)
+        win.style.display = 'none'
+        win.classList.remove(self.active_class)
+
+        self.minimized.add(win.id)
+        self.focus_stack.pop(win.id, None)
+
+        if self.active is not None and self.active.id == win.id:
+            self.active = None
+            self.focus_top()
+
+        self.save_layout()
+
+    def restore(self, win):
+        """Show a window again and bring it to the front"""
+        if win is None:
+            return
+
+        self.register(win)
+        self.minimized.discard(win.id)
+
+        # Make it visible first
+        win.style.display = ''
+
+        # Then open the dialog
+        try:
+            if win.tagName == 'DIALOG' and not win.open:
+                win.show()
+        except Exception as e:
+            window.console.error(f"Error opening dialog: {e}")
+            return
+
+        self.focus(win)
+        self.save_layout()
+
+    def is_minimized(self, win):
+        return win.id in self.minimized
+
+    def get_layout(self):
+        """Geometry of every registered window, in focus order"""
+        layout = {}
+        for win_id, win in self.windows.items():
+            layout[win_id] = {
+                "left": win.style.left,
+                "top": win.style.top,
+                "width": win.style.width,
+                "height": win.style.height,
+            }
+        return {"windows": layout, "order": list(self.focus_stack)}
+
+    def save_layout(self):
+        """Persist window geometry to localStorage"""
+        try:
+            window.localStorage.setItem(self.storage_key, json.dumps(self.get_layout()))
+        except Exception as e:
+            window.console.warn(f"Could not save window layout: {e}")
+
+    def load_layout(self):
+        """Read the persisted layout, or None if nothing is saved"""
+        try:
+            saved = window.localStorage.getItem(self.storage_key)
+            if saved:
+                return json.loads(saved)
+        except Exception as e:
+            window.console.warn(f"Could not load window layout: {e}")
+        return None
+
+    def restore_layout(self):
+        """Apply saved geometry and z-order to the registered windows"""
+        layout = self.load_layout()
+        if not layout:
+            return
+
+        for win_id, geometry in layout.get("windows", {}).items():
+            win = self.windows.get(win_id)
+            if win is None:
+                continue
+            for prop in ("left", "top", "width", "height"):
+                if geometry.get(prop):
+                    setattr(win.style, prop, geometry[prop])
+
+        # Replay the focus order so z-indexes come back in the same stacking
+        for win_id in layout.get("order", []):
+            win = self.windows.get(win_id)
+            if win is not None:
+                self.top_z_index += 1
+                win.style.zIndex = str(self.top_z_index)
+
+    def clear_layout(self):
+        window.localStorage.removeItem(self.storage_key)
+
+
+window_manager = WindowManager()
+
+
+def setup():
+    # Expose the window manager for JS and console debugging
+    window.window_manager = window_manager
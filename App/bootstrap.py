@@ -0,0 +1,80 @@
+from pyscript import window
+from readiness import ready, next_idle
+from startupTiming import startup
+import asyncio
+import importlib
+
+# Subsystems in dependency order; each module only imports modules above it.
+# The first group is everything the title screen needs, the rest is deferred
+# until the browser has painted it.
+FIRST_SCREEN = ["proxyRegistry", "stallWatchdog", "windowManager", "textHandlerBtn"]
+WINDOWS = ["modalHandler", "movableDiv", "windowDiv", "resizableDiv", "perfHud"]
+CODING = ["terminalWorker", "editorComp", "matcher", "codeLinter", "completionIndex", "lvlSystem"]
+
+
+async def init(module_name):
+    """Import a module and run its setup(), logging instead of stopping the boot"""
+    try:
+        with startup.phase(f"import:{module_name}"):
+            module = importlib.import_module(module_name)
+        
+        setup = getattr(module, "setup", None)
+        if setup is not None:
+            with startup.phase(f"setup:{module_name}"):
+                result = setup()
+                if asyncio.iscoroutine(result):
+                    await result
+        return module
+    except Exception as e:
+        import traceback
+        window.console.error(f"❌ Failed to initialize {module_name}: {e}")
+        window.console.error(traceback.format_exc())
+        return None
+
+
+def preload():
+    """Import every app module without touching the page (used to build the memory snapshot)"""
+    for module_name in FIRST_SCREEN + WINDOWS + CODING:
+        importlib.import_module(module_name)
+
+
+async def init_group(module_names):
+    for module_name in module_names:
+        await init(module_name)
+
+
+async def boot():
+    # First Python line to run: PyScript and Pyodide are up
+    startup.mark("pyodide_ready")
+    
+    await init_group(FIRST_SCREEN)
+
+    # Let the title screen paint before doing the rest
+    await next_idle()
+    await init_group(WINDOWS)
+    ready.set("windows")
+
+    await next_idle()
+    await init_group(CODING)
+    ready.set("app")
+    
+    if startup.debug_enabled():
+        startup.print_report()
+
+
+# Handlers referenced by py-click attributes in index.html
+def next_text(event):
+    importlib.import_module("textHandlerBtn").next_text(event)
+
+
+def run_code(event):
+    window.run_code(event)
+
+
+def clear_code(event):
+    window.clear_code(event)
+
+
+# PyScript runs this file as __main__; importing it (e.g. from tools) does not boot
+if __name__ == "__main__":
+    asyncio.create_task(boot())
@@ -1,9 +1,15 @@
 from pyscript import window, document
-from pyodide.ffi import create_proxy
+from proxyRegistry import proxy_registry
+from readiness import ready
+from startupTiming import startup
+from perfMonitor import perf
+from matcher import set_goal, goal_tracker
+from editorComp import editor_manager
+from codeLinter import code_linter
+from stateSnapshot import level_snapshot, rollback
+from textHandlerBtn import show_tutorial
 import asyncio
 
-set_goal = window.set_goal
-
 class LevelSetup:
     def __init__(self):
         self.current_level = 0
@@ -44,15 +50,16 @@ class LevelSetup:
     def setup_completion_detection(self):
         """Monitor goal_tracker for completion"""
         try:
-            original_check = window.goal_tracker.check_match
+            original_check = goal_tracker.check_match
             
-            def wrapped_check(code, output):
-                result = original_check(code, output)
+            def wrapped_check(code, output, *args, **kwargs):
+                result = original_check(code, output, *args, **kwargs)
                 if result:
                     self.on_level_complete()
                 return result
             
-            window.goal_tracker.check_match = create_proxy(wrapped_check)
+            # goal_tracker is a Python object, so no JS proxy is needed here
+            goal_tracker.check_match = wrapped_check
         except Exception as e:
             window.console.error(f"Error setting up completion detection: {e}")
     
@@ -62,7 +69,7 @@ class LevelSetup:
         
         level = self.levels[self.current_level]
         if "completion" in level and level["completion"]:
-            asyncio.ensure_future(window.show_tutorial(level["completion"]))
+            asyncio.ensure_future(show_tutorial(level["completion"]))
         
         self.terminal_write("=" * 50)
         self.terminal_write(f"🎉 LEVEL {self.current_level + 1} COMPLETED!")
@@ -89,7 +96,10 @@ class LevelSetup:
     async def retry_level(self):
         """Retry current level"""
         self.terminal_write(f"🔄 Retrying Level {self.current_level + 1}")
-        window.goal_tracker.goal_completed = False
+        goal_tracker.goal_completed = False
+        # Imports, patched builtins and variables of the last attempt go away, no reload needed
+        took = rollback()
+        self.terminal_write(f"⏪ Clean state restored in {took:.1f} ms")
         await self.start_lvl(self.current_level)
     
     async def start_lvl(self, lvl_num):
@@ -100,16 +110,28 @@ class LevelSetup:
         self.current_level = lvl_num
         level = self.levels[lvl_num]
         
+        # What retry_level rolls back to
+        level_snapshot.take()
+        
+        # Drafts are kept in memory, so this is instant
+        editor_manager.open_level(lvl_num, level.get("starter"))
+        
         if "tutorial" in level and level["tutorial"]:
             try:
-                await window.show_tutorial(level["tutorial"])
+                await show_tutorial(level["tutorial"])
             except:
                 pass
         
         self.terminal_write("=" * 50)
         self.terminal_write(f"🎮 LEVEL {lvl_num + 1}: {level['name']}")
         self.terminal_write("=" * 50)
-        self.terminal_write(f"Expected output: {level['output']}")
+        if level.get("cases"):
+            # Show the first case as an example; the rest are checked too
+            example = level["cases"][0]
+            self.terminal_write(f"Input: {', '.join(example['stdin'])}  ->  expected output: {example['output']}")
+            self.terminal_write(f"Your program is checked against {len(level['cases'])} test cases.")
+        else:
+            self.terminal_write(f"Expected output: {level['output']}")
         if level['must_have']:
             self.terminal_write(f"Must use: {', '.join(level['must_have'])}")
         self.terminal_write("Good luck!")
@@ -119,8 +141,12 @@ class LevelSetup:
             level["code"],
             level["output"],
             level["variables"],
-            level["must_have"]
+            level["must_have"],
+            level.get("cases"),
+            level.get("max_memory_kb")
         )
+        # Show the new level's requirements as hints right away
+        code_linter.schedule()
         
         self.close_modal()
         self.render_levels()
@@ -147,6 +173,7 @@ class LevelSetup:
         if modal:
             modal.close()
     
+    @perf.timed("render_levels")
     def render_levels(self):
          
         wrapper = document.getElementById("wrapper")
@@ -200,9 +227,6 @@ class LevelSetup:
 # Initialize
 level_Setup = LevelSetup()
 
-# Expose to window for onclick handlers
-window.level_Setup = level_Setup
-
 # Expose functions to window - these are the main entry points
 def open_modal(event=None):
      
@@ -220,34 +244,19 @@ def retry_lvl(event=None):
      
     asyncio.ensure_future(level_Setup.retry_level())
 
-# Create proxies and attach to window
-window.open_modal = create_proxy(open_modal)
-window.start_lvl = create_proxy(start_lvl)
-window.next_lvl = create_proxy(next_lvl)
-window.retry_lvl = create_proxy(retry_lvl)
-
- 
- 
-
-# TEST: Try to write to wrapper immediately
-def test_wrapper():
-     
-    wrapper = document.getElementById("wrapper")
-     
-    if wrapper:
-         
-        wrapper.innerHTML = "<h1>TEST - CAN YOU SEE THIS?</h1><button>Test Button</button>"
-         
-    else:
-        window.console.error("❌ WRAPPER NOT FOUND!")
-
-# Run test after a short delay to ensure DOM is ready
-import js
-js.setTimeout(create_proxy(test_wrapper), 100)
-
-# Also try calling render_levels directly after a delay
-def test_render():
-     
+def setup():
+    # Expose to window for onclick handlers
+    window.level_Setup = level_Setup
+    
+    # Create proxies and attach to window
+    window.open_modal = proxy_registry.create(open_modal)
+    window.start_lvl = proxy_registry.create(start_lvl)
+    window.next_lvl = proxy_registry.create(next_lvl)
+    window.retry_lvl = proxy_registry.create(retry_lvl)
+    
+    # Bring back the code the learner left in the current level
+    editor_manager.open_level(level_Setup.current_level)
+    
     level_Setup.render_levels()
-
-js.setTimeout(create_proxy(test_render), 500)
\ No newline at end of file
+    startup.mark("levels_rendered")
+    ready.set("levels")
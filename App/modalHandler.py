@@ -1,8 +1,8 @@
 from pyscript import window, document
-from pyodide.ffi import create_proxy
+from proxyRegistry import proxy_registry
 
-modal = document.querySelector("#lvl-Selector")
-wrapper = document.querySelector("#wrapper")
+modal = None
+wrapper = None
 
 def open_level_modal(e=None):
     """Open the level selector modal specifically"""
@@ -15,19 +15,24 @@ def close_modal(e):
     if modal and not wrapper.contains(e.target):
         modal.close()
 
-# Create proxies
-closer = create_proxy(close_modal)
-opener = create_proxy(open_level_modal)
-
-# Expose with a specific name to avoid conflicts
-window.open_level_modal = opener
-
-# Attach close handler to modal
-if modal:
-    modal.addEventListener("click", closer)
-
-# Find and attach to the levels button specifically
-level_button = document.querySelector("#level-modal-btn")
-if level_button:
-    level_button.addEventListener("click", opener)
-     
\ No newline at end of file
+def setup():
+    global modal, wrapper
+    
+    modal = document.querySelector("#lvl-Selector")
+    wrapper = document.querySelector("#wrapper")
+    
+    # Create proxies
+    closer = proxy_registry.create(close_modal)
+    opener = proxy_registry.create(open_level_modal)
+    
+    # Expose with a specific name to avoid conflicts
+    window.open_level_modal = opener
+    
+    # Attach close handler to modal
+    if modal:
+        modal.addEventListener("click", closer)
+    
+    # Find and attach to the levels button specifically
+    level_button = document.querySelector("#level-modal-btn")
+    if level_button:
+        level_button.addEventListener("click", opener)
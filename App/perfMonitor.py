@@ -0,0 +1,205 @@
+from pyscript import window
+from pyodide.ffi import to_js
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+import functools
+import inspect
+import json
+import time
+import traceback
+
+# Innermost span of the running task: (token, name, [ms paused so far])
+current_span = ContextVar("current_span", default=None)
+
+
+class Histogram:
+    """Last `size` durations of a span in a ring buffer, plus running totals"""
+
+    def __init__(self, size=256):
+        self.samples = [0.0] * size
+        self.size = size
+        self.next = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration):
+        self.samples[self.next] = duration
+        self.next = (self.next + 1) % self.size
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def recent(self):
+        return self.samples[:min(self.count, self.size)]
+
+    def percentile(self, p):
+        recent = sorted(self.recent())
+        if not recent:
+            return 0.0
+        return recent[min(int(len(recent) * p), len(recent) - 1)]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50": round(self.percentile(0.5), 3),
+            "p95": round(self.percentile(0.95), 3),
+            "max": round(self.max, 3),
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+        }
+
+
+class PerfMonitor:
+    """
+    Spans around the app's hot paths, kept as histograms in ring buffers
+
+    Timing uses time.perf_counter(), which needs no JS call. Every
+    `measure_every`-th sample of a span is also sent to performance.measure,
+    so it shows up in the devtools Performance panel without paying an FFI
+    round trip on every call.
+
+    The most recent spans are also kept on a timeline (start and end in
+    perf_counter ms) so a stall can be blamed on whatever ran during it.
+    Spans slower than `slow_ms` keep the call stack that led to them. Time
+    spent inside paused() (a run waiting for input()) counts for neither.
+    """
+
+    def __init__(self, measure_every=10, timeline_size=512, slow_ms=50):
+        self.spans = {}
+        self.measure_every = measure_every
+        self.started = time.perf_counter()
+        self.timeline = deque(maxlen=timeline_size)  # (name, start, end, stack or None)
+        self.active = {}  # spans still running (e.g. an awaiting run): token -> (name, start)
+        self.slow_ms = slow_ms
+        self.sections = {}  # extra report sections, name -> function returning a dict
+
+    def record(self, name, duration):
+        """Add one duration in ms to a span"""
+        histogram = self.spans.get(name)
+        if histogram is None:
+            histogram = self.spans[name] = Histogram()
+        histogram.add(duration)
+
+        if self.measure_every and (histogram.count - 1) % self.measure_every == 0:
+            try:
+                options = to_js({"end": window.performance.now(), "duration": duration}, dict_converter=window.Object.fromEntries)
+                window.performance.measure(f"pythology:{name}", options)
+            except Exception:
+                pass
+
+    @contextmanager
+    def span(self, name):
+        token = object()
+        start = time.perf_counter()
+        self.active[token] = (name, start * 1000)
+        paused = [0.0]
+        context_token = current_span.set((token, name, paused))
+        try:
+            yield
+        finally:
+            current_span.reset(context_token)
+            end = time.perf_counter()
+            # Since the last paused() block, if there was one
+            _, resumed = self.active.pop(token)
+            duration = (end - start) * 1000 - paused[0]
+            stack = self.caller_stack() if duration >= self.slow_ms else None
+            self.timeline.append((name, resumed, end * 1000, stack))
+            self.record(name, duration)
+
+    @contextmanager
+    def paused(self):
+        """Leave the time spent in this block (e.g. waiting for input) out of the current span"""
+        span = current_span.get()
+        if span is None or span[0] not in self.active:
+            yield
+            return
+
+        token, name, paused = span
+        _, resumed = self.active.pop(token)
+        started = time.perf_counter()
+        # What ran up to here stays on the timeline, the wait does not
+        self.timeline.append((name, resumed, started * 1000, None))
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            paused[0] += (now - started) * 1000
+            self.active[token] = (name, now * 1000)
+
+    def caller_stack(self, limit=12):
+        """Call stack of the code that opened the span, without contextlib/perfMonitor frames"""
+        frames = traceback.extract_stack()[:-1]
+        frames = [f for f in frames if not f.filename.endswith(("contextlib.py", "perfMonitor.py"))]
+        return "".join(traceback.format_list(frames[-limit:]))
+
+    def spans_between(self, start, end, running=False):
+        """
+        Spans that overlapped [start, end] (perf_counter ms): name -> (overlap ms, calls, slowest stack)
+
+        With running=True, the spans that have not finished yet instead.
+        """
+        spans = self.timeline
+        if running:
+            now = time.perf_counter() * 1000
+            spans = [(name, span_start, now, None) for name, span_start in self.active.values()]
+        found = {}
+        for name, span_start, span_end, stack in spans:
+            overlap = min(end, span_end) - max(start, span_start)
+            if overlap <= 0:
+                continue
+            total, calls, worst = found.get(name, (0.0, 0, None))
+            found[name] = (total + overlap, calls + 1, stack or worst)
+        return found
+
+    def timed(self, name):
+        """Decorator recording every call of a function (or coroutine function) as a span"""
+        def decorate(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.spans.items())}
+
+    def report(self):
+        """Everything the HUD shows, plus the raw recent samples"""
+        from proxyRegistry import proxy_registry
+        return {
+            "uptime_s": round(time.perf_counter() - self.started, 1),
+            "spans": self.summary(),
+            "samples": {name: [round(s, 3) for s in histogram.recent()] for name, histogram in self.spans.items()},
+            "ffi": {
+                # JS -> Python calls through registered proxies; Python -> JS calls are not counted
+                "calls_from_js": sum(proxy_registry.calls.values()),
+                "calls_by_label": dict(sorted(proxy_registry.calls.items(), key=lambda item: item[1], reverse=True)),
+                "proxies_created": proxy_registry.created,
+                "proxies_destroyed": proxy_registry.destroyed,
+                "proxies_live": proxy_registry.counts(),
+            },
+            **{name: section() for name, section in self.sections.items()},
+        }
+
+    def export_json(self):
+        return json.dumps(self.report(), indent=2)
+
+    def reset(self):
+        from proxyRegistry import proxy_registry
+        self.spans.clear()
+        self.timeline.clear()
+        proxy_registry.calls.clear()
+        self.started = time.perf_counter()
+
+
+perf = PerfMonitor()
@@ -0,0 +1,145 @@
+from pyscript import window
+from pyodide.ffi import create_proxy, create_once_callable
+import inspect
+
+
+class ProxyRegistry:
+    """
+    Owns every JS proxy the app creates so they can be destroyed with their scope
+
+    Scopes:
+        window: lives as long as the page (functions exposed on window, page handlers)
+        window:<dialog id>: handlers of one desktop window, released when it closes
+        run:<terminal id>: callbacks a terminal's program made, released when that
+            terminal starts its next run, resets or closes
+    """
+
+    def __init__(self):
+        self.scopes = {}  # scope name -> {id(proxy): (proxy, label)}
+        self.created = 0
+        self.destroyed = 0
+        self.calls = {}  # label -> calls from JS into Python through this label's proxies
+
+    def _track(self, proxy, scope, label):
+        self.scopes.setdefault(scope, {})[id(proxy)] = (proxy, label)
+        self.created += 1
+        return proxy
+
+    def _forget(self, proxy, scope):
+        entries = self.scopes.get(scope)
+        if entries and entries.pop(id(proxy), None) is not None:
+            self.destroyed += 1
+            return True
+        return False
+
+    def _counted(self, func, label):
+        """func, counting each call that comes from JS"""
+        calls = self.calls
+
+        if inspect.iscoroutinefunction(func):
+            async def counted_async(*args, **kwargs):
+                calls[label] = calls.get(label, 0) + 1
+                return await func(*args, **kwargs)
+            return counted_async
+
+        def counted(*args, **kwargs):
+            calls[label] = calls.get(label, 0) + 1
+            return func(*args, **kwargs)
+        return counted
+
+    def create(self, func, scope="window", label=None):
+        """Create a proxy owned by a scope"""
+        label = label or getattr(func, '__name__', 'proxy')
+        return self._track(create_proxy(self._counted(func, label)), scope, label)
+
+    def once(self, func, scope="window", label=None):
+        """Create a proxy that destroys itself after its first call"""
+        label = label or getattr(func, '__name__', 'once')
+        holder = {}
+
+        def call_once(*args):
+            self._forget(holder["proxy"], scope)
+            self.calls[label] = self.calls.get(label, 0) + 1
+            return func(*args)
+
+        proxy = create_once_callable(call_once)
+        holder["proxy"] = proxy
+        return self._track(proxy, scope, label)
+
+    def destroy(self, proxy, scope="window"):
+        """Destroy a single proxy before its scope ends"""
+        if self._forget(proxy, scope):
+            try:
+                proxy.destroy()
+            except Exception:
+                pass
+
+    def release(self, scope):
+        """Destroy every proxy owned by a scope"""
+        entries = self.scopes.pop(scope, None)
+        if not entries:
+            return 0
+
+        for proxy, label in entries.values():
+            try:
+                proxy.destroy()
+            except Exception:
+                # Already destroyed, e.g. a one-shot that fired
+                pass
+
+        self.destroyed += len(entries)
+        return len(entries)
+
+    def set_timeout(self, func, delay, scope="window"):
+        """setTimeout with a one-shot proxy; returns (timer_id, proxy) for cancel_timeout"""
+        proxy = self.once(func, scope)
+        return window.setTimeout(proxy, delay), proxy
+
+    def cancel_timeout(self, timer, scope="window"):
+        """Cancel a timer from set_timeout and free its proxy"""
+        timer_id, proxy = timer
+        window.clearTimeout(timer_id)
+        self.destroy(proxy, scope)
+
+    def live_count(self, scope=None):
+        if scope is not None:
+            return len(self.scopes.get(scope, {}))
+        return sum(len(entries) for entries in self.scopes.values())
+
+    def counts(self):
+        """Live proxies per scope"""
+        return {scope: len(entries) for scope, entries in self.scopes.items() if entries}
+
+    def leak_report(self, log=True):
+        """Summary of live proxies grouped by scope and label"""
+        report = {
+            "created": self.created,
+            "destroyed": self.destroyed,
+            "live": self.live_count(),
+            "scopes": {},
+        }
+        for scope, entries in self.scopes.items():
+            labels = {}
+            for proxy, label in entries.values():
+                labels[label] = labels.get(label, 0) + 1
+            if labels:
+                report["scopes"][scope] = labels
+
+        if log:
+            window.console.log(f"🧹 Proxies: {report['live']} live, {report['created']} created, {report['destroyed']} destroyed")
+            for scope, labels in report["scopes"].items():
+                window.console.log(f"  {scope}: {labels}")
+        return report
+
+
+proxy_registry = ProxyRegistry()
+
+
+def proxy_report(event=None):
+    proxy_registry.leak_report()
+
+
+def setup():
+    # Expose registry for JS and console debugging
+    window.proxy_registry = proxy_registry
+    window.proxy_report = proxy_registry.create(proxy_report)
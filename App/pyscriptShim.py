@@ -0,0 +1,36 @@
+"""
+Stand-in for the `pyscript` module when booting from a Pyodide memory snapshot
+
+A snapshot can't contain references to JS objects, so `window` and `document` here
+only look up the real objects on first use, after the snapshot has been restored.
+snapshotBoot.js / tools/snapshot/make_snapshot.mjs install it as sys.modules["pyscript"].
+"""
+
+
+class LazyJsObject:
+    """Forwards everything to a JS global that is resolved on first access"""
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_target", None)
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            import js
+            target = js if self._name == "window" else getattr(js, self._name)
+            object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, key):
+        return getattr(self._resolve(), key)
+
+    def __setattr__(self, key, value):
+        setattr(self._resolve(), key, value)
+
+    def __repr__(self):
+        return f"<lazy {self._name}>"
+
+
+window = LazyJsObject("window")
+document = LazyJsObject("document")
@@ -0,0 +1,67 @@
+from pyscript import window, document
+from proxyRegistry import proxy_registry
+from startupTiming import startup
+import asyncio
+
+
+class Readiness:
+    """Named, awaitable readiness signals shared by the app's subsystems"""
+
+    def __init__(self):
+        self.events = {}
+
+    def event(self, name):
+        if name not in self.events:
+            self.events[name] = asyncio.Event()
+        return self.events[name]
+
+    def set(self, name):
+        """Mark a subsystem as ready and wake everything waiting on it"""
+        event = self.event(name)
+        if event.is_set():
+            return
+        event.set()
+        startup.mark(f"ready:{name}")
+
+        # JS code can listen for the same signal
+        try:
+            document.dispatchEvent(window.CustomEvent.new(f"pythology:{name}"))
+        except Exception:
+            pass
+
+    def is_set(self, name):
+        return name in self.events and self.events[name].is_set()
+
+    async def wait(self, name, timeout=None):
+        """Wait until a subsystem is ready; returns False on timeout"""
+        if timeout is None:
+            await self.event(name).wait()
+            return True
+        try:
+            await asyncio.wait_for(self.event(name).wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            window.console.warn(f"⚠️ '{name}' not ready after {timeout}s")
+            return False
+
+
+ready = Readiness()
+
+
+def next_idle(timeout=500):
+    """Future resolved when the browser is idle (or after timeout ms at the latest)"""
+    loop = asyncio.get_event_loop()
+    future = loop.create_future()
+
+    def resolve(*args):
+        if not future.done():
+            future.set_result(None)
+
+    callback = proxy_registry.once(resolve)
+    if hasattr(window, 'requestIdleCallback'):
+        options = window.Object.new()
+        options.timeout = timeout
+        window.requestIdleCallback(callback, options)
+    else:
+        window.setTimeout(callback, 0)
+    return future
@@ -0,0 +1,68 @@
+// Boots from a Pyodide memory snapshot made by tools/build_snapshot.py instead of through PyScript.
+// The snapshot already has every app module imported, so only bootstrap.boot() is left:
+// it re-runs each module's setup(), which binds the DOM and JS handles.
+// Anything unexpected reloads the page with ?boot=normal.
+const SNAPSHOT_DIR = './snapshot/';
+const SNAPSHOT_FORMAT = 'pythology-snapshot/1';
+const pyodideBase = version => `https://cdn.jsdelivr.net/pyodide/v${version}/full/`;
+
+function fallback(reason) {
+    console.warn(`Snapshot boot not possible (${reason}), using the normal boot`);
+    const url = new URL(location.href);
+    url.searchParams.set('boot', 'normal');
+    location.replace(url);
+}
+
+// The precache manifest carries the hash of the current Python sources
+function loadManifest() {
+    return new Promise(resolve => {
+        const script = document.createElement('script');
+        script.src = './precache-manifest.js';
+        script.onload = () => resolve(self.__pythology_precache || null);
+        script.onerror = () => resolve(null);
+        document.head.appendChild(script);
+    });
+}
+
+async function bootFromSnapshot() {
+    const startup = window.__pythology_startup;
+
+    const meta = await fetch(SNAPSHOT_DIR + 'snapshot.json')
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null);
+    if (!meta || meta.format !== SNAPSHOT_FORMAT) {
+        return fallback('no snapshot built');
+    }
+
+    const manifest = await loadManifest();
+    if (!manifest || manifest.python !== meta.python) {
+        return fallback('Python sources changed since the snapshot was built');
+    }
+
+    const { loadPyodide, version } = await import(pyodideBase(meta.pyodide) + 'pyodide.mjs');
+    if (version !== meta.pyodide) {
+        return fallback(`snapshot is for Pyodide ${meta.pyodide}, got ${version}`);
+    }
+
+    const snapshot = fetch(SNAPSHOT_DIR + meta.snapshot).then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status} for ${meta.snapshot}`);
+        }
+        return response.arrayBuffer();
+    });
+    const pyodide = await loadPyodide({ indexURL: pyodideBase(meta.pyodide), _loadSnapshot: snapshot });
+    if (startup) {
+        startup.mark('snapshot_restored');
+    }
+
+    // py-click attributes are normally handled by PyScript
+    pyodide.runPython('from bootstrap import next_text, run_code, clear_code');
+    for (const element of document.querySelectorAll('[py-click]')) {
+        const handler = pyodide.globals.get(element.getAttribute('py-click'));
+        element.addEventListener('click', event => handler(event));
+    }
+
+    await pyodide.runPythonAsync('import bootstrap\nawait bootstrap.boot()');
+}
+
+bootFromSnapshot().catch(error => fallback(error.message));
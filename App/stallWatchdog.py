@@ -0,0 +1,147 @@
+from pyscript import window
+from pyodide.ffi import to_js
+from proxyRegistry import proxy_registry
+from perfMonitor import perf
+from collections import deque
+import asyncio
+import time
+
+
+class StallWatchdog:
+    """
+    Detects main-thread stalls and blames them on the span that ran meanwhile
+
+    Two detectors feed it: an asyncio timer that notices when it wakes up late
+    (event-loop lag) and, where the browser has it, the Long Tasks API. Both
+    report the stall's time range; perfMonitor's timeline tells which Python
+    spans ran in it (a learner run, a burst of terminal writes, render_levels,
+    a drag). Stalls with no span in them come from JS or untracked Python.
+    """
+
+    def __init__(self, threshold_ms=50, interval=0.1, budget_ms=1000):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.budget_ms = budget_ms
+        self.stalls = deque(maxlen=50)
+        self.count = 0
+        self.total_ms = 0.0
+        self.by_blame = {}  # blamed span -> total stall ms
+        self.warned_budget = False
+        self.offset = 0.0  # performance.now() - perf_counter ms, to read Long Task timestamps
+        self.sampler = None
+
+    def now(self):
+        return time.perf_counter() * 1000
+
+    def blame(self, start, end):
+        """(name, calls, stack) of the span that overlapped the stall the most"""
+        # Spans that are still running (a run waiting for input) overlap everything,
+        # so finished ones win when there are any
+        found = perf.spans_between(start, end) or perf.spans_between(start, end, running=True)
+        if not found:
+            return "unknown (JS or untracked Python)", 0, None
+        name, (overlap, calls, stack) = max(found.items(), key=lambda item: item[1][0])
+        return name, calls, stack
+
+    def stall(self, start, end, source):
+        """Record a stall between two perf_counter ms timestamps"""
+        duration = end - start
+        if duration < self.threshold_ms:
+            return None
+
+        # Both detectors usually see the same stall
+        for previous in self.stalls:
+            if start < previous["end"] and end > previous["start"]:
+                if source not in previous["source"]:
+                    previous["source"] += f"+{source}"
+                return previous
+
+        name, calls, stack = self.blame(start, end)
+        entry = {
+            "start": start,
+            "end": end,
+            "at_s": round((start / 1000) - perf.started, 2),
+            "duration": round(duration, 1),
+            "source": source,
+            "blame": name,
+            "calls": calls,
+            "stack": stack,
+        }
+        self.stalls.append(entry)
+        self.count += 1
+        self.total_ms += duration
+        self.by_blame[name] = self.by_blame.get(name, 0.0) + duration
+
+        message = f"🐢 Main thread stalled {duration:.0f} ms ({source}), during {name}"
+        if calls > 1:
+            message += f" ×{calls}"
+        if stack:
+            message += f"\n{stack}"
+        window.console.warn(message)
+
+        if self.total_ms > self.budget_ms and not self.warned_budget:
+            self.warned_budget = True
+            window.console.warn(f"⚠️ Stall budget used up: {self.total_ms:.0f} ms of {self.budget_ms} ms this session")
+            window.console.warn(f"   worst: {self.worst()}")
+        return entry
+
+    def worst(self, count=3):
+        ranked = sorted(self.by_blame.items(), key=lambda item: item[1], reverse=True)[:count]
+        return ", ".join(f"{name} {total:.0f} ms" for name, total in ranked)
+
+    async def sample_lag(self):
+        """Sleep `interval` over and over; waking up late means the thread was busy"""
+        while True:
+            before = self.now()
+            await asyncio.sleep(self.interval)
+            after = self.now()
+            lag = after - before - self.interval * 1000
+            if lag >= self.threshold_ms:
+                self.stall(after - lag, after, "lag")
+
+    def on_long_tasks(self, entries, observer=None):
+        for entry in entries.getEntries():
+            start = entry.startTime - self.offset
+            self.stall(start, start + entry.duration, "longtask")
+
+    def observe_long_tasks(self):
+        """Subscribe to the Long Tasks API; False if the browser doesn't have it"""
+        try:
+            supported = window.PerformanceObserver.supportedEntryTypes
+            if supported is None or "longtask" not in list(supported):
+                return False
+            observer = window.PerformanceObserver.new(proxy_registry.create(self.on_long_tasks))
+            options = to_js({"type": "longtask", "buffered": False}, dict_converter=window.Object.fromEntries)
+            observer.observe(options)
+            return True
+        except Exception as e:
+            window.console.warn(f"Long Tasks API not available: {e}")
+            return False
+
+    def report(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "budget_ms": self.budget_ms,
+            "budget_used": round(self.total_ms / self.budget_ms, 3) if self.budget_ms else None,
+            "by_blame": {name: round(total, 1) for name, total in self.by_blame.items()},
+            "recent": [
+                {key: value for key, value in stall.items() if key not in ("start", "end")}
+                for stall in self.stalls
+            ],
+        }
+
+    def start(self):
+        self.offset = window.performance.now() - self.now()
+        self.observe_long_tasks()
+        if self.sampler is None or self.sampler.done():
+            self.sampler = asyncio.ensure_future(self.sample_lag())
+
+
+watchdog = StallWatchdog()
+
+
+def setup():
+    watchdog.start()
+    perf.sections["stalls"] = watchdog.report
+    window.stall_watchdog = watchdog
@@ -0,0 +1,59 @@
+from pyscript import window
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Records named boot phases into window.__pythology_startup"""
+
+    def __init__(self):
+        self.phases = []  # {"name", "start", "duration"} in ms since navigation start
+
+    def now(self):
+        return window.performance.now()
+
+    def _publish(self, name, start, duration):
+        self.phases.append({"name": name, "start": start, "duration": duration})
+
+        # Shared with the JS side, which adds performance marks/measures
+        report = getattr(window, "__pythology_startup", None)
+        if report is not None:
+            report.record(name, start, duration)
+
+    def mark(self, name):
+        """Record a point in time, e.g. a subsystem becoming ready"""
+        self._publish(name, self.now(), 0)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block, e.g. a module import or setup"""
+        start = self.now()
+        try:
+            yield
+        finally:
+            self._publish(name, start, self.now() - start)
+
+    def debug_enabled(self):
+        try:
+            if "debug=startup" in str(window.location.search):
+                return True
+            return "startup" in str(window.localStorage.getItem("pythology_debug") or "")
+        except Exception:
+            return False
+
+    def print_report(self):
+        """Print the boot timeline to the console"""
+        report = getattr(window, "__pythology_startup", None)
+        if report is not None:
+            # Includes the JS-side phases recorded before Python started
+            report.print()
+            return
+
+        window.console.log("⏱️ Pythology startup")
+        for phase in self.phases:
+            if phase["duration"]:
+                window.console.log(f"  {phase['start']:9.1f} ms  {phase['name']:<28} {phase['duration']:8.1f} ms")
+            else:
+                window.console.log(f"  {phase['start']:9.1f} ms  {phase['name']}")
+
+
+startup = StartupTimer()
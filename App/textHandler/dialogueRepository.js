@@ -0,0 +1,181 @@
+class DialogueRepository {
+    constructor(url) {
+        this.url = url;
+        this.sequences = new Map();  // dialogue key -> prepared texts
+        this.chapters = new Map();   // dialogue key -> chapter file, loaded lazily
+        this.pending = new Map();    // file url -> in-flight load promise
+        this.loaded = new Set();     // file urls already indexed
+    }
+
+    // Split a text into alternating [text, tag, text, tag, ..., text] parts.
+    // Even indexes are plain text (entities decoded), odd indexes are raw HTML tags.
+    static tokenize(html) {
+        const parts = [];
+        let textStart = 0;
+        let i = html.indexOf('<');
+
+        while (i !== -1) {
+            const close = html.indexOf('>', i);
+            if (close === -1) {
+                break;
+            }
+            parts.push(DialogueRepository.decode(html.substring(textStart, i)));
+            parts.push(html.substring(i, close + 1));
+            textStart = close + 1;
+            i = html.indexOf('<', textStart);
+        }
+
+        parts.push(DialogueRepository.decode(html.substring(textStart)));
+        return parts;
+    }
+
+    // Inverse of tokenize, used to restore entry.text for precompiled dialogue
+    static untokenize(parts) {
+        return parts.map((part, i) => {
+            if (i % 2 === 1) {
+                return part;
+            }
+            return part.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+        }).join('');
+    }
+    
+    static decode(text) {
+        if (text.indexOf('&') === -1) {
+            return text;
+        }
+        if (!DialogueRepository.decoder) {
+            DialogueRepository.decoder = document.createElement('textarea');
+        }
+        DialogueRepository.decoder.innerHTML = text;
+        return DialogueRepository.decoder.value;
+    }
+
+    static prepare(entry) {
+        const text = entry.text || "";
+        return { ...entry, text: text, tokens: entry.tokens || DialogueRepository.tokenize(text) };
+    }
+
+    resolve(file, base) {
+        return new URL(file, new URL(base, document.baseURI)).href;
+    }
+
+    index(data, sourceUrl) {
+        for (const key of Object.keys(data)) {
+            if (key === '$chapters') {
+                // { "chapter file": ["key", ...] } - fetched the first time one of its keys is used
+                for (const [file, keys] of Object.entries(data[key])) {
+                    const chapterUrl = this.resolve(file, sourceUrl);
+                    keys.forEach(chapterKey => this.chapters.set(chapterKey, chapterUrl));
+                }
+                continue;
+            }
+            this.sequences.set(key, data[key].map(DialogueRepository.prepare));
+        }
+    }
+
+    // Dialogue precompiled by tools/build_dialogue.py and embedded in the page
+    loadInline(elementId = 'dialogueData') {
+        const element = document.getElementById(elementId);
+        const source = element && element.textContent.trim();
+        if (!source) {
+            return false;
+        }
+
+        try {
+            const compiled = JSON.parse(source);
+            if (compiled.format !== 'pythology-dialogue/1') {
+                console.warn(`Ignoring inline dialogue with format ${compiled.format}`);
+                return false;
+            }
+
+            for (const [key, entries] of Object.entries(compiled.sequences)) {
+                this.sequences.set(key, entries.map(([tokens, action]) => {
+                    const entry = { text: DialogueRepository.untokenize(tokens), tokens: tokens };
+                    if (action !== undefined) {
+                        entry.action = action;
+                    }
+                    return entry;
+                }));
+            }
+            if (compiled.chapters) {
+                this.index({ $chapters: compiled.chapters }, this.url);
+            }
+            return true;
+        } catch (error) {
+            console.error("Error reading inline dialogue:", error);
+            return false;
+        }
+    }
+
+    // Single-flight: concurrent callers share one fetch and parse per file
+    load(url = this.url) {
+        if (this.loaded.has(url)) {
+            return Promise.resolve(true);
+        }
+        if (url === this.url && this.loadInline()) {
+            // The main file is already in the page, no fetch needed
+            this.loaded.add(url);
+            this.markLoaded(url);
+            return Promise.resolve(true);
+        }
+        if (this.pending.has(url)) {
+            return this.pending.get(url);
+        }
+
+        const promise = fetch(url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                this.index(data, url);
+                this.loaded.add(url);
+                this.markLoaded(url);
+                return true;
+            })
+            .catch(error => {
+                console.error(`Error loading dialogue from ${url}:`, error);
+                return false;
+            })
+            .finally(() => {
+                this.pending.delete(url);
+            });
+
+        this.pending.set(url, promise);
+        return promise;
+    }
+
+    markLoaded(url) {
+        if (url === this.url && window.__pythology_startup) {
+            window.__pythology_startup.mark('dialogue_loaded');
+        }
+    }
+
+    has(key) {
+        return this.sequences.has(key);
+    }
+
+    get(key) {
+        return this.sequences.get(key) || [];
+    }
+
+    // Make sure a key is available, loading its chapter file if needed
+    async ensure(key) {
+        if (!(await this.load())) {
+            return false;
+        }
+        if (!this.sequences.has(key) && this.chapters.has(key)) {
+            await this.load(this.chapters.get(key));
+        }
+        return this.sequences.has(key);
+    }
+
+    keys() {
+        return [...new Set([...this.sequences.keys(), ...this.chapters.keys()])];
+    }
+}
+
+window.DialogueRepository = DialogueRepository;
+window.dialogueRepository = new DialogueRepository("../App/textHandler/textData.json");
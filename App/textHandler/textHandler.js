@@ -1,11 +1,49 @@
+const ActionState = Object.freeze({
+    PENDING: 'pending',      // line is shown, action runs on the next click
+    RUNNING: 'running',      // timer-driven action in progress
+    WAITING: 'waiting',      // waiting for the learner (button click, input)
+    DONE: 'done',
+    CANCELLED: 'cancelled'   // sequence changed before the action finished
+});
+
+// Timers owned by one dialogue sequence, cancelled together when it changes
+class SequenceTimers {
+    constructor() {
+        this.ids = new Set();
+    }
+    
+    set(callback, delay) {
+        const id = setTimeout(() => {
+            this.ids.delete(id);
+            callback();
+        }, delay);
+        this.ids.add(id);
+        return id;
+    }
+    
+    clear(id) {
+        if (this.ids.delete(id)) {
+            clearTimeout(id);
+        }
+    }
+    
+    clearAll() {
+        this.ids.forEach(id => clearTimeout(id));
+        this.ids.clear();
+    }
+    
+    get size() {
+        return this.ids.size;
+    }
+}
+
 class TextHandler {
     constructor() {
         this.currentIndex = 0;
         this.isTyping = false;
-        this.typewriterTimeout = null;
+        this.typewriter = new TypewriterRenderer();
         this.currentText = "";
-        this.textIndex = 0;
-        this.data = null;
+        this.repository = window.dialogueRepository;
         this.texts = [];
         
         this.typingSpeed = 50;
@@ -19,6 +57,13 @@ class TextHandler {
         this.overlayElement = null;
         this.originalStyles = new Map(); // Store original styles for restoration
         
+        // Action scheduling
+        this.timers = new SequenceTimers();
+        this.sequenceId = 0;
+        this.lineActions = [];   // { action, state, timer } for the current line
+        this.typingDone = Promise.resolve();
+        this.resolveTyping = null;
+        
         window.textHandler = this;
     }
     
@@ -32,8 +77,7 @@ class TextHandler {
             const current = this.texts[this.currentIndex];
             
             this.currentText = current.text || "";
-            this.textIndex = 0;
-            this.isTyping = true;
+            this.startTyping();
             
             const dialog = document.querySelector("#textDialog");
             const textBox = document.getElementById("textBox");
@@ -52,11 +96,14 @@ class TextHandler {
                     textBox.style.transform = "translateY(-10px)";
                     
                     // Show text box with delay and animation
-                    setTimeout(() => {
+                    this.timers.set(() => {
                         textBox.style.transition = "opacity 0.5s ease, transform 0.5s ease";
                         textBox.style.opacity = "1";
                         textBox.style.transform = "translateY(0)";
-                        this.typeWriter();
+                        // Skip typing if the line was already completed by a click
+                        if (this.isTyping) {
+                            this.typeWriter();
+                        }
                     }, 500); // 500ms delay before text box appears
                 } else {
                     // Dialog already open, just start typing immediately
@@ -66,6 +113,7 @@ class TextHandler {
             
             progressElem.innerHTML = `Step ${this.currentIndex + 1} of ${this.texts.length}`;
             
+            this.lineActions = [];
             if (current.action) {
                 this.scheduleAction(current.action);
             }
@@ -78,77 +126,134 @@ class TextHandler {
         }
     }
     
+    currentTokens() {
+        const current = this.texts[this.currentIndex];
+        return (current && current.tokens) || DialogueRepository.tokenize(this.currentText);
+    }
+    
     typeWriter() {
         const textElem = document.getElementById("textContent");
         
-        if (this.textIndex < this.currentText.length) {
-            const char = this.currentText.charAt(this.textIndex);
-            
-            if (char === '<') {
-                const closingBracket = this.currentText.indexOf('>', this.textIndex);
-                if (closingBracket !== -1) {
-                    textElem.innerHTML = this.currentText.substring(0, closingBracket + 1);
-                    this.textIndex = closingBracket + 1;
-                    this.typewriterTimeout = setTimeout(() => this.typeWriter(), 0);
-                    return;
-                }
+        this.typewriter.typingSpeed = this.typingSpeed;
+        this.typewriter.punctuationPause = this.punctuationPause;
+        this.typewriter.play(textElem, this.currentTokens(), () => this.onTypingDone());
+    }
+    
+    onTypingDone() {
+        this.finishTyping();
+        
+        const current = this.texts[this.currentIndex];
+        if (!current.action || current.action.type !== 'waitForButton') {
+            const indicatorElem = document.querySelector(".indicator");
+            indicatorElem.classList.remove("hidden");
+        }
+    }
+    
+    startTyping() {
+        this.isTyping = true;
+        this.typingDone = new Promise(resolve => {
+            this.resolveTyping = resolve;
+        });
+    }
+    
+    finishTyping() {
+        this.isTyping = false;
+        if (this.resolveTyping) {
+            const resolve = this.resolveTyping;
+            this.resolveTyping = null;
+            resolve();
+        }
+    }
+    
+    // Run a callback once the current line is typed, unless the sequence changes first
+    afterTyping(callback) {
+        const sequenceId = this.sequenceId;
+        const done = this.isTyping ? this.typingDone : Promise.resolve();
+        done.then(() => {
+            if (sequenceId === this.sequenceId) {
+                callback();
             }
-            
-            textElem.innerHTML = this.currentText.substring(0, this.textIndex + 1);
-            this.textIndex++;
-            
-            let delay = this.typingSpeed;
-            if (char === '.' || char === '!' || char === '?') {
-                delay = this.punctuationPause;
-            } else if (char === ',') {
-                delay = this.typingSpeed * 2;
+        });
+    }
+    
+    scheduleAction(action) {
+        // Actions of the current line start pending and run on the next click
+        const actions = Array.isArray(action) ? action : [action];
+        this.lineActions = actions.map(item => ({ action: item, state: ActionState.PENDING, timer: null }));
+    }
+    
+    startTimer(record, callback, delay) {
+        record.state = ActionState.RUNNING;
+        record.timer = this.timers.set(() => {
+            record.timer = null;
+            callback();
+        }, delay);
+    }
+    
+    // Finish every action of the line being left and drop its timers
+    settleLine(state = ActionState.DONE) {
+        this.lineActions.forEach(record => {
+            if (record.timer !== null) {
+                this.timers.clear(record.timer);
+                record.timer = null;
             }
-            
-            this.typewriterTimeout = setTimeout(() => this.typeWriter(), delay);
-        } else {
-            this.isTyping = false;
-            
-            const current = this.texts[this.currentIndex];
-            if (!current.action || current.action.type !== 'waitForButton') {
-                const indicatorElem = document.querySelector(".indicator");
-                indicatorElem.classList.remove("hidden");
+            if (record.state !== ActionState.DONE && record.state !== ActionState.CANCELLED) {
+                record.state = state;
             }
-        }
+        });
     }
     
-    scheduleAction(action) {
-        // Available for future use
+    // Move to the next line, optionally after a delay
+    advance(delay = 0) {
+        this.settleLine();
+        
+        if (delay > 0) {
+            this.isInDelay = true;
+            
+            this.timers.set(() => {
+                this.isInDelay = false;
+                this.currentIndex++;
+                this.updateDisplay();
+            }, delay);
+        } else {
+            this.currentIndex++;
+            this.updateDisplay();
+        }
     }
     
-    executeAction(action) {
+    executeAction(action, record) {
         switch (action.type) {
             case 'waitForButton':
-                this.waitForButton(action.selector, action.delayAfter || 0);
+                this.waitForButton(action.selector, action.delayAfter || 0, record);
                 break;
                 
             case 'showAndWaitForButton':
-                this.showAndWaitForButton(action.selector, action.delayAfter || 0);
+                this.showAndWaitForButton(action.selector, action.delayAfter || 0, record);
                 break;
                 
             case 'waitForInput':
-                this.waitForInput(action.selector, action.expectedValue, action.delayAfter || 0);
+                this.waitForInput(action.selector, action.expectedValue, action.delayAfter || 0, record);
                 break;
                 
             case 'delay':
-                this.delayNext(action.duration || 1000);
+                this.delayNext(action.duration || 1000, record);
                 break;
                 
             case 'autoNext':
-                this.autoNext(action.duration || 1000);
+                this.autoNext(action.duration || 1000, record);
                 break;
                 
             case 'highlight':
-                this.justHighlight(action.selector, action.duration || 0);
+                this.justHighlight(action.selector, action.duration || 0, record);
                 break;
                 
             case 'showElement':
-                this.showElement(action.selector, action.duration || 0);
+                this.showElement(action.selector, action.duration || 0, record);
                 break;
+                
+            default:
+                console.error(`Unknown action type: ${action.type}`);
+                record.state = ActionState.DONE;
         }
     }
     
@@ -190,7 +295,7 @@ class TextHandler {
         }
     }
     
-    waitForButton(selector, delayAfter = 0) {
+    waitForButton(selector, delayAfter = 0, record) {
         this.isWaitingForAction = true;
         
         const element = document.querySelector(selector);
@@ -198,6 +303,7 @@ class TextHandler {
             console.error(`Button not found: ${selector}`);
             return;
         }
+        record.state = ActionState.WAITING;
         
         
         // Highlight the element
@@ -228,18 +334,7 @@ class TextHandler {
                 originalOnClick.call(element, event);
             }
             
-            if (delayAfter > 0) {
-                this.isInDelay = true;
-                
-                setTimeout(() => {
-                    this.isInDelay = false;
-                    this.currentIndex++;
-                    this.updateDisplay();
-                }, delayAfter);
-            } else {
-                this.currentIndex++;
-                this.updateDisplay();
-            }
+            this.advance(delayAfter);
         };
         
         element.addEventListener('click', clickHandler, true);
@@ -259,7 +354,7 @@ class TextHandler {
         indicatorElem.classList.add("hidden");
     }
     
-    showAndWaitForButton(selector, delayAfter = 0) {
+    showAndWaitForButton(selector, delayAfter = 0, record) {
         this.isWaitingForAction = true;
         
         const element = document.querySelector(selector);
@@ -267,6 +362,7 @@ class TextHandler {
             console.error(`Button not found: ${selector}`);
             return;
         }
+        record.state = ActionState.WAITING;
         
         
         // Wait for typing to finish, then show and highlight the element
@@ -286,18 +382,12 @@ class TextHandler {
             }
         };
         
-        // If still typing, wait for it to finish
-        if (this.isTyping) {
-            const checkTyping = setInterval(() => {
-                if (!this.isTyping) {
-                    clearInterval(checkTyping);
-                    showAndHighlight();
-                }
-            }, 100);
-        } else {
-            // Already done typing, show immediately
-            showAndHighlight();
-        }
+        // Runs as soon as typing finishes (immediately if it already has)
+        this.afterTyping(() => {
+            if (record.state === ActionState.WAITING) {
+                showAndHighlight();
+            }
+        });
         
         // Close the dialog to allow interaction with the button
         const dialog = document.querySelector("#textDialog");
@@ -321,18 +411,7 @@ class TextHandler {
                 originalOnClick.call(element, event);
             }
             
-            if (delayAfter > 0) {
-                this.isInDelay = true;
-                
-                setTimeout(() => {
-                    this.isInDelay = false;
-                    this.currentIndex++;
-                    this.updateDisplay();
-                }, delayAfter);
-            } else {
-                this.currentIndex++;
-                this.updateDisplay();
-            }
+            this.advance(delayAfter);
         };
         
         element.addEventListener('click', clickHandler, true);
@@ -352,7 +431,7 @@ class TextHandler {
         indicatorElem.classList.add("hidden");
     }
     
-    waitForInput(selector, expectedValue, delayAfter = 0) {
+    waitForInput(selector, expectedValue, delayAfter = 0, record) {
         this.isWaitingForAction = true;
         
         const element = document.querySelector(selector);
@@ -360,6 +439,7 @@ class TextHandler {
             console.error(`Input element not found: ${selector}`);
             return;
         }
+        record.state = ActionState.WAITING;
         
         // Highlight the input element
         this.highlightElement(element);
@@ -371,10 +451,9 @@ class TextHandler {
                 element.removeEventListener('input', checkInput);
                 this.clearHighlight();
                 
-                setTimeout(() => {
+                this.startTimer(record, () => {
                     this.isWaitingForAction = false;
-                    this.currentIndex++;
-                    this.updateDisplay();
+                    this.advance();
                 }, delayAfter);
             }
         };
@@ -402,29 +481,27 @@ class TextHandler {
         return value === expected;
     }
     
-    delayNext(duration) {
+    delayNext(duration, record) {
         this.isWaitingForAction = true;
         
         const indicatorElem = document.querySelector(".indicator");
         indicatorElem.classList.add("hidden");
         
-        setTimeout(() => {
+        this.startTimer(record, () => {
             this.isWaitingForAction = false;
-            this.currentIndex++;
-            this.updateDisplay();
+            this.advance();
         }, duration);
     }
     
-    autoNext(duration) {
-        setTimeout(() => {
+    autoNext(duration, record) {
+        this.startTimer(record, () => {
             if (!this.isWaitingForAction && !this.isTyping) {
-                this.currentIndex++;
-                this.updateDisplay();
+                this.advance();
             }
         }, duration);
     }
     
-    justHighlight(selector, duration = 0) {
+    justHighlight(selector, duration = 0, record) {
         // Just highlight an element without requiring interaction
         const element = document.querySelector(selector);
         if (!element) {
@@ -445,17 +522,18 @@ class TextHandler {
         // If duration is specified, auto-clear highlight and proceed to next
         if (duration > 0) {
             this.isWaitingForAction = true;
-            setTimeout(() => {
+            this.startTimer(record, () => {
                 this.clearHighlight();
                 this.isWaitingForAction = false;
-                this.currentIndex++;
-                this.updateDisplay();
+                this.advance();
             }, duration);
+        } else {
+            // Highlight stays until user clicks to next text
+            record.state = ActionState.DONE;
         }
-        // If duration is 0, highlight stays until user clicks to next text
     }
     
-    showElement(selector, duration = 0) {
+    showElement(selector, duration = 0, record) {
         // Show an element that was hidden with display: none and wait for user to proceed
         const element = document.querySelector(selector);
         if (!element) {
@@ -469,37 +547,26 @@ class TextHandler {
             element.style.display = '';
         }
         
-        // Wait for typing to finish before showing
-        if (this.isTyping) {
-            // Check periodically if typing is done
-            const checkTyping = setInterval(() => {
-                if (!this.isTyping) {
-                    clearInterval(checkTyping);
-                    
-                    // Show indicator so user can proceed
-                    const indicatorElem = document.querySelector(".indicator");
-                    indicatorElem.classList.remove("hidden");
-                }
-            }, 100);
-        } else {
-            // Typing already done, show indicator immediately
+        // Show indicator so user can proceed once typing is done
+        this.afterTyping(() => {
             const indicatorElem = document.querySelector(".indicator");
             indicatorElem.classList.remove("hidden");
-        }
+        });
         
         // Element stays visible, user clicks indicator to continue
         // The nextText() function will handle advancing
+        record.state = ActionState.DONE;
     }
     
     completeTyping() {
-        if (this.typewriterTimeout) {
-            clearTimeout(this.typewriterTimeout);
-            this.typewriterTimeout = null;
+        if (this.typewriter.isPlaying()) {
+            this.typewriter.complete();
+        } else if (this.isTyping) {
+            // Typing has not started yet (intro animation), show the whole line now
+            const textElem = document.getElementById("textContent");
+            this.typewriter.show(textElem, this.currentTokens());
         }
-        
-        const textElem = document.getElementById("textContent");
-        textElem.innerHTML = this.currentText;
-        this.isTyping = false;
+        this.finishTyping();
         
         if (this.currentIndex < this.texts.length) {
             const current = this.texts[this.currentIndex];
@@ -522,29 +589,40 @@ class TextHandler {
         if (this.isTyping) {
             this.completeTyping();
         } else {
-            const current = this.texts[this.currentIndex];
-            if (current && current.action) {
-                const actions = Array.isArray(current.action) ? current.action : [current.action];
-                this.executeActions(actions);
+            const pending = this.lineActions.filter(record => record.state === ActionState.PENDING);
+            if (pending.length > 0) {
+                this.executeActions(pending);
             } else {
                 this.clearHighlight();
+                this.settleLine();
                 this.currentIndex++;
                 this.updateDisplay();
             }
         }
     }
     
-    executeActions(actions) {
-        actions.forEach(action => {
-            this.executeAction(action);
+    executeActions(records) {
+        records.forEach(record => {
+            record.state = ActionState.RUNNING;
+            this.executeAction(record.action, record);
         });
     }
     
+    // Drop everything the previous sequence scheduled
+    cancelScheduled() {
+        this.sequenceId++;
+        this.settleLine(ActionState.CANCELLED);
+        this.timers.clearAll();
+        this.lineActions = [];
+        this.isInDelay = false;
+    }
+    
     loadSequence(dialogueKey) {
+        this.cancelScheduled();
         this.completeTyping();
         this.clearHighlight();
         
-        this.texts = this.data[dialogueKey] || [];
+        this.texts = this.repository.get(dialogueKey);
         this.currentIndex = 0;
         this.isWaitingForAction = false;
         
@@ -552,14 +630,8 @@ class TextHandler {
     }
     
     async loadFromFile(filename) {
-        try {
-            const response = await fetch(filename);
-            this.data = await response.json();
-            return true;
-        } catch (error) {
-            console.error("Error loading JSON:", error);
-            return false;
-        }
+        // Shared repository: the file is fetched and parsed only once per page
+        return this.repository.load(filename);
     }
     
     setTypingSpeed(speed) {
@@ -1,6 +1,7 @@
 from pyscript import window, document
-from pyodide.ffi import create_proxy
-from js import console, Date, setTimeout
+from proxyRegistry import proxy_registry
+from readiness import ready
+from perfMonitor import perf
 import asyncio
 
 
@@ -8,43 +9,56 @@ import asyncio
 last_click_time = 0
 click_delay = 100
 
+async def get_handler():
+    """Return the shared TextHandler once the dialogue file is loaded"""
+    if not hasattr(window, 'TextHandler'):
+        window.console.error("TextHandler not found on window!")
+        return None
+    
+    # One handler for the whole page, created on first use
+    handler = getattr(window, 'currentHandler', None)
+    if handler is None:
+        handler = window.TextHandler.new()
+        window.currentHandler = handler
+    
+    # Single-flight load: every caller awaits the same fetch, later calls return at once
+    success = await window.dialogueRepository.load()
+    if not success:
+        window.console.error("Failed to load JSON file!")
+        return None
+    
+    return handler
+
+async def open_dialogue(dialogue_key):
+    """Load a dialogue sequence into the shared handler and show it"""
+    handler = await get_handler()
+    if handler is None:
+        return False
+    
+    # Loads the chapter file first if the key lives in one
+    if not await window.dialogueRepository.ensure(dialogue_key):
+        window.console.error(f"❌ No texts found for key: {dialogue_key}")
+        window.console.error("Available keys in your JSON should include this key!")
+        return False
+    
+    # Load the specific dialogue
+    handler.loadSequence(dialogue_key)
+    
+    # Open dialog
+    dialog = document.querySelector("#textDialog")
+    if not dialog.open:
+        dialog.showModal()
+    return True
+
+@perf.timed("show_tutorial")
 async def show_tutorial(dialogue_key="tutorial"):
     """Show tutorial dialog with specific dialogue sequence"""
     try:
-        if not hasattr(window, 'TextHandler'):
-            console.error("TextHandler not found!")
-            return
-        
-        # Create handler if doesn't exist
-        if not hasattr(window, 'currentHandler'):
-            handler = window.TextHandler.new()
-            success = await handler.loadFromFile("../App/textHandler/textData.json")
-            
-            
-            if not success:
-                console.error("Failed to load JSON file!")
-                return
-                
-            window.currentHandler = handler
-        # Try to access the data directly
-        handler = window.currentHandler
-        
-        # Load the specific dialogue
-        handler.loadSequence(dialogue_key)
-        
-        if len(handler.texts) == 0:
-            console.error(f"❌ No texts found for key: {dialogue_key}")
-            console.error("Available keys in your JSON should include this key!")
-            return
-        
-        # Open dialog
-        dialog = document.querySelector("#textDialog")
-        dialog.showModal()
-        
+        await open_dialogue(dialogue_key)
     except Exception as e:
-        console.error(f"❌ Error showing tutorial: {e}")
+        window.console.error(f"❌ Error showing tutorial: {e}")
         import traceback
-        console.error(traceback.format_exc())
+        window.console.error(traceback.format_exc())
 
 def hide_title_screen():
     """Smoothly hide the title screen"""
@@ -57,9 +71,8 @@ def hide_title_screen():
         def complete_hide():
             menu.classList.add("hidden")
         
-        # Create a proxy so the function persists for setTimeout
-        hide_proxy = create_proxy(complete_hide)
-        setTimeout(hide_proxy, 600)  # Match the CSS transition duration
+        # One-shot proxy, destroyed as soon as the timer fires
+        proxy_registry.set_timeout(complete_hide, 600)  # Match the CSS transition duration
 
 async def text_Start(event):
     
@@ -70,29 +83,17 @@ async def text_Start(event):
         # Wait a bit for the transition to look smoother
         await asyncio.sleep(0.3)
         
-        if not hasattr(window, 'TextHandler'):
-            console.error("TextHandler not found on window!")
-            return
-        
-        handler = window.TextHandler.new()
+        # The tutorial drives the window buttons, make sure they are wired
+        await ready.wait("windows")
         
-        success = await handler.loadFromFile("../App/textHandler/textData.json")
-        
-        if success:
-            handler.loadSequence("tutorial")
-            window.currentHandler = handler
-            
-            dialog = document.querySelector("#textDialog")
-            dialog.showModal()
-        else:
-            console.error("Failed to load JSON!")
+        await open_dialogue("tutorial")
     except Exception as e:
-        console.error(f"Error: {e}")
+        window.console.error(f"Error: {e}")
 
 def next_text(event):
     global last_click_time
     
-    current_time = Date.new().getTime()
+    current_time = window.Date.new().getTime()
     
     if current_time - last_click_time < click_delay:
         return
@@ -102,16 +103,22 @@ def next_text(event):
     if hasattr(window, 'currentHandler'):
         window.currentHandler.nextText()
 
-# Attach event listeners
-btn = document.getElementById("startButton")
-if btn:
-    btn.onclick = text_Start
-else:
-    console.error("startButton not found!")
-
-txt = document.getElementById("textBox")
-if txt:
-    txt.onclick = next_text
+def setup():
+    # Attach event listeners
+    btn = document.getElementById("startButton")
+    if btn:
+        btn.onclick = proxy_registry.create(text_Start)
+    else:
+        window.console.error("startButton not found!")
+    
+    txt = document.getElementById("textBox")
+    if txt:
+        txt.onclick = proxy_registry.create(next_text)
+    
+    # Expose show_tutorial to window so JS can call it
+    window.show_tutorial = proxy_registry.create(show_tutorial)
+    
+    # Read the embedded dialogue (or start fetching it) while the title screen is up
+    window.dialogueRepository.load()
+    ready.set("title")
 
-# Expose show_tutorial to window so other scripts can call it
-window.show_tutorial = show_tutorial
@@ -0,0 +1,140 @@
+class TypewriterRenderer {
+    constructor(typingSpeed = 50, punctuationPause = 300) {
+        this.typingSpeed = typingSpeed;
+        this.punctuationPause = punctuationPause;
+
+        this.runs = [];        // { node, text, offset } per text run
+        this.revealAt = [];    // ms after start at which each character appears
+        this.total = 0;
+        this.revealed = 0;
+        this.runIndex = 0;
+        this.frameId = null;
+        this.startTime = null;
+        this.onDone = null;
+        this.tick = this.tick.bind(this);
+    }
+
+    delayAfter(char) {
+        if (char === '.' || char === '!' || char === '?') {
+            return this.punctuationPause;
+        } else if (char === ',') {
+            return this.typingSpeed * 2;
+        }
+        return this.typingSpeed;
+    }
+
+    // Parse the line once: tags go in as real elements, every text run becomes
+    // an empty text node that is later extended in place.
+    build(element, tokens) {
+        let skeleton = '';
+        for (let i = 0; i < tokens.length; i++) {
+            skeleton += i % 2 === 0 ? '<!---->' : tokens[i];
+        }
+        element.innerHTML = skeleton;
+
+        const markers = [];
+        const walker = document.createTreeWalker(element, NodeFilter.SHOW_COMMENT);
+        while (walker.nextNode()) {
+            markers.push(walker.currentNode);
+        }
+
+        this.runs = [];
+        this.revealAt = [];
+        let offset = 0;
+        let time = 0;
+
+        markers.forEach((marker, n) => {
+            const text = tokens[n * 2] || "";
+            const node = document.createTextNode("");
+            marker.replaceWith(node);
+            this.runs.push({ node, text, offset });
+
+            for (let i = 0; i < text.length; i++) {
+                this.revealAt.push(time);
+                time += this.delayAfter(text.charAt(i));
+            }
+            offset += text.length;
+        });
+
+        this.total = offset;
+        this.revealed = 0;
+        this.runIndex = 0;
+    }
+
+    reveal(count) {
+        while (this.runIndex < this.runs.length) {
+            const run = this.runs[this.runIndex];
+            const visible = Math.min(run.text.length, count - run.offset);
+            if (visible > run.node.length) {
+                run.node.data = run.text.substring(0, visible);
+            }
+            if (visible < run.text.length) {
+                break;
+            }
+            this.runIndex++;
+        }
+        this.revealed = count;
+    }
+
+    play(element, tokens, onDone) {
+        this.stop();
+        this.build(element, tokens);
+        this.onDone = onDone;
+        this.startTime = null;
+        this.frameId = requestAnimationFrame(this.tick);
+    }
+
+    // One rAF loop per line, driven by elapsed time rather than one timer per character
+    tick(now) {
+        if (this.startTime === null) {
+            this.startTime = now;
+        }
+        const elapsed = now - this.startTime;
+
+        let target = this.revealed;
+        while (target < this.total && this.revealAt[target] <= elapsed) {
+            target++;
+        }
+        if (target !== this.revealed) {
+            this.reveal(target);
+        }
+
+        if (this.revealed >= this.total) {
+            this.frameId = null;
+            const onDone = this.onDone;
+            this.onDone = null;
+            if (onDone) {
+                onDone();
+            }
+        } else {
+            this.frameId = requestAnimationFrame(this.tick);
+        }
+    }
+
+    isPlaying() {
+        return this.frameId !== null;
+    }
+
+    stop() {
+        if (this.frameId !== null) {
+            cancelAnimationFrame(this.frameId);
+            this.frameId = null;
+        }
+        this.onDone = null;
+    }
+
+    // Skip to the end of the current line
+    complete() {
+        this.stop();
+        this.reveal(this.total);
+    }
+
+    // Render a whole line at once
+    show(element, tokens) {
+        this.stop();
+        this.build(element, tokens);
+        this.reveal(this.total);
+    }
+}
+
+window.TypewriterRenderer = TypewriterRenderer;
@@ -0,0 +1,151 @@
+// Generated by tools/build_sw_manifest.py, do not edit
+self.__pythology_precache = {
+  "version": "73c02964b8b8",
+  "python": "c66b8e696fc6",
+  "files": [
+    {
+      "url": "./index.html",
+      "hash": "6f8cfc4c50cc"
+    },
+    {
+      "url": "./style.css",
+      "hash": "cfdb8618d7af"
+    },
+    {
+      "url": "./pyscript.json",
+      "hash": "87cfd9674a1d"
+    },
+    {
+      "url": "../App/snapshotBoot.js",
+      "hash": "87c1a65aa05d"
+    },
+    {
+      "url": "../App/aceEditorLib/ace.js",
+      "hash": "7b436389caf0"
+    },
+    {
+      "url": "../App/aceEditorLib/ext-language_tools.js",
+      "hash": "2de55da2d380"
+    },
+    {
+      "url": "../App/aceEditorLib/mode-python.js",
+      "hash": "d33a795f39a4"
+    },
+    {
+      "url": "../App/aceEditorLib/theme-terminal.js",
+      "hash": "bb5763704b31"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/aceLoader.js",
+      "hash": "fd6fb8ef64e6"
+    },
+    {
+      "url": "../App/textHandler/dialogueRepository.js",
+      "hash": "f34f5a449891"
+    },
+    {
+      "url": "../App/textHandler/typewriterRenderer.js",
+      "hash": "0b15259e74ac"
+    },
+    {
+      "url": "../App/textHandler/textHandler.js",
+      "hash": "4640d3a1f17c"
+    },
+    {
+      "url": "../App/bootstrap.py",
+      "hash": "d92326e78ac4"
+    },
+    {
+      "url": "../App/startupTiming.py",
+      "hash": "9bed21b46408"
+    },
+    {
+      "url": "../App/perfMonitor.py",
+      "hash": "3c00177f6369"
+    },
+    {
+      "url": "../App/stallWatchdog.py",
+      "hash": "6b904d69ad61"
+    },
+    {
+      "url": "../App/readiness.py",
+      "hash": "cf6126193f97"
+    },
+    {
+      "url": "../App/proxyRegistry.py",
+      "hash": "79ea24542cd6"
+    },
+    {
+      "url": "../App/WindowHandler/windowManager.py",
+      "hash": "a2ae56bf9ac7"
+    },
+    {
+      "url": "../App/textHandler/textHandlerBtn.py",
+      "hash": "4f02305451ff"
+    },
+    {
+      "url": "../App/modalHandler.py",
+      "hash": "e64b66de6d56"
+    },
+    {
+      "url": "../App/WindowHandler/movableDiv.py",
+      "hash": "db6bddda5d8d"
+    },
+    {
+      "url": "../App/WindowHandler/windowDiv.py",
+      "hash": "f052635ae2d3"
+    },
+    {
+      "url": "../App/WindowHandler/resizableDiv.py",
+      "hash": "d85b47a85328"
+    },
+    {
+      "url": "../App/WindowHandler/perfHud.py",
+      "hash": "c070d614a0e7"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/memoryGuard.py",
+      "hash": "2d3069da6027"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/terminalWorker.py",
+      "hash": "2cdd923b47b6"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/editorComp.py",
+      "hash": "29f106ae05f1"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/outputDiff.py",
+      "hash": "f252313af3da"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/caseGrader.py",
+      "hash": "710c0455371d"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/matcher.py",
+      "hash": "0db476d69714"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/codeLinter.py",
+      "hash": "e47354909d1d"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/completionIndex.py",
+      "hash": "b74fea236f85"
+    },
+    {
+      "url": "../App/CodingHandlerAndItsApp/stateSnapshot.py",
+      "hash": "bf8225b75e49"
+    },
+    {
+      "url": "../App/lvlSystem.py",
+      "hash": "5733859899cc"
+    },
+    {
+      "url": "../App/textHandler/textData.json",
+      "hash": "07436aa6539e"
+    }
+  ]
+};
@@ -0,0 +1,157 @@
+// Offline-first service worker.
+// The app shell listed in precache-manifest.js (generated by tools/build_sw_manifest.py)
+// is cached per manifest version and served cache-first, revalidating in the background.
+// CDN assets (PyScript, Pyodide, fonts, images) go to a runtime cache the same way,
+// or come from HTML/vendor/ when tools/vendor_runtime.py has been run.
+
+importScripts('./precache-manifest.js');
+
+const MANIFEST = self.__pythology_precache;
+const CACHE_PREFIX = 'pythology-';
+const SHELL_CACHE = `${CACHE_PREFIX}shell-${MANIFEST.version}`;
+const RUNTIME_CACHE = `${CACHE_PREFIX}runtime`;
+const MANIFEST_KEY = './__precache-manifest';
+
+// CDN prefix -> vendored copy, used when the copy is in the precache
+const VENDOR_MAP = MANIFEST.vendor || {};
+
+const RUNTIME_HOSTS = [
+    'pyscript.net',
+    'cdn.jsdelivr.net',
+    'fonts.googleapis.com',
+    'fonts.gstatic.com',
+    'nationalzoo.si.edu'
+];
+
+// Versioned CDN paths never change, so they are not revalidated
+const IMMUTABLE = [
+    /^https:\/\/pyscript\.net\/releases\//,
+    /^https:\/\/cdn\.jsdelivr\.net\/pyodide\/v/
+];
+
+// Content-hashed build output (tools/build.py) never changes under the same name
+const HASHED = /\.[0-9a-f]{10}\.\w+$/;
+
+const absolute = url => new URL(url, self.location.href).href;
+
+// url -> hash for the files of this version
+const shellHashes = new Map(MANIFEST.files.map(file => [absolute(file.url), file.hash]));
+
+async function previousHashes() {
+    for (const name of await caches.keys()) {
+        if (!name.startsWith(`${CACHE_PREFIX}shell-`) || name === SHELL_CACHE) {
+            continue;
+        }
+        const cache = await caches.open(name);
+        const response = await cache.match(absolute(MANIFEST_KEY));
+        if (response) {
+            return { cache, hashes: new Map(Object.entries(await response.json())) };
+        }
+    }
+    return { cache: null, hashes: new Map() };
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(SHELL_CACHE);
+        const previous = await previousHashes();
+
+        await Promise.all([...shellHashes].map(async ([url, hash]) => {
+            // Unchanged since the last version: copy instead of downloading again
+            if (previous.cache && previous.hashes.get(url) === hash) {
+                const cached = await previous.cache.match(url);
+                if (cached) {
+                    return cache.put(url, cached);
+                }
+            }
+            // Bypass the HTTP cache so a new version never picks up stale files
+            const response = await fetch(new Request(url, { cache: 'reload' }));
+            if (!response.ok) {
+                throw new Error(`Precache of ${url} failed: HTTP ${response.status}`);
+            }
+            return cache.put(url, response);
+        }));
+
+        await cache.put(absolute(MANIFEST_KEY), new Response(JSON.stringify(Object.fromEntries(shellHashes))));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (name.startsWith(`${CACHE_PREFIX}shell-`) && name !== SHELL_CACHE) {
+                await caches.delete(name);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+function vendoredUrl(url) {
+    for (const [prefix, local] of Object.entries(VENDOR_MAP)) {
+        if (url.startsWith(prefix)) {
+            const candidate = absolute(local + url.substring(prefix.length));
+            if (shellHashes.has(candidate)) {
+                return candidate;
+            }
+        }
+    }
+    return null;
+}
+
+// Serve from cache right away, refresh the cached copy in the background
+async function staleWhileRevalidate(event, cacheName, key, revalidate = true) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key, { ignoreSearch: cacheName === SHELL_CACHE });
+
+    const refresh = fetch(event.request).then(response => {
+        // Opaque responses (no-cors images, fonts) are fine to cache too
+        if (response.ok || response.type === 'opaque') {
+            return cache.put(key, response.clone()).then(() => response);
+        }
+        return response;
+    });
+
+    if (cached) {
+        if (revalidate) {
+            event.waitUntil(refresh.catch(() => {}));
+        }
+        return cached;
+    }
+    return refresh;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    const url = new URL(request.url);
+    const key = url.origin + url.pathname;
+
+    const vendored = vendoredUrl(request.url);
+    if (vendored) {
+        // Vendored runtime files are versioned by their path, nothing to revalidate
+        event.respondWith(caches.match(vendored).then(cached => cached || fetch(request)));
+        return;
+    }
+
+    if (shellHashes.has(key)) {
+        event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, key, !HASHED.test(key)));
+        return;
+    }
+
+    if (request.mode === 'navigate' && url.origin === self.location.origin) {
+        // Offline reload with a query string (?debug=startup) still gets the page
+        event.respondWith(fetch(request).catch(() => caches.match(key, { ignoreSearch: true })
+            .then(cached => cached || caches.match(absolute('./index.html')))));
+        return;
+    }
+
+    if (RUNTIME_HOSTS.includes(url.hostname)) {
+        const revalidate = !IMMUTABLE.some(pattern => pattern.test(request.url));
+        event.respondWith(staleWhileRevalidate(event, RUNTIME_CACHE, request, revalidate));
+    }
+});
@@ -0,0 +1,341 @@
+"""
+Behaviour checks for the app under CPython
+
+Boots the app on tools/fakebrowser like tools/boot_harness.py, then runs learner code
+in the terminals the way a person would and checks what the app made of it. Each
+check is an async function that raises AssertionError when something is off.
+
+Usage:
+    python tools/app_checks.py                 # run every check
+    python tools/app_checks.py -k completion   # only checks whose name contains this
+"""
+import argparse
+import asyncio
+import sys
+import traceback
+from pathlib import Path
+
+TOOLS = Path(__file__).resolve().parent
+
+CHECKS = []  # (name, check)
+
+
+def app_check(name):
+    """Register an async check(browser)"""
+    def register(check):
+        CHECKS.append((name, check))
+        return check
+    return register
+
+
+class ClickEvent:
+    """click event as a button handler sees it"""
+
+    def __init__(self, target):
+        self.target = target
+
+    def stopPropagation(self):
+        pass
+
+    def preventDefault(self):
+        pass
+
+
+async def run_code(session, code, inputs=()):
+    """Run code in a terminal session, answering input() with inputs, and wait for it"""
+    session.execute_code(code)
+    return await finish_run(session, inputs)
+
+
+async def finish_run(session, inputs=()):
+    """Answer input() with inputs until the session's run is over"""
+    inputs = list(inputs)
+    while session.is_running():
+        if session.input_promise is not None and inputs:
+            promise, session.input_promise = session.input_promise, None
+            session.waiting_for_input = False
+            promise.set_result(str(inputs.pop(0)))
+        await asyncio.sleep(0)
+    return session.task
+
+
+@app_check("completion_keeps_learner_names")
+async def completion_keeps_learner_names(browser):
+    from completionIndex import completion_index
+    from terminalWorker import terminal, new_terminal
+
+    await run_code(terminal, "import sys\nterminal = 5\ndata = [1, 2]\nwindow = 3")
+    assert {"sys", "terminal", "data", "window"} <= completion_index.session.keys(), completion_index.session.keys()
+    assert completion_index.complete("sys.", ""), "no members offered for sys."
+    assert ("terminal", "session") in completion_index.complete("term", "term")
+
+    # Runs in other terminal windows are indexed too
+    session = await new_terminal()
+    await run_code(session, "other_total = 7")
+    assert "other_total" in completion_index.session, completion_index.session.keys()
+
+
+@app_check("goal_waits_for_the_run")
+async def goal_waits_for_the_run(browser):
+    from editorComp import editor_manager
+    from matcher import goal_tracker, set_goal
+    from terminalWorker import terminal
+
+    # Slower than any fixed wait the grader could guess
+    slow = "import asyncio\nawait asyncio.sleep(0.8)\nprint('done')"
+    set_goal(None, "done")
+    editor_manager.set_code(slow)
+    editor_manager.run()
+    await terminal.task
+    await asyncio.sleep(0)
+    assert goal_tracker.goal_completed, "graded before the run finished"
+
+    # A second run while the first waits for input starts nothing and grades nothing
+    set_goal(None, "never printed")
+    editor_manager.set_code("name = input('name? ')\nprint(name)")
+    editor_manager.run()
+    graded = []
+    editor_manager.on_run(graded.append)
+    editor_manager.set_code("print('never printed')")
+    editor_manager.run()
+    assert not graded, "run listeners called for a run that did not start"
+    await finish_run(terminal, inputs=["Ada"])
+    editor_manager.run_listeners.remove(graded.append)
+    assert not goal_tracker.goal_completed
+
+
+@app_check("memory_cap_frees_the_namespace")
+async def memory_cap_frees_the_namespace(browser):
+    import tracemalloc
+    from memoryGuard import memory_guard, set_memory_cap
+    from terminalWorker import terminal
+
+    set_memory_cap(20)
+    tracemalloc.start()  # left on by the guard, so it can be read between runs
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for attempt in range(2):
+            await run_code(terminal, "x = [0] * 10**7")
+            assert "MemoryError" in terminal.get_execution_output(), terminal.get_execution_output()
+            assert "x" not in terminal.namespace, f"x still bound after attempt {attempt + 1}"
+            grown = tracemalloc.get_traced_memory()[0] - before
+            assert grown < 10 * 1024 * 1024, f"{grown} bytes still allocated after attempt {attempt + 1}"
+    finally:
+        tracemalloc.stop()
+        set_memory_cap(256)
+    assert not memory_guard.active
+
+
+@app_check("goal_reads_the_graded_run")
+async def goal_reads_the_graded_run(browser):
+    from editorComp import editor_manager
+    from matcher import goal_tracker, set_goal
+    from terminalWorker import terminal
+
+    # Variables come from the run itself: the program is not run a second time
+    set_goal(None, "once", variables={42: "the answer"})
+    editor_manager.set_code("answer = 42\nprint('once')")
+    editor_manager.run()
+    await terminal.task
+    await asyncio.sleep(0)
+    assert goal_tracker.goal_completed
+    assert terminal.editor.getValue().count("once") == 1, "the program printed twice"
+
+    # The peak is the finished run's, however long it took
+    set_goal(None, "big", max_memory_kb=1024)
+    editor_manager.set_code("import asyncio\nawait asyncio.sleep(0.8)\nbig = list(range(10**6))\nprint('big')")
+    editor_manager.run()
+    await terminal.task
+    await asyncio.sleep(0)
+    assert not goal_tracker.goal_completed, "graded on a peak from before the allocation"
+    await run_code(terminal, "del big")
+
+
+@app_check("closed_dialog_leaves_focus_stack")
+async def closed_dialog_leaves_focus_stack(browser):
+    from pyscript import document
+    from windowManager import window_manager
+    from windowDiv import open_modal_by_id
+
+    open_modal_by_id("editor-modal")
+    open_modal_by_id("lvl-Selector")
+    # The level selector closes itself, e.g. on a click outside it
+    document.getElementById("lvl-Selector").close()
+    assert "lvl-Selector" not in window_manager.focus_stack
+    assert window_manager.active.id == "editor-modal", window_manager.active
+    assert window_manager.focus_top().id != "lvl-Selector"
+
+
+@app_check("closing_a_terminal_frees_its_proxies")
+async def closing_a_terminal_frees_its_proxies(browser):
+    from proxyRegistry import proxy_registry
+    from terminalWorker import new_terminal, terminals
+    from windowManager import window_manager
+
+    session = await new_terminal()
+    dialog_id = f"{session.terminal_id}-modal"
+    assert proxy_registry.live_count(f"window:{dialog_id}") >= 10, proxy_registry.counts()
+
+    # Callbacks a program makes last until its terminal's next run
+    callback = "from pyodide.ffi import create_proxy\non_tick = create_proxy(lambda: None)"
+    await run_code(session, callback)
+    assert proxy_registry.live_count(session.run_scope) == 1, proxy_registry.counts()
+    await run_code(session, callback)
+    assert proxy_registry.live_count(session.run_scope) == 1, proxy_registry.counts()
+
+    live = proxy_registry.live_count()
+    button = browser.document.getElementById(dialog_id).querySelector(".close-terminal-btn")
+    button.onclick(ClickEvent(button))
+    await asyncio.sleep(0)
+    assert session.terminal_id not in terminals
+    assert dialog_id not in window_manager.windows
+    assert browser.document.getElementById(dialog_id) is None
+    assert proxy_registry.live_count(f"window:{dialog_id}") == 0
+    assert proxy_registry.live_count(session.run_scope) == 0
+    assert live - proxy_registry.live_count() >= 11, (live, proxy_registry.counts())
+
+
+@app_check("lint_skips_huge_documents")
+async def lint_skips_huge_documents(browser):
+    from codeLinter import MAX_LINT_SIZE, code_linter, parse
+    from editorComp import editor_manager
+
+    editor_manager.set_code("print('hi')\n" * (MAX_LINT_SIZE // 10))
+    parsed = parse.cache_info().misses
+    annotations = code_linter.lint()
+    assert parse.cache_info().misses == parsed, "a pasted document over the limit was parsed"
+    assert [a["type"] for a in annotations] == ["info"], annotations
+
+    editor_manager.set_code("print('hi'")
+    assert code_linter.lint()[0]["type"] == "error"
+    editor_manager.set_code("")
+
+
+@app_check("perf_spans_and_js_calls")
+async def perf_spans_and_js_calls(browser):
+    from editorComp import editor_manager
+    from perfMonitor import perf
+    from proxyRegistry import proxy_registry
+    from terminalWorker import terminal
+
+    # Waiting for a person to answer input() is not execution time
+    assert terminal.execute_code("name = input('name? ')\nprint(name)")
+    await asyncio.sleep(0.3)
+    await finish_run(terminal, inputs=["Ada"])
+    assert perf.spans["execute_code"].recent()[-1] < 100, perf.spans["execute_code"].recent()
+    assert not perf.active, perf.active
+
+    # measure_every=1 sends every sample to the Performance panel
+    measured = []
+    performance = browser.window.performance
+    performance.measure = lambda *args: measured.append(args)
+    perf.measure_every = 1
+    try:
+        perf.record("check_sample", 1.0)
+        perf.record("check_sample", 1.0)
+    finally:
+        perf.measure_every = 10
+        del performance.measure
+    assert len(measured) == 2, measured
+
+    # Handlers called from JS are counted per label
+    editor_manager.set_code("print('counted')")
+    calls = perf.report()["ffi"]["calls_from_js"]
+    runs = proxy_registry.calls.get("run_code", 0)
+    browser.window.run_code(None)
+    await terminal.task
+    assert proxy_registry.calls["run_code"] == runs + 1, proxy_registry.calls
+    assert perf.report()["ffi"]["calls_from_js"] > calls
+
+
+@app_check("cases_level_run_needs_no_typing")
+async def cases_level_run_needs_no_typing(browser):
+    from editorComp import editor_manager
+    from matcher import goal_tracker, set_goal
+    from terminalWorker import terminal
+
+    cases = [
+        {"stdin": ["3", "4"], "output": "7"},
+        {"stdin": ["10", "-2"], "output": "8"},
+    ]
+    set_goal(None, None, cases=cases)
+    editor_manager.set_code("a = int(input('a? '))\nb = int(input('b? '))\nprint(a + b)")
+    editor_manager.run()
+    # The editor's own run gets the first case's answers instead of waiting for a person
+    await asyncio.wait_for(terminal.task, 1)
+    assert terminal.input_promise is None
+    assert terminal.get_execution_output().splitlines()[-1] == "7", terminal.get_execution_output()
+    for _ in range(50):
+        if goal_tracker.goal_completed:
+            break
+        await asyncio.sleep(0.01)
+    assert goal_tracker.goal_completed
+
+    # A plain run in the terminal still asks the person
+    await run_code(terminal, "x = input('x? ')\nprint(x)", inputs=["typed"])
+    assert terminal.get_execution_output().splitlines()[-1] == "typed"
+
+
+@app_check("rollback_forgets_only_learner_imports")
+async def rollback_forgets_only_learner_imports(browser):
+    import importlib
+    from stateSnapshot import level_snapshot, rollback
+    from terminalWorker import terminal
+
+    for name in ("colorsys", "sched", "caseGrader"):
+        sys.modules.pop(name, None)
+    level_snapshot.take()
+    await run_code(terminal, "import colorsys\nhue = colorsys.rgb_to_hsv(1, 0, 0)[0]")
+    # Imported by the app while the level is on, like check_goal's lazy import of the grader
+    case_grader = importlib.import_module("caseGrader")
+    importlib.import_module("sched")
+    rollback()
+    assert "colorsys" not in sys.modules
+    assert "hue" not in (terminal.namespace or {})
+    assert sys.modules.get("caseGrader") is case_grader, "an app module was forgotten"
+    assert "sched" in sys.modules and "tracemalloc" in sys.modules
+
+
+async def run_checks(pattern):
+    if str(TOOLS) not in sys.path:
+        sys.path.insert(0, str(TOOLS))
+    import fakebrowser
+
+    browser = fakebrowser.browser or fakebrowser.install()
+    import bootstrap
+
+    await bootstrap.boot()
+    failures = []
+    for name, check in CHECKS:
+        if pattern and pattern not in name:
+            continue
+        try:
+            await check(browser)
+        except Exception:
+            failures.append((name, traceback.format_exc()))
+            print(f"FAIL {name}", file=sys.__stdout__)
+        else:
+            print(f"ok   {name}", file=sys.__stdout__)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="only run checks whose name contains this")
+    args = parser.parse_args(argv)
+
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        failures = asyncio.run(run_checks(args.pattern))
+    finally:
+        # terminalWorker.setup() points stdout at the fake terminal
+        sys.stdout, sys.stderr = stdout, stderr
+
+    for name, details in failures:
+        print(f"\n{name}:\n{details}")
+    print(f"\n{len(failures)} failed" if failures else "\nall checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Benchmarks for the app's hot paths under CPython
+
+Boots the app on tools/fakebrowser like tools/boot_harness.py, then times single
+operations with a pytest-benchmark style table. Besides time, every benchmark records
+how many calls into the (fake) JS world one operation makes; in the browser each of
+those crosses the Pyodide FFI, so the call count is the more stable number to watch.
+
+Usage:
+    python tools/bench.py                     # run everything
+    python tools/bench.py -k terminal_write   # only benchmarks whose name contains this
+    python tools/bench.py --save-baseline     # write tools/bench_baseline.json
+    python tools/bench.py --check             # exit 1 on a time or call-count regression
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+TOOLS = Path(__file__).resolve().parent
+BASELINE_FILE = TOOLS / "bench_baseline.json"
+
+BENCHMARKS = []  # (name, factory, param)
+
+
+def benchmark(name, params=(None,)):
+    """Register factory(param) -> (setup, operation); setup runs untimed before every round"""
+    def register(factory):
+        for param in params:
+            BENCHMARKS.append((name if param is None else f"{name}[{param}]", factory, param))
+        return factory
+    return register
+
+
+class KeyEvent:
+    """keydown event as the terminal sees it"""
+
+    def __init__(self, key, ctrl=False):
+        self.key = key
+        self.ctrlKey = ctrl
+        self.metaKey = False
+        self.prevented = False
+
+    def preventDefault(self):
+        self.prevented = True
+
+
+def scrollback(lines):
+    return "\n".join(f"line {i}: some earlier output" for i in range(lines)) + "\n"
+
+
+@benchmark("terminal_write", params=(100, 1000, 10000))
+def terminal_write(lines):
+    from terminalWorker import terminal
+    text = scrollback(lines)
+
+    def setup():
+        terminal.editor.text = text
+        terminal.execution_output = []
+
+    return setup, lambda: terminal.write("Hello from the benchmark")
+
+
+@benchmark("handle_keydown", params=("a", "Backspace", "ArrowUp"))
+def handle_keydown(key):
+    from terminalWorker import terminal
+    text = scrollback(1000)
+
+    def setup():
+        terminal.editor.text = text
+        terminal.editor.navigateFileEnd()
+        terminal.history = ["print(1)"] * 20
+
+    return setup, lambda: terminal.handle_keydown(KeyEvent(key))
+
+
+@benchmark("execute_code_compile", params=(10, 200))
+def execute_code_compile(lines):
+    from terminalWorker import terminal
+    code = "\n".join(
+        f"value_{i} = input('number {i}? ')\nif int(value_{i}) > {i}:\n    print(value_{i})"
+        for i in range(lines // 3)
+    )
+    return None, lambda: terminal.compile_code(code)
+
+
+@benchmark("check_match", params=(100, 10000))
+def check_match(lines):
+    from matcher import GoalTracker
+    from terminalWorker import terminal
+    output = "\n".join(str(i) for i in range(lines))
+    code = "for i in range(%d):\n    print(i)" % lines
+    tracker = GoalTracker()
+    # A near miss, so both the comparison and the failure report run
+    tracker.set_goal(None, output + "!", must_have=["for", "range", "print"])
+
+    def setup():
+        tracker.goal_completed = False
+        terminal.editor.text = ">>> "
+
+    return setup, lambda: tracker.check_match(code, output)
+
+
+@benchmark("output_diff", params=("near_miss", "unrelated"))
+def output_diff(kind):
+    from outputDiff import diff_lines
+    expected = "\n".join(str(i) for i in range(10000))
+    if kind == "near_miss":
+        actual = expected.replace("\n5000\n", "\n5000!\n")
+    else:
+        # Nothing in common: the edit-distance cutoff has to end it
+        actual = "\n".join(f"x{i}" for i in range(10000))
+    return None, lambda: diff_lines(expected, actual)
+
+
+@benchmark("render_levels", params=(10, 100, 1000))
+def render_levels(count):
+    from lvlSystem import LevelSetup
+    levels = LevelSetup()
+    level = dict(levels.levels[0])
+    levels.levels = [dict(level, name=f"Level {i + 1}") for i in range(count)]
+    levels.categories = {f"Chapter {c + 1}": list(range(c * 10, c * 10 + 10)) for c in range(count // 10)}
+    levels.completed_levels = set(range(count // 2))
+    return None, levels.render_levels
+
+
+def run_benchmark(browser, factory, param, min_time, max_rounds):
+    """Time one operation per round until min_time has passed; returns (times in us, calls per op)"""
+    setup, operation = factory(param)
+    setup = setup or (lambda: None)
+
+    # One untimed round to warm caches and count the JS calls it makes
+    setup()
+    before = sum(browser.calls.values())
+    operation()
+    calls = sum(browser.calls.values()) - before
+
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_rounds and (time.perf_counter() - started < min_time or len(times) < 5):
+        setup()
+        browser.console.messages.clear()
+        t0 = time.perf_counter()
+        operation()
+        times.append((time.perf_counter() - t0) * 1e6)
+    return times, calls
+
+
+def run(pattern=None, min_time=0.2, max_rounds=2000):
+    sys.path.insert(0, str(TOOLS))
+    import boot_harness
+    import fakebrowser
+
+    phases, errors = boot_harness.boot_once()
+    if errors:
+        raise RuntimeError(f"boot failed: {errors}")
+    browser = fakebrowser.browser
+
+    stdout, stderr = sys.stdout, sys.stderr
+    results = {}
+    try:
+        for name, factory, param in BENCHMARKS:
+            if pattern and pattern not in name:
+                continue
+            times, calls = run_benchmark(browser, factory, param, min_time, max_rounds)
+            results[name] = {
+                "min": min(times),
+                "max": max(times),
+                "mean": statistics.fmean(times),
+                "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+                "median": statistics.median(times),
+                "rounds": len(times),
+                "calls": calls,
+            }
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    return results
+
+
+def print_table(results):
+    columns = ["min", "max", "mean", "stddev", "median"]
+    width = max([len(name) for name in results] + [16])
+    header = f"{'Name (time in us)':<{width}} " + " ".join(f"{c.title():>10}" for c in columns)
+    header += f" {'Rounds':>7} {'JS calls':>9}"
+    title = f" benchmark: {len(results)} tests "
+    print(title.center(len(header), "-"))
+    print(header)
+    print("-" * len(header))
+    for name, result in sorted(results.items(), key=lambda item: item[1]["mean"]):
+        row = f"{name:<{width}} " + " ".join(f"{result[c]:>10.2f}" for c in columns)
+        print(row + f" {result['rounds']:>7} {result['calls']:>9}")
+    print("-" * len(header))
+
+
+def check(results, baseline, tolerance, slack):
+    """Slower median than baseline * (1 + tolerance) + slack us, or more JS calls, is a regression"""
+    regressions = []
+    for name, expected in baseline.get("results", {}).items():
+        actual = results.get(name)
+        if actual is None:
+            continue
+        limit = expected["median"] * (1 + tolerance) + slack
+        if actual["median"] > limit:
+            regressions.append(f"{name}: median {actual['median']:.2f} us (baseline {expected['median']:.2f}, limit {limit:.2f})")
+        if actual["calls"] > expected["calls"]:
+            regressions.append(f"{name}: {actual['calls']} JS calls per op (baseline {expected['calls']})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per benchmark (default 0.2)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write the results to {BASELINE_FILE.name}")
+    parser.add_argument("--check", action="store_true", help="fail if a benchmark got slower than the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed relative slowdown (default 1.0 = 2x)")
+    parser.add_argument("--slack", type=float, default=20.0, help="allowed absolute slowdown in us (default 20)")
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.min_time)
+    print_table(results)
+
+    if args.save_baseline:
+        baseline = {"python": sys.version.split()[0], "results": {
+            name: {"median": round(result["median"], 3), "calls": result["calls"]}
+            for name, result in results.items()
+        }}
+        if args.pattern and BASELINE_FILE.exists():
+            # Keep the entries of benchmarks that did not run
+            previous = json.loads(BASELINE_FILE.read_text())
+            baseline["results"] = {**previous.get("results", {}), **baseline["results"]}
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nbaseline saved to {BASELINE_FILE}")
+
+    if args.check:
+        if not BASELINE_FILE.exists():
+            print("\nno baseline yet, run with --save-baseline first")
+            return 1
+        regressions = check(results, json.loads(BASELINE_FILE.read_text()), args.tolerance, args.slack)
+        if regressions:
+            print("\nbenchmark regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nno benchmark regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Replay App/bootstrap.py under CPython and time every startup phase
+
+The `pyscript`/`js` modules are replaced by tools/fakebrowser, so what gets measured is
+the Python side of startup: each module's import and setup(), Ace init and readiness.
+
+    cold  - a fresh interpreter per run with an empty bytecode cache (first page load)
+    warm  - boot() again in the same interpreter, modules already imported (reload
+            with everything cached)
+
+Usage:
+    python tools/boot_harness.py                    # 5 cold + 5 warm runs, median table
+    python tools/boot_harness.py --save-baseline    # write tools/boot_baseline.json
+    python tools/boot_harness.py --check            # exit 1 if a phase regressed
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+TOOLS = Path(__file__).resolve().parent
+BASELINE_FILE = TOOLS / "boot_baseline.json"
+
+
+def boot_once(fresh=True):
+    """Run one boot and return (phases, errors); fresh=False re-runs it in this process"""
+    if str(TOOLS) not in sys.path:
+        sys.path.insert(0, str(TOOLS))
+    import fakebrowser
+
+    if fakebrowser.browser is None:
+        fakebrowser.install()
+    browser = fakebrowser.browser
+
+    if not fresh:
+        browser.reset()
+    from startupTiming import startup
+    from readiness import ready
+    from proxyRegistry import proxy_registry
+    import bootstrap
+
+    startup.phases.clear()
+    ready.events.clear()
+    for scope in list(proxy_registry.scopes):
+        proxy_registry.release(scope)
+
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        asyncio.run(bootstrap.boot())
+    finally:
+        # terminalWorker.setup() points stdout at the fake terminal
+        sys.stdout, sys.stderr = stdout, stderr
+
+    errors = [text for level, text in browser.console.messages if level == "error"]
+    missing = [name for name in ("title", "windows", "terminal", "goals", "levels", "app") if not ready.is_set(name)]
+    if missing:
+        errors.append(f"not ready: {', '.join(missing)}")
+    return list(startup.phases), errors
+
+
+def cold_run():
+    """One boot in a child interpreter with its own empty __pycache__ directory"""
+    with tempfile.TemporaryDirectory() as cache:
+        result = subprocess.run(
+            [sys.executable, "-X", f"pycache_prefix={cache}", __file__, "--child"],
+            capture_output=True, text=True, check=False,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"cold boot failed:\n{result.stderr}")
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data["phases"], data["errors"]
+
+
+def summarize(runs):
+    """Median duration of timed phases and median time of marks (from pyodide_ready), per phase"""
+    samples = {}
+    for phases in runs:
+        origin = next((p["start"] for p in phases if p["name"] == "pyodide_ready"), 0)
+        for phase in phases:
+            if phase["duration"]:
+                samples.setdefault((phase["name"], "duration"), []).append(phase["duration"])
+            else:
+                samples.setdefault((phase["name"], "at"), []).append(phase["start"] - origin)
+    return {f"{name}|{kind}": round(statistics.median(values), 3) for (name, kind), values in samples.items()}
+
+
+def measure(cold_runs, warm_runs):
+    results = {}
+    errors = []
+
+    if cold_runs:
+        runs = []
+        for _ in range(cold_runs):
+            phases, run_errors = cold_run()
+            runs.append(phases)
+            errors.extend(run_errors)
+        results["cold"] = summarize(runs)
+
+    if warm_runs:
+        # The first in-process boot pays the imports, the following ones are warm
+        boot_once(fresh=True)
+        runs = []
+        for _ in range(warm_runs):
+            phases, run_errors = boot_once(fresh=False)
+            runs.append(phases)
+            errors.extend(run_errors)
+        results["warm"] = summarize(runs)
+
+    return results, sorted(set(errors))
+
+
+def print_table(results):
+    for mode, summary in results.items():
+        print(f"\n{mode} boot (median)")
+        print(f"  {'phase':<34} {'took (ms)':>10} {'at (ms)':>10}")
+        for key, value in summary.items():
+            name, kind = key.split("|")
+            took, at = (f"{value:.2f}", "") if kind == "duration" else ("", f"{value:.2f}")
+            print(f"  {name:<34} {took:>10} {at:>10}")
+        interactive = summary.get("ready:app|at")
+        if interactive is not None:
+            print(f"  {'-> interactive after':<34} {interactive:>10.2f}")
+
+
+def check(results, baseline, tolerance, slack):
+    """Phases slower than baseline * (1 + tolerance) + slack ms count as regressions"""
+    regressions = []
+    for mode, summary in baseline.get("results", {}).items():
+        for key, expected in summary.items():
+            actual = results.get(mode, {}).get(key)
+            if actual is None:
+                continue
+            limit = expected * (1 + tolerance) + slack
+            if actual > limit:
+                regressions.append(f"{mode} {key.replace('|', ' ')}: {actual:.2f} ms (baseline {expected:.2f}, limit {limit:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cold", type=int, default=5, help="number of cold boots")
+    parser.add_argument("--warm", type=int, default=5, help="number of warm boots")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write the medians to {BASELINE_FILE.name}")
+    parser.add_argument("--check", action="store_true", help="fail if a phase is slower than the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown (default 0.5 = +50%%)")
+    parser.add_argument("--slack", type=float, default=2.0, help="allowed absolute slowdown in ms (default 2)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        phases, errors = boot_once()
+        print(json.dumps({"phases": phases, "errors": errors}))
+        return 0
+
+    results, errors = measure(args.cold, args.warm)
+    print_table(results)
+
+    if errors:
+        print("\nboot errors:")
+        for error in errors:
+            print(f"  {error.splitlines()[0]}")
+        return 1
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2) + "\n")
+        print(f"\nbaseline saved to {BASELINE_FILE}")
+
+    if args.check:
+        if not BASELINE_FILE.exists():
+            print("\nno baseline yet, run with --save-baseline first")
+            return 1
+        regressions = check(results, json.loads(BASELINE_FILE.read_text()), args.tolerance, args.slack)
+        if regressions:
+            print("\nstartup regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nno startup regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
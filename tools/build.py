@@ -0,0 +1,336 @@
+"""
+Build a deployable copy of the app into dist/
+
+    - app.<hash>.js   dialogue, typewriter, text handler and Ace loader, minified into one file
+    - ace.<hash>.js   the Ace subset (core, python mode, language tools, terminal theme)
+    - style.<hash>.css
+    - app.<hash>.zip  every Python module from pyscript.json; PyScript unpacks it in one go
+    - bootstrap.<hash>.py, textData.<hash>.json
+    - .gz (and .br when the `brotli` package is installed) next to every text file
+    - index.html, pyscript.json, sw.js and a precache manifest for the new file names
+
+Hashed files live in dist/assets/ and can be cached forever; see `tools/serve.py --dist`.
+Prints a size report comparing the transfer with the unbundled HTML/ layout.
+
+The experimental snapshot boot (App/snapshotBoot.js, HTML/snapshot/) is left out unless
+--snapshot-boot is given; it has not been run end to end yet.
+
+Usage:
+    python tools/build.py
+    python tools/build.py --out /tmp/dist
+    python tools/build.py --snapshot-boot     # also ship the snapshot boot, switched on
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import re
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+from build_dialogue import DIALOGUE_FILE
+from build_snapshot import SNAPSHOT_DIR
+from build_sw_manifest import CONFIG_FILE, HTML_DIR, HTML_FILE, MANIFEST_FILE, VENDOR_DIR, make_manifest, render
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "App"
+ACE_DIR = APP_DIR / "aceEditorLib"
+BOOTSTRAP_FILE = APP_DIR / "bootstrap.py"
+
+# Order matters: textHandler.js uses the classes defined by the first two
+APP_SCRIPTS = [
+    APP_DIR / "textHandler" / "dialogueRepository.js",
+    APP_DIR / "textHandler" / "typewriterRenderer.js",
+    APP_DIR / "textHandler" / "textHandler.js",
+    APP_DIR / "CodingHandlerAndItsApp" / "aceLoader.js",
+]
+ACE_SCRIPTS = [ACE_DIR / name for name in ("ace.js", "mode-python.js", "ext-language_tools.js", "theme-terminal.js")]
+
+DIALOGUE_URL = "../App/textHandler/textData.json"  # DialogueRepository's default, relative to HTML/
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".json", ".py", ".wasm", ".svg", ".txt"}
+
+IDENTIFIER = re.compile(r'[\w$]')
+REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+
+
+def minify_js(source):
+    """Drop comments, indentation and redundant spaces; line breaks stay so ASI is unaffected"""
+    out = []
+    i, n = 0, len(source)
+    last = ""        # last significant character written
+    last_word = ""   # last identifier/keyword written
+    pending_space = False
+
+    def emit(text):
+        nonlocal last, pending_space
+        if pending_space and out and out[-1] != "\n":
+            before, after = out[-1][-1], text[0]
+            if (IDENTIFIER.match(before) and IDENTIFIER.match(after)) or (before in "+-" and after in "+-"):
+                out.append(" ")
+        pending_space = False
+        out.append(text)
+        last = text[-1]
+
+    while i < n:
+        c = source[i]
+
+        if c in "'\"`":
+            j = i + 1
+            while j < n and source[j] != c:
+                j += 2 if source[j] == "\\" else 1
+            emit(source[i:j + 1])
+            last_word = ""
+            i = j + 1
+        elif source.startswith("//", i):
+            i = source.find("\n", i)
+            i = n if i == -1 else i
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            pending_space = True
+        elif c == "/" and (last == "" or last in REGEX_AFTER or last_word in REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < n and (source[j] != "/" or in_class):
+                if source[j] == "\\":
+                    j += 1
+                elif source[j] == "[":
+                    in_class = True
+                elif source[j] == "]":
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and IDENTIFIER.match(source[j]):  # flags
+                j += 1
+            emit(source[i:j])
+            last_word = ""
+            i = j
+        elif c == "\n":
+            if out and out[-1] != "\n":
+                out.append("\n")
+            pending_space = False
+            i += 1
+        elif c.isspace():
+            pending_space = True
+            i += 1
+        elif IDENTIFIER.match(c):
+            j = i
+            while j < n and IDENTIFIER.match(source[j]):
+                j += 1
+            last_word = source[i:j]
+            emit(last_word)
+            i = j
+        else:
+            emit(c)
+            last_word = ""
+            i += 1
+
+    return "".join(out).strip() + "\n"
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.DOTALL)
+    source = re.sub(r'\s+', ' ', source)
+    # Not around ':' (descendant pseudo-classes) or '+'/'-' (calc)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip() + "\n"
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+class Build:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.assets = out_dir / "assets"
+        self.written = []
+
+    def write(self, relative, data):
+        path = self.out_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.written.append(path)
+        return path
+
+    def asset(self, stem, suffix, data):
+        """Write dist/assets/<stem>.<hash><suffix> and return its URL relative to index.html"""
+        name = f"{stem}.{content_hash(data)}{suffix}"
+        self.write(Path("assets") / name, data)
+        return f"./assets/{name}"
+
+
+def read(path):
+    return path.read_text(encoding="utf-8")
+
+
+def bundle_app_js():
+    parts = []
+    for path in APP_SCRIPTS:
+        source = read(path)
+        if path.name == "dialogueRepository.js":
+            if source.count(f'"{DIALOGUE_URL}"') != 1:
+                raise SystemExit(f"error: {path.name} no longer points at {DIALOGUE_URL}")
+            source = source.replace(f'"{DIALOGUE_URL}"', '"__DIALOGUE_URL__"')
+        parts.append(f"// {path.relative_to(ROOT).as_posix()}\n{source}")
+    return minify_js("\n".join(parts))
+
+
+def python_archive():
+    """Zip of the modules listed in pyscript.json, under their flat names"""
+    config = json.loads(read(CONFIG_FILE))
+    buffer = {}
+    for source, target in config["files"].items():
+        buffer[Path(target).name] = (CONFIG_FILE.parent / source).resolve().read_bytes()
+
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        for name in sorted(buffer):
+            # Fixed timestamps keep the hash stable between builds
+            info = zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, buffer[name])
+    return data.getvalue()
+
+
+def replace_once(page, old, new):
+    if page.count(old) != 1:
+        raise SystemExit(f"error: expected exactly one {old!r} in {HTML_FILE.name}")
+    return page.replace(old, new)
+
+
+def remove_line(page, tag):
+    replace_once(page, tag, tag)
+    return re.sub(r'\n[ \t]*' + re.escape(tag), "", page, count=1)
+
+
+def rewrite_page(page, urls):
+    page = replace_once(page, '<link rel="stylesheet" href="style.css">', f'<link rel="stylesheet" href="{urls["css"]}">')
+
+    # The four app scripts become one; the first tag is replaced, the rest removed
+    tags = [f'<script src="../{path.relative_to(ROOT).as_posix()}"></script>' for path in APP_SCRIPTS]
+    bundle_tag = f'<script src="{urls["app"]}" data-ace-bundle="{urls["ace"]}"></script>'
+    page = replace_once(page, tags[0], bundle_tag)
+    for tag in tags[1:]:
+        page = remove_line(page, tag)
+
+    page = replace_once(page, 'src="../App/bootstrap.py"', f'src="{urls["bootstrap"]}"')
+    if "snapshot_boot" in urls:
+        page = replace_once(page, 'const SNAPSHOT_BOOT = false;', 'const SNAPSHOT_BOOT = true;')
+        page = replace_once(page, 'import("../App/snapshotBoot.js")', f'import("{urls["snapshot_boot"]}")')
+    return page
+
+
+def compress(build):
+    for path in list(build.written):
+        if path.suffix not in COMPRESSIBLE:
+            continue
+        data = path.read_bytes()
+        variants = [(".gz", gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+        for suffix, packed in variants:
+            if len(packed) < len(data):
+                path.with_name(path.name + suffix).write_bytes(packed)
+
+
+def best_size(path):
+    sizes = [path.stat().st_size]
+    for suffix in (".br", ".gz"):
+        variant = path.with_name(path.name + suffix)
+        if variant.exists():
+            sizes.append(variant.stat().st_size)
+    return min(sizes)
+
+
+def variant_size(path, suffix):
+    variant = path.with_name(path.name + suffix)
+    return variant.stat().st_size if variant.exists() else None
+
+
+def size_report(build, page_files):
+    def kib(size):
+        return "-" if size is None else f"{size / 1024:8.1f}"
+
+    print(f"\n{'file':<40} {'raw KiB':>9} {'gzip':>9} {'brotli':>9}")
+    for path in sorted(build.written):
+        if path.suffix in (".gz", ".br"):
+            continue
+        print(f"{path.relative_to(build.out_dir).as_posix():<40} {kib(path.stat().st_size):>9} "
+              f"{kib(variant_size(path, '.gz')):>9} {kib(variant_size(path, '.br')):>9}")
+
+    # What a cold load fetches (Pyodide, fonts and the image are the same in both)
+    dev_files = [HTML_FILE, HTML_DIR / "style.css", CONFIG_FILE, BOOTSTRAP_FILE] + APP_SCRIPTS + ACE_SCRIPTS
+    config = json.loads(read(CONFIG_FILE))
+    dev_files += [(CONFIG_FILE.parent / source).resolve() for source in config["files"]]
+    dev_total = sum(path.stat().st_size for path in dev_files)
+    dist_total = sum(best_size(path) for path in page_files)
+
+    print(f"\ncold load, HTML/ layout: {len(dev_files):3} requests, {dev_total / 1024:8.1f} KiB (uncompressed)")
+    print(f"cold load, dist/:        {len(page_files):3} requests, {dist_total / 1024:8.1f} KiB "
+          f"({'brotli' if brotli else 'gzip'}), {100 * (1 - dist_total / dev_total):.0f}% less")
+    print("repeat load, dist/: only index.html, pyscript.json and sw.js are revalidated, assets are immutable")
+    if brotli is None:
+        print("(pip install brotli for .br files)")
+
+
+def build(out_dir, snapshot_boot=False):
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    result = Build(out_dir)
+
+    dialogue = DIALOGUE_FILE.read_bytes()
+    urls = {"dialogue": result.asset("textData", ".json", dialogue)}
+    urls["ace"] = result.asset("ace", ".js", ";\n".join(read(path) for path in ACE_SCRIPTS).encode("utf-8"))
+    app_js = bundle_app_js().replace("__DIALOGUE_URL__", urls["dialogue"])
+    urls["app"] = result.asset("app", ".js", app_js.encode("utf-8"))
+    urls["css"] = result.asset("style", ".css", minify_css(read(HTML_DIR / "style.css")).encode("utf-8"))
+    urls["bootstrap"] = result.asset("bootstrap", ".py", BOOTSTRAP_FILE.read_bytes())
+    urls["python"] = result.asset("app", ".zip", python_archive())
+    if snapshot_boot:
+        urls["snapshot_boot"] = result.asset("snapshotBoot", ".js", minify_js(read(APP_DIR / "snapshotBoot.js")).encode("utf-8"))
+
+    config = {"files": {urls["python"]: "./*"}}
+    result.write("pyscript.json", (json.dumps(config, indent=4) + "\n").encode("utf-8"))
+    result.write("index.html", rewrite_page(read(HTML_FILE), urls).encode("utf-8"))
+
+    for folder in (VENDOR_DIR, SNAPSHOT_DIR) if snapshot_boot else (VENDOR_DIR,):
+        if folder.is_dir():
+            shutil.copytree(folder, out_dir / folder.name)
+            result.written += [path for path in (out_dir / folder.name).rglob("*") if path.is_file()]
+
+    precached = [path for path in result.written if path.name != "vendor.json"]
+    manifest = make_manifest(precached, out_dir, out_dir / "vendor" / "vendor.json")
+    result.write(MANIFEST_FILE.name, render(manifest).encode("utf-8"))
+    result.write("sw.js", (HTML_DIR / "sw.js").read_bytes())
+
+    compress(result)
+
+    page_files = [out_dir / "index.html", out_dir / "pyscript.json"] + [
+        out_dir / urls[key][2:] for key in ("css", "app", "ace", "bootstrap", "python")
+    ]
+    size_report(result, page_files)
+    print(f"\nbuilt {out_dir}, try it with: python tools/serve.py --dist")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=ROOT / "dist", help="output folder (default: dist/)")
+    parser.add_argument("--snapshot-boot", action="store_true", help="ship the experimental snapshot boot, switched on")
+    args = parser.parse_args(argv)
+    return build(args.out.resolve(), args.snapshot_boot)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
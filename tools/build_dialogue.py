@@ -0,0 +1,256 @@
+"""
+Validate textData.json and embed a precompiled copy into index.html
+
+The compiled dialogue goes into the <script id="dialogueData"> placeholder, so the
+first tutorial line can be shown without fetching textData.json.
+
+Usage:
+    python tools/build_dialogue.py           # validate and embed
+    python tools/build_dialogue.py --check   # validate and fail if the embedded copy is stale
+"""
+import argparse
+import ast
+import hashlib
+import html
+import json
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DIALOGUE_FILE = ROOT / "App" / "textHandler" / "textData.json"
+HTML_FILE = ROOT / "HTML" / "index.html"
+LEVELS_FILE = ROOT / "App" / "lvlSystem.py"
+
+FORMAT = "pythology-dialogue/1"
+
+# Action types understood by TextHandler.executeAction, and whether they need a selector
+ACTION_TYPES = {
+    "waitForButton": True,
+    "showAndWaitForButton": True,
+    "waitForInput": True,
+    "delay": False,
+    "autoNext": False,
+    "highlight": True,
+    "showElement": True,
+}
+
+PLACEHOLDER = re.compile(
+    r'(<script id="dialogueData" type="application/json">)(.*?)(</script>)',
+    re.DOTALL,
+)
+
+
+def tokenize(text):
+    """Split text into alternating [text, tag, ..., text] parts, same as DialogueRepository.tokenize"""
+    parts = []
+    text_start = 0
+    i = text.find('<')
+
+    while i != -1:
+        close = text.find('>', i)
+        if close == -1:
+            break
+        parts.append(html.unescape(text[text_start:i]))
+        parts.append(text[i:close + 1])
+        text_start = close + 1
+        i = text.find('<', text_start)
+
+    parts.append(html.unescape(text[text_start:]))
+    return parts
+
+
+class SelectorIndex(HTMLParser):
+    """Collects ids, classes and tag names present in a page"""
+
+    def __init__(self):
+        super().__init__()
+        self.ids = set()
+        self.classes = set()
+        self.tags = set()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        for name, value in attrs:
+            if name == "id" and value:
+                self.ids.add(value)
+            elif name == "class" and value:
+                self.classes.update(value.split())
+
+    def matches(self, selector):
+        """True/False for simple selectors (tag, #id, .class, combined), None if too complex to check"""
+        match = re.fullmatch(r'([a-zA-Z][\w-]*)?((?:[#.][\w-]+)*)', selector.strip())
+        if not match:
+            return None
+
+        tag, rest = match.groups()
+        if tag and tag.lower() not in self.tags:
+            return False
+        for kind, name in re.findall(r'([#.])([\w-]+)', rest):
+            if kind == '#' and name not in self.ids:
+                return False
+            if kind == '.' and name not in self.classes:
+                return False
+        return True
+
+
+def level_dialogue_keys(levels_file=LEVELS_FILE):
+    """Dialogue keys referenced by LevelSetup.levels ("tutorial" and "completion")"""
+    tree = ast.parse(levels_file.read_text(encoding="utf-8"))
+    keys = []
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Attribute) and target.attr == "levels":
+                for level in ast.literal_eval(node.value):
+                    for field in ("tutorial", "completion"):
+                        if level.get(field):
+                            keys.append((level.get("name", "?"), field, level[field]))
+    return keys
+
+
+def load_dialogue(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def validate(data, selectors, source_name, errors, warnings):
+    """Check structure, action types and selectors of one dialogue file"""
+    for key, entries in data.items():
+        if key == "$chapters":
+            continue
+        if not isinstance(entries, list):
+            errors.append(f"{source_name}: '{key}' must be a list of texts")
+            continue
+
+        for n, entry in enumerate(entries, 1):
+            where = f"{source_name}: {key}[{n}]"
+            if not isinstance(entry, dict) or not isinstance(entry.get("text"), str):
+                errors.append(f"{where}: every entry needs a 'text' string")
+                continue
+
+            action = entry.get("action")
+            if action is None:
+                continue
+
+            for item in action if isinstance(action, list) else [action]:
+                action_type = item.get("type")
+                if action_type not in ACTION_TYPES:
+                    errors.append(f"{where}: unknown action type '{action_type}'")
+                    continue
+
+                if not ACTION_TYPES[action_type]:
+                    continue
+                selector = item.get("selector")
+                if not selector:
+                    errors.append(f"{where}: '{action_type}' needs a selector")
+                    continue
+
+                found = selectors.matches(selector)
+                if found is False:
+                    errors.append(f"{where}: selector '{selector}' matches nothing in {HTML_FILE.name}")
+                elif found is None:
+                    warnings.append(f"{where}: selector '{selector}' is too complex to verify")
+
+
+def compile_dialogue(data, source_text):
+    """Compact, pre-tokenized form read by DialogueRepository.loadInline"""
+    sequences = {}
+    for key, entries in data.items():
+        if key == "$chapters":
+            continue
+        compiled = []
+        for entry in entries:
+            item = [tokenize(entry["text"])]
+            if entry.get("action") is not None:
+                item.append(entry["action"])
+            compiled.append(item)
+        sequences[key] = compiled
+
+    result = {
+        "format": FORMAT,
+        "source": hashlib.sha1(source_text.encode("utf-8")).hexdigest()[:12],
+        "sequences": sequences,
+    }
+    if "$chapters" in data:
+        result["chapters"] = data["$chapters"]
+    return result
+
+
+def to_inline_json(compiled):
+    # "</" would end the <script> element early
+    return json.dumps(compiled, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def build(dialogue_file=DIALOGUE_FILE, html_file=HTML_FILE, check=False):
+    errors = []
+    warnings = []
+
+    page = html_file.read_text(encoding="utf-8")
+    selectors = SelectorIndex()
+    selectors.feed(page)
+
+    source_text = dialogue_file.read_text(encoding="utf-8")
+    data = json.loads(source_text)
+    validate(data, selectors, dialogue_file.name, errors, warnings)
+
+    # Chapter files are validated too, they stay separate and load lazily
+    available = {key for key in data if key != "$chapters"}
+    for chapter_file, chapter_keys in data.get("$chapters", {}).items():
+        chapter_path = dialogue_file.parent / chapter_file
+        if not chapter_path.exists():
+            errors.append(f"chapter file '{chapter_file}' does not exist")
+            continue
+        chapter = load_dialogue(chapter_path)
+        validate(chapter, selectors, chapter_file, errors, warnings)
+        for key in chapter_keys:
+            if key not in chapter:
+                errors.append(f"chapter file '{chapter_file}' has no '{key}' sequence")
+        available.update(chapter_keys)
+
+    for level_name, field, key in level_dialogue_keys():
+        if key not in available:
+            errors.append(f"{level_name}: {field} dialogue '{key}' is not defined")
+
+    for warning in warnings:
+        print(f"warning: {warning}")
+    if errors:
+        for error in errors:
+            print(f"error: {error}")
+        return 1
+
+    match = PLACEHOLDER.search(page)
+    if not match:
+        print(f"error: no <script id=\"dialogueData\"> placeholder in {html_file}")
+        return 1
+
+    inline = to_inline_json(compile_dialogue(data, source_text))
+
+    if check:
+        if match.group(2) != inline:
+            print(f"error: embedded dialogue in {html_file.name} is stale, run tools/build_dialogue.py")
+            return 1
+        print("dialogue OK, embedded copy is up to date")
+        return 0
+
+    if match.group(2) != inline:
+        page = page[:match.start(2)] + inline + page[match.end(2):]
+        html_file.write_text(page, encoding="utf-8")
+    print(f"embedded {len(inline)} bytes of dialogue ({len(data) - ('$chapters' in data)} sequences) into {html_file.name}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="validate only, fail if the embedded copy is stale")
+    parser.add_argument("--source", type=Path, default=DIALOGUE_FILE, help="dialogue JSON file")
+    parser.add_argument("--html", type=Path, default=HTML_FILE, help="page with the dialogueData placeholder")
+    args = parser.parse_args(argv)
+    return build(args.source, args.html, args.check)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Build a Pyodide memory snapshot with every app module already imported
+
+The snapshot is made by tools/snapshot/make_snapshot.mjs under Node with the same Pyodide
+version the page uses, and written to HTML/snapshot/ (app.snapshot + snapshot.json).
+App/snapshotBoot.js restores it with ?boot=snapshot (or localStorage pythology_boot=snapshot)
+and falls back to the normal PyScript boot when the Pyodide version or the Python sources
+no longer match.
+
+Experimental: no snapshot has been built and booted end to end yet, so the page ignores
+?boot=snapshot unless SNAPSHOT_BOOT is switched on in HTML/index.html (or the build is made
+with `tools/build.py --snapshot-boot`). Record a boot under tools/boot before turning it on.
+
+Modules must not touch JS while importing, a snapshot can't hold JS references.
+--check-imports verifies that under CPython with a `pyscript`/`js` that fail on any use.
+
+Usage:
+    python tools/build_snapshot.py --pyodide 0.29.0     # needs node and `npm install pyodide@0.29.0` in tools/snapshot
+    python tools/build_snapshot.py --check-imports
+"""
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "App"
+CONFIG_FILE = ROOT / "HTML" / "pyscript.json"
+SNAPSHOT_DIR = ROOT / "HTML" / "snapshot"
+VENDOR_MAP_FILE = ROOT / "HTML" / "vendor" / "vendor.json"
+MAKER = Path(__file__).resolve().parent / "snapshot" / "make_snapshot.mjs"
+
+FORMAT = "pythology-snapshot/1"
+BOOTSTRAP_FILE = APP_DIR / "bootstrap.py"
+SHIM_FILE = APP_DIR / "pyscriptShim.py"
+
+
+def snapshot_sources(config_file=CONFIG_FILE):
+    """Python files baked into the snapshot, flat module file name -> path"""
+    config = json.loads(config_file.read_text(encoding="utf-8"))
+    sources = {BOOTSTRAP_FILE.name: BOOTSTRAP_FILE, SHIM_FILE.name: SHIM_FILE}
+    for source, target in config.get("files", {}).items():
+        sources[Path(target).name] = (config_file.parent / source).resolve()
+    return sources
+
+
+def python_hash(sources=None):
+    """One hash over all snapshot sources; stored in the snapshot and in the precache manifest"""
+    sources = sources or snapshot_sources()
+    digest = hashlib.sha1()
+    for name in sorted(sources):
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(sources[name].read_bytes())
+    return digest.hexdigest()[:12]
+
+
+class Forbidden:
+    """Raises on any use, standing in for window/document/js during the import check"""
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, key):
+        raise RuntimeError(f"{self._name}.{key} used at import time")
+
+    def __setattr__(self, key, value):
+        raise RuntimeError(f"{self._name}.{key} set at import time")
+
+    def __call__(self, *args, **kwargs):
+        raise RuntimeError(f"{self._name}() called at import time")
+
+
+def check_imports():
+    """Import every module the way the snapshot does and fail if one touches JS"""
+    pyscript = types.ModuleType("pyscript")
+    pyscript.window = Forbidden("window")
+    pyscript.document = Forbidden("document")
+    js = types.ModuleType("js")
+
+    def js_getattr(name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        # `from js import x` would already hold a JS reference
+        raise RuntimeError(f"js.{name} imported at import time")
+
+    js.__getattr__ = js_getattr
+    ffi = types.ModuleType("pyodide.ffi")
+    ffi.create_proxy = ffi.create_once_callable = Forbidden("create_proxy")
+    ffi.to_js = Forbidden("to_js")
+    pyodide = types.ModuleType("pyodide")
+    pyodide.ffi = ffi
+    sys.modules.update({"pyscript": pyscript, "js": js, "pyodide": pyodide, "pyodide.ffi": ffi})
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, path in snapshot_sources().items():
+            shutil.copy(path, Path(folder) / name)
+        sys.path.insert(0, folder)
+        try:
+            import bootstrap
+            bootstrap.preload()
+        except Exception as e:
+            print(f"error: {type(e).__name__}: {e}")
+            return 1
+        finally:
+            sys.path.remove(folder)
+
+    print("imports OK, no module touches JS while importing")
+    return 0
+
+
+def detect_pyodide_version():
+    """Pyodide version from HTML/vendor/vendor.json (tools/vendor_runtime.py), if vendored"""
+    if not VENDOR_MAP_FILE.exists():
+        return None
+    for prefix in json.loads(VENDOR_MAP_FILE.read_text(encoding="utf-8")):
+        match = re.search(r'/pyodide/v([^/]+)/full/', prefix)
+        if match:
+            return match.group(1)
+    return None
+
+
+def build(pyodide_version):
+    if shutil.which("node") is None:
+        print("error: node is needed to run Pyodide for the snapshot")
+        return 1
+
+    sources = snapshot_sources()
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "format": FORMAT,
+        "pyodide": pyodide_version,
+        "python": python_hash(sources),
+        "modules": sorted(sources),
+        "snapshot": "app.snapshot",
+    }
+    job = {
+        "pyodide": pyodide_version,
+        "sources": {name: str(path) for name, path in sources.items()},
+        "output": str(SNAPSHOT_DIR / meta["snapshot"]),
+    }
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(job, f)
+    result = subprocess.run(["node", str(MAKER), f.name], cwd=MAKER.parent, check=False)
+    Path(f.name).unlink()
+    if result.returncode != 0:
+        return result.returncode
+
+    (SNAPSHOT_DIR / "snapshot.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    size = (SNAPSHOT_DIR / meta["snapshot"]).stat().st_size
+    print(f"snapshot for Pyodide {pyodide_version}, sources {meta['python']}: {size / 1024 / 1024:.1f} MiB")
+    print("run tools/build_sw_manifest.py so the service worker precaches it")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pyodide", help="Pyodide version the page loads (default: from HTML/vendor/vendor.json)")
+    parser.add_argument("--check-imports", action="store_true", help="only check that imports don't touch JS")
+    args = parser.parse_args(argv)
+
+    if args.check_imports:
+        return check_imports()
+
+    version = args.pyodide or detect_pyodide_version()
+    if not version:
+        print("error: pass --pyodide VERSION (the one PyScript loads), or run tools/vendor_runtime.py first")
+        return 1
+    return build(version)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Generate HTML/precache-manifest.js, the list of files the service worker precaches
+
+Every file gets a content hash and the manifest gets a version derived from all of them,
+so a changed file means a new cache and nothing stale is served after a deploy.
+The app shell is collected from index.html, pyscript.json, the dialogue files and
+HTML/vendor/ (see tools/vendor_runtime.py).
+
+Usage:
+    python tools/build_sw_manifest.py           # write the manifest
+    python tools/build_sw_manifest.py --check   # fail if the manifest is stale
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+from build_dialogue import DIALOGUE_FILE, load_dialogue
+from build_snapshot import SNAPSHOT_DIR, python_hash
+
+ROOT = Path(__file__).resolve().parent.parent
+HTML_DIR = ROOT / "HTML"
+HTML_FILE = HTML_DIR / "index.html"
+CONFIG_FILE = HTML_DIR / "pyscript.json"
+VENDOR_DIR = HTML_DIR / "vendor"
+VENDOR_MAP_FILE = VENDOR_DIR / "vendor.json"
+MANIFEST_FILE = HTML_DIR / "precache-manifest.js"
+
+# Files the page uses but does not reference directly: aceLoader.js loads the Ace bundle on demand,
+# snapshotBoot.js is imported only in snapshot boot mode
+EXTRA_FILES = [HTML_DIR / "style.css", CONFIG_FILE, ROOT / "App" / "snapshotBoot.js"]
+EXTRA_FILES += sorted((ROOT / "App" / "aceEditorLib").glob("*.js"))
+
+
+class LocalAssets(HTMLParser):
+    """Local script/stylesheet/image/config paths referenced by a page"""
+
+    def __init__(self):
+        super().__init__()
+        self.paths = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for name in ("src", "href", "config"):
+            value = attrs.get(name)
+            if not value or "://" in value or value.startswith(("#", "data:", "mailto:")):
+                continue
+            if tag == "link" and attrs.get("rel") not in ("stylesheet", "icon", "manifest"):
+                continue
+            self.paths.append(value)
+
+
+def page_assets(html_file=HTML_FILE):
+    parser = LocalAssets()
+    parser.feed(html_file.read_text(encoding="utf-8"))
+    return [(html_file.parent / path).resolve() for path in parser.paths]
+
+
+def python_files(config_file=CONFIG_FILE):
+    config = json.loads(config_file.read_text(encoding="utf-8"))
+    return [(config_file.parent / path).resolve() for path in config.get("files", {})]
+
+
+def dialogue_files(dialogue_file=DIALOGUE_FILE):
+    files = [dialogue_file]
+    for chapter_file in load_dialogue(dialogue_file).get("$chapters", {}):
+        files.append((dialogue_file.parent / chapter_file).resolve())
+    return files
+
+
+def vendor_files(vendor_dir=VENDOR_DIR):
+    if not vendor_dir.is_dir():
+        return []
+    return sorted(path for path in vendor_dir.rglob("*") if path.is_file() and path != VENDOR_MAP_FILE)
+
+
+def snapshot_files(snapshot_dir=SNAPSHOT_DIR):
+    if not snapshot_dir.is_dir():
+        return []
+    return sorted(path for path in snapshot_dir.iterdir() if path.is_file())
+
+
+def collect():
+    files = [HTML_FILE] + EXTRA_FILES + page_assets() + python_files() + dialogue_files()
+    files += vendor_files() + snapshot_files()
+    missing = [path for path in files if not path.exists()]
+    # Keep the first occurrence of every file, in a stable order
+    unique = list(dict.fromkeys(path for path in files if path.exists()))
+    return unique, missing
+
+
+def file_hash(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()[:12]
+
+
+def url_for(path, base_dir=HTML_DIR):
+    """URL relative to the folder sw.js is served from"""
+    relative = Path(os.path.relpath(path, base_dir)).as_posix()
+    return relative if relative.startswith("../") else f"./{relative}"
+
+
+def make_manifest(files, base_dir=HTML_DIR, vendor_map_file=VENDOR_MAP_FILE):
+    entries = [{"url": url_for(path, base_dir), "hash": file_hash(path)} for path in files]
+    version = hashlib.sha1(json.dumps(entries, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    # Lets snapshotBoot.js tell whether the snapshot matches the current Python sources
+    manifest = {"version": version, "python": python_hash(), "files": entries}
+    if vendor_map_file.exists():
+        manifest["vendor"] = json.loads(vendor_map_file.read_text(encoding="utf-8"))
+    return manifest
+
+
+def build_manifest():
+    files, missing = collect()
+    return make_manifest(files), missing
+
+
+def render(manifest):
+    return (
+        "// Generated by tools/build_sw_manifest.py, do not edit\n"
+        f"self.__pythology_precache = {json.dumps(manifest, indent=2)};\n"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="fail if the manifest is out of date")
+    args = parser.parse_args(argv)
+
+    manifest, missing = build_manifest()
+    for path in missing:
+        print(f"error: {path.relative_to(ROOT)} is referenced but does not exist")
+    if missing:
+        return 1
+
+    text = render(manifest)
+    current = MANIFEST_FILE.read_text(encoding="utf-8") if MANIFEST_FILE.exists() else ""
+
+    if args.check:
+        if current != text:
+            print(f"error: {MANIFEST_FILE.name} is stale, run tools/build_sw_manifest.py")
+            return 1
+        print(f"precache manifest OK (version {manifest['version']})")
+        return 0
+
+    if current != text:
+        MANIFEST_FILE.write_text(text, encoding="utf-8")
+    size = sum((HTML_DIR / entry["url"]).resolve().stat().st_size for entry in manifest["files"])
+    print(f"precache manifest version {manifest['version']}: {len(manifest['files'])} files, {size / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+A fake browser for running the app's Python modules under CPython
+
+install() registers stand-ins for the `pyscript`, `js` and `pyodide.ffi` modules.
+The page structure (ids, classes, tags) comes from HTML/index.html, timers run on
+the asyncio loop, and every call into the fake JS world is counted in `browser.calls`.
+Anything the fake does not know about is an auto-created JsObject, so the app code
+runs unchanged but nothing is actually rendered.
+"""
+import sys
+import types
+from pathlib import Path
+
+from .dom import FakeBrowser, JsObject, JsProxy
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Same flat layout as the "files" section of HTML/pyscript.json
+APP_PATHS = [
+    ROOT / "App",
+    ROOT / "App" / "WindowHandler",
+    ROOT / "App" / "textHandler",
+    ROOT / "App" / "CodingHandlerAndItsApp",
+]
+
+browser = None
+
+
+def create_proxy(func):
+    browser.calls["ffi.create_proxy"] += 1
+    return JsProxy(func, browser)
+
+
+def create_once_callable(func):
+    browser.calls["ffi.create_once_callable"] += 1
+    return JsProxy(func, browser, once=True)
+
+
+def to_js(value, **kwargs):
+    return value
+
+
+def install(html_file=ROOT / "HTML" / "index.html"):
+    """Put the fake modules in sys.modules and the app folders on sys.path"""
+    global browser
+    browser = FakeBrowser(html_file)
+
+    pyscript = types.ModuleType("pyscript")
+    pyscript.window = browser.window
+    pyscript.document = browser.document
+
+    js = types.ModuleType("js")
+    js.__getattr__ = lambda name: getattr(browser.window, name)
+
+    pyodide = types.ModuleType("pyodide")
+    ffi = types.ModuleType("pyodide.ffi")
+    ffi.create_proxy = create_proxy
+    ffi.create_once_callable = create_once_callable
+    ffi.to_js = to_js
+    pyodide.ffi = ffi
+
+    sys.modules.update({"pyscript": pyscript, "js": js, "pyodide": pyodide, "pyodide.ffi": ffi})
+    for path in reversed(APP_PATHS):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    return browser
@@ -0,0 +1,625 @@
+"""Fake window/document objects used by tools.fakebrowser"""
+import asyncio
+import re
+import time
+from collections import Counter
+from html.parser import HTMLParser
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class JsObject:
+    """Stands in for any JS value: attributes are created on first use, calls are counted"""
+
+    def __init__(self, name, browser):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_browser", browser)
+        object.__setattr__(self, "_attrs", {})
+
+    def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        attrs = self._attrs
+        if key not in attrs:
+            attrs[key] = JsObject(f"{self._name}.{key}", self._browser)
+        return attrs[key]
+
+    def __setattr__(self, key, value):
+        self._attrs[key] = value
+
+    def __call__(self, *args, **kwargs):
+        self._browser.calls[self._name] += 1
+        return JsObject(self._name.rsplit(".", 1)[-1] + "()", self._browser)
+
+    def new(self, *args):
+        self._browser.calls[f"new {self._name}"] += 1
+        return JsObject(self._name.rsplit(".", 1)[-1], self._browser)
+
+    def __await__(self):
+        if False:
+            yield
+        return True
+
+    def __iter__(self):
+        return iter([])
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return True
+
+    def __str__(self):
+        return ""
+
+    def __repr__(self):
+        return f"<JsObject {self._name}>"
+
+
+class JsProxy:
+    """What create_proxy/create_once_callable hand to JS"""
+
+    def __init__(self, func, browser, once=False):
+        self.func = func
+        self.browser = browser
+        self.once = once
+        self.destroyed = False
+
+    def __call__(self, *args):
+        if self.destroyed:
+            raise RuntimeError("This borrowed proxy was automatically destroyed")
+        self.browser.calls["ffi.call"] += 1
+        if self.once:
+            self.destroyed = True
+        return self.func(*args)
+
+    def destroy(self):
+        if self.destroyed:
+            raise RuntimeError("Object has already been destroyed")
+        self.destroyed = True
+
+
+def invoke(callback, *args):
+    """Call a listener the way JS would, ignoring how many arguments it takes"""
+    try:
+        return callback(*args)
+    except TypeError:
+        if args:
+            return callback()
+        raise
+
+
+class ClassList:
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def names(self):
+        return self.element.className.split()
+
+    def add(self, *names):
+        current = self.names
+        self.element.className = " ".join(current + [n for n in names if n not in current])
+
+    def remove(self, *names):
+        self.element.className = " ".join(n for n in self.names if n not in names)
+
+    def contains(self, name):
+        return name in self.names
+
+    def toggle(self, name, force=None):
+        present = self.contains(name)
+        wanted = not present if force is None else bool(force)
+        if wanted and not present:
+            self.add(name)
+        elif present and not wanted:
+            self.remove(name)
+        return wanted
+
+
+class Rect:
+    def __init__(self, left=0, top=0, width=0, height=0):
+        self.left = self.x = left
+        self.top = self.y = top
+        self.width = width
+        self.height = height
+        self.right = left + width
+        self.bottom = top + height
+
+
+class FakeElement(JsObject):
+    """A DOM element parsed from the page; unknown properties fall back to JsObject"""
+
+    def __init__(self, tag, attrs, browser, parent=None):
+        super().__init__(tag, browser)
+        self.tagName = tag.upper()
+        self.id = attrs.get("id", "")
+        self.className = attrs.get("class", "")
+        self.attributes = dict(attrs)
+        self.parentElement = parent
+        self.children = []
+        self.listeners = {}
+        self.classList = ClassList(self)
+        self.style = JsObject(f"{tag}.style", browser)
+        self.innerHTML = ""
+        self.textContent = ""
+        self.value = attrs.get("value", "")
+        self.open = "open" in attrs
+        self.offsetWidth = 400
+        self.offsetHeight = 300
+
+    def __repr__(self):
+        return f"<FakeElement {self.tagName.lower()}#{self.id}>"
+
+    def __setattr__(self, key, value):
+        super().__setattr__(key, value)
+        if key == "innerHTML":
+            self._attrs.pop("_pending_html", None)
+            self.children = []
+            if value:
+                # Parsed on the next query only, so writing big HTML stays cheap to benchmark
+                super().__setattr__("_pending_html", str(value))
+
+    def getAttribute(self, name):
+        return self.attributes.get(name)
+
+    def setAttribute(self, name, value):
+        self.attributes[name] = str(value)
+
+    def addEventListener(self, event, callback, *options):
+        self._browser.calls["addEventListener"] += 1
+        self.listeners.setdefault(event, []).append(callback)
+
+    def removeEventListener(self, event, callback, *options):
+        self._browser.calls["removeEventListener"] += 1
+        if callback in self.listeners.get(event, []):
+            self.listeners[event].remove(callback)
+
+    def dispatch(self, event_type, event=None):
+        """Harness helper: fire an event at this element's listeners"""
+        if event is None:
+            event = JsObject(f"{event_type}Event", self._browser)
+            event.type = event_type
+            event.target = self
+        for callback in list(self.listeners.get(event_type, [])):
+            invoke(callback, event)
+
+    def dispatchEvent(self, event):
+        self._browser.calls["dispatchEvent"] += 1
+        self.dispatch(str(getattr(event, "type", "")) or "event", event)
+        return True
+
+    def getBoundingClientRect(self):
+        self._browser.calls["getBoundingClientRect"] += 1
+        return Rect(0, 0, self.offsetWidth, self.offsetHeight)
+
+    def descendants(self):
+        pending = self._attrs.pop("_pending_html", None)
+        if pending is not None:
+            PageParser(self._browser, self).feed(pending)
+        for child in self.children:
+            yield child
+            yield from child.descendants()
+
+    def querySelectorAll(self, selector):
+        self._browser.calls["querySelectorAll"] += 1
+        return [el for el in self.descendants() if matches(el, selector)]
+
+    def querySelector(self, selector):
+        self._browser.calls["querySelector"] += 1
+        for el in self.descendants():
+            if matches(el, selector):
+                return el
+        return None
+
+    def closest(self, selector):
+        el = self
+        while el is not None:
+            if matches(el, selector):
+                return el
+            el = el.parentElement
+        return None
+
+    def contains(self, other):
+        while other is not None:
+            if other is self:
+                return True
+            other = getattr(other, "parentElement", None)
+        return False
+
+    def appendChild(self, child):
+        if isinstance(child, FakeElement):
+            child.parentElement = self
+            self.children.append(child)
+        return child
+
+    def remove(self):
+        parent = self.parentElement
+        if parent is not None and self in parent.children:
+            parent.children.remove(self)
+        self.parentElement = None
+
+    def show(self):
+        self.open = True
+
+    def showModal(self):
+        self.open = True
+
+    def close(self):
+        # Like the browser, only an open dialog fires "close"
+        if self.open:
+            self.open = False
+            self.dispatch("close")
+
+
+COMPOUND = re.compile(r'([a-zA-Z][\w-]*|\*)?((?:[#.][\w-]+)*)$')
+
+
+def matches_compound(element, compound):
+    match = COMPOUND.match(compound)
+    if not match:
+        return False
+    tag, rest = match.groups()
+    if tag and tag != "*" and element.tagName.lower() != tag.lower():
+        return False
+    for kind, name in re.findall(r'([#.])([\w-]+)', rest):
+        if kind == "#" and element.id != name:
+            return False
+        if kind == "." and not element.classList.contains(name):
+            return False
+    return True
+
+
+def matches(element, selector):
+    """Tag/#id/.class compounds, descendant combinators and selector lists"""
+    if not isinstance(element, FakeElement):
+        return False
+    for alternative in selector.split(","):
+        parts = alternative.replace(">", " ").split()
+        if not parts or not matches_compound(element, parts[-1]):
+            continue
+        ancestor = element.parentElement
+        remaining = parts[:-1]
+        while remaining and ancestor is not None:
+            if matches_compound(ancestor, remaining[-1]):
+                remaining.pop()
+            ancestor = ancestor.parentElement
+        if not remaining:
+            return True
+    return False
+
+
+class PageParser(HTMLParser):
+    """Builds FakeElements for the page's body"""
+
+    def __init__(self, browser, root):
+        super().__init__()
+        self.browser = browser
+        self.stack = [root]
+        self.by_id = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value if value is not None else "" for name, value in attrs}
+        element = FakeElement(tag, attrs, self.browser, self.stack[-1])
+        self.stack[-1].children.append(element)
+        if element.id:
+            self.by_id.setdefault(element.id, element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tagName.lower() == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        if len(self.stack) > 1 and data.strip():
+            self.stack[-1].textContent += data
+
+
+class FakeDocument(FakeElement):
+    def __init__(self, browser):
+        super().__init__("html", {}, browser)
+        object.__setattr__(self, "_name", "document")
+        self.baseURI = "http://localhost/HTML/index.html"
+
+    def load(self, html):
+        """Replace the whole tree; the document object itself stays the same"""
+        self.children = []
+        self.listeners = {}
+        parser = PageParser(self._browser, self)
+        parser.feed(html)
+        self.by_id = parser.by_id
+        self.body = self.querySelector("body") or self
+
+    def getElementById(self, element_id):
+        self._browser.calls["getElementById"] += 1
+        element = self.by_id.get(element_id)
+        if element is None:
+            # Added after the page was loaded
+            element = next((el for el in self.descendants() if el.id == element_id), None)
+        return element
+
+    def createElement(self, tag):
+        self._browser.calls["createElement"] += 1
+        return FakeElement(tag, {}, self._browser)
+
+
+class FakeStorage:
+    def __init__(self):
+        self.items = {}
+
+    def getItem(self, key):
+        return self.items.get(key)
+
+    def setItem(self, key, value):
+        self.items[key] = str(value)
+
+    def removeItem(self, key):
+        self.items.pop(key, None)
+
+    def clear(self):
+        self.items.clear()
+
+
+class FakeConsole:
+    def __init__(self, browser):
+        self.browser = browser
+        self.messages = []
+
+    def _log(self, level, args):
+        self.browser.calls[f"console.{level}"] += 1
+        self.messages.append((level, " ".join(str(a) for a in args)))
+
+    def log(self, *args):
+        self._log("log", args)
+
+    def info(self, *args):
+        self._log("info", args)
+
+    def warn(self, *args):
+        self._log("warn", args)
+
+    def error(self, *args):
+        self._log("error", args)
+
+    def table(self, *args):
+        self._log("table", args)
+
+
+class FakePerformance:
+    def __init__(self):
+        self.origin = time.perf_counter()
+
+    def now(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    def mark(self, *args):
+        pass
+
+    def measure(self, *args):
+        pass
+
+
+class FakeDate:
+    @staticmethod
+    def new(*args):
+        date = FakeDate()
+        date.ms = time.time() * 1000
+        return date
+
+    @staticmethod
+    def now():
+        return time.time() * 1000
+
+    def getTime(self):
+        return self.ms
+
+
+class Timers:
+    """setTimeout & co. on top of the running asyncio loop"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.handles = {}
+        self.next_id = 1
+
+    def add(self, callback, delay, *args, repeat=False):
+        timer_id = self.next_id
+        self.next_id += 1
+        loop = asyncio.get_event_loop()
+
+        def fire():
+            if repeat:
+                self.handles[timer_id] = loop.call_later(delay, fire)
+            else:
+                self.handles.pop(timer_id, None)
+            invoke(callback, *args)
+
+        self.handles[timer_id] = loop.call_later(delay, fire) if delay else loop.call_soon(fire)
+        return timer_id
+
+    def cancel(self, timer_id):
+        handle = self.handles.pop(timer_id, None)
+        if handle is not None:
+            handle.cancel()
+
+    def clear(self):
+        for handle in self.handles.values():
+            handle.cancel()
+        self.handles.clear()
+
+
+class Position:
+    def __init__(self, row, column):
+        self.row = row
+        self.column = column
+
+
+class Range:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def isEmpty(self):
+        return (self.start.row, self.start.column) == (self.end.row, self.end.column)
+
+
+class FakeAceEditor(JsObject):
+    """Text buffer and cursor of an Ace editor; rendering calls are just counted"""
+
+    def __init__(self, container, browser):
+        super().__init__("editor", browser)
+        self.container = container
+        self.textInput.getElement = lambda: self.textarea
+        self.textarea = FakeElement("textarea", {"class": "ace_text-input"}, browser, container)
+        container.classList.add("ace_editor")
+        self.text = ""
+        self.cursor = Position(0, 0)
+        self.handlers = {}
+
+    def count(self, name):
+        self._browser.calls[f"ace.{name}"] += 1
+
+    def lines(self):
+        return self.text.split("\n")
+
+    def getValue(self):
+        self.count("getValue")
+        return self.text
+
+    def setValue(self, value, cursor_pos=0):
+        self.count("setValue")
+        self.text = str(value)
+        if cursor_pos == -1:
+            self.cursor = Position(0, 0)
+        else:
+            self.navigateFileEnd()
+        self.emit("change")
+
+    def insert(self, text):
+        self.count("insert")
+        lines = self.lines()
+        line = lines[self.cursor.row]
+        lines[self.cursor.row] = line[:self.cursor.column] + str(text) + line[self.cursor.column:]
+        self.text = "\n".join(lines)
+        inserted = str(text).split("\n")
+        row = self.cursor.row + len(inserted) - 1
+        column = (self.cursor.column if len(inserted) == 1 else 0) + len(inserted[-1])
+        self.cursor = Position(row, column)
+        self.emit("change")
+
+    def navigateFileEnd(self):
+        self.count("navigateFileEnd")
+        lines = self.lines()
+        self.cursor = Position(len(lines) - 1, len(lines[-1]))
+
+    def moveCursorTo(self, row, column):
+        self.count("moveCursorTo")
+        self.cursor = Position(row, column)
+
+    def getCursorPosition(self):
+        self.count("getCursorPosition")
+        return Position(self.cursor.row, self.cursor.column)
+
+    def getSelectionRange(self):
+        return Range(self.getCursorPosition(), self.getCursorPosition())
+
+    def on(self, event, callback):
+        self.handlers.setdefault(event, []).append(callback)
+
+    def emit(self, event):
+        for callback in list(self.handlers.get(event, [])):
+            invoke(callback, JsObject(f"{event}Delta", self._browser), self)
+
+
+class FakeAce(JsObject):
+    def __init__(self, browser):
+        super().__init__("ace", browser)
+        self.editors = {}
+
+    def edit(self, target):
+        self._browser.calls["ace.edit"] += 1
+        container = target if isinstance(target, FakeElement) else self._browser.document.getElementById(target)
+        if container is None:
+            raise RuntimeError(f"ace.edit can't find div #{target}")
+        # Like Ace, a second edit() on the same element returns the same editor
+        key = id(container)
+        if key not in self.editors:
+            self.editors[key] = FakeAceEditor(container, self._browser)
+        return self.editors[key]
+
+
+class FakeWindow(JsObject):
+    def __init__(self, browser):
+        super().__init__("window", browser)
+        timers = Timers(browser)
+        self._attrs["_timers"] = timers
+        self.console = browser.console
+        self.performance = FakePerformance()
+        self.localStorage = FakeStorage()
+        self.Date = FakeDate
+        self.ace = FakeAce(browser)
+        self.location = JsObject("location", browser)
+        self.location.search = ""
+        self.location.href = "http://localhost/HTML/index.html"
+        self.innerWidth = 1280
+        self.innerHeight = 800
+
+    def loadAce(self):
+        self._browser.calls["loadAce"] += 1
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(self.ace)
+        return future
+
+    def setTimeout(self, callback, delay=0, *args):
+        self._browser.calls["setTimeout"] += 1
+        return self._timers.add(callback, (delay or 0) / 1000, *args)
+
+    def clearTimeout(self, timer_id):
+        self._browser.calls["clearTimeout"] += 1
+        self._timers.cancel(timer_id)
+
+    def setInterval(self, callback, delay=0, *args):
+        self._browser.calls["setInterval"] += 1
+        return self._timers.add(callback, max(delay or 0, 4) / 1000, *args, repeat=True)
+
+    def clearInterval(self, timer_id):
+        self._browser.calls["clearInterval"] += 1
+        self._timers.cancel(timer_id)
+
+    def requestAnimationFrame(self, callback):
+        self._browser.calls["requestAnimationFrame"] += 1
+        return self._timers.add(lambda: invoke(callback, self.performance.now()), 0)
+
+    def cancelAnimationFrame(self, frame_id):
+        self._timers.cancel(frame_id)
+
+    def requestIdleCallback(self, callback, options=None):
+        self._browser.calls["requestIdleCallback"] += 1
+        deadline = JsObject("IdleDeadline", self._browser)
+        deadline.didTimeout = False
+        return self._timers.add(callback, 0, deadline)
+
+    def addEventListener(self, event, callback, *options):
+        self._browser.calls["addEventListener"] += 1
+
+
+class FakeBrowser:
+    def __init__(self, html_file):
+        self.html_file = html_file
+        self.calls = Counter()
+        self.console = FakeConsole(self)
+        self.window = FakeWindow(self)
+        self.document = FakeDocument(self)
+        self.window.document = self.document
+        self.reset()
+
+    def reset(self):
+        """Fresh DOM and timers for another boot; localStorage survives like in a reload"""
+        self.window._timers.clear()
+        self.window.ace.editors.clear()
+        self.document.load(self.html_file.read_text(encoding="utf-8"))
+        self.console.messages.clear()
+        self.calls.clear()
@@ -0,0 +1,124 @@
+"""
+Local static server for trying the app (and its service worker) without deploying
+
+Serves the repository root, so the page is at http://localhost:8000/HTML/index.html.
+Service workers need http://localhost or https, opening index.html as a file won't do.
+sw.js and the precache manifest are sent with no-cache so a rebuilt manifest is picked up
+on the next reload; everything else uses the browser's normal revalidation.
+
+With --dist it serves the output of tools/build.py instead, at http://localhost:8000/:
+content-hashed files in assets/ are cached as immutable, precompressed .br/.gz
+variants are sent when the browser accepts them, and every response logs its size.
+
+To check offline behaviour: load the page once, stop the server (or tick "Offline" in
+the devtools Network tab) and reload.
+
+Usage:
+    python tools/serve.py
+    python tools/serve.py --port 8080 --bind 0.0.0.0
+    python tools/serve.py --dist
+"""
+import argparse
+import os
+import sys
+from email.utils import formatdate
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+NO_CACHE = {"sw.js", "precache-manifest.js"}
+
+
+class Handler(SimpleHTTPRequestHandler):
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        ".js": "text/javascript",
+        ".mjs": "text/javascript",
+        ".wasm": "application/wasm",
+        ".py": "text/x-python",
+        ".json": "application/json",
+    }
+
+    def end_headers(self):
+        if self.path.split("?")[0].rsplit("/", 1)[-1] in NO_CACHE:
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+
+class DistHandler(Handler):
+    encodings = [("br", ".br"), ("gzip", ".gz")]
+    bytes_sent = 0
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            return super().send_head()
+
+        accepted = self.headers.get("Accept-Encoding", "")
+        encoding, served = None, path
+        for name, suffix in self.encodings:
+            if name in accepted and os.path.isfile(path + suffix):
+                encoding, served = name, path + suffix
+                break
+
+        f = open(served, "rb")
+        size = os.fstat(f.fileno()).st_size
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(size))
+        self.send_header("Last-Modified", formatdate(os.path.getmtime(path), usegmt=True))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if "/assets/" in self.path:
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        DistHandler.bytes_sent += size
+        self.log_message('"%s" %d bytes%s, %d KiB sent so far', self.path, size,
+                         f" ({encoding})" if encoding else "", DistHandler.bytes_sent // 1024)
+        return f
+
+    def end_headers(self):
+        # Cache-Control is decided in send_head
+        SimpleHTTPRequestHandler.end_headers(self)
+
+    def log_request(self, code="-", size="-"):
+        # send_head logs the transfer size instead
+        if code != 200:
+            super().log_request(code, size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--dist", nargs="?", const=ROOT / "dist", type=Path, help="serve a tools/build.py output folder")
+    args = parser.parse_args(argv)
+
+    if args.dist:
+        if not (args.dist / "index.html").exists():
+            print(f"{args.dist} has no index.html, run tools/build.py first")
+            return 1
+        server = ThreadingHTTPServer((args.bind, args.port), partial(DistHandler, directory=str(args.dist)))
+        print(f"Serving {args.dist} at http://localhost:{args.port}/ (Ctrl+C to stop)")
+    else:
+        server = ThreadingHTTPServer((args.bind, args.port), partial(Handler, directory=str(ROOT)))
+        print(f"Serving {ROOT} at http://localhost:{args.port}/HTML/index.html (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
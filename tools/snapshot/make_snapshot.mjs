@@ -0,0 +1,31 @@
+// Makes the Pyodide memory snapshot for tools/build_snapshot.py.
+// Needs the same Pyodide version as the page: `npm install --no-save pyodide@<version>` in this folder.
+import { readFileSync, writeFileSync } from 'node:fs';
+import { loadPyodide, version } from 'pyodide';
+
+const job = JSON.parse(readFileSync(process.argv[2], 'utf8'));
+
+if (version !== job.pyodide) {
+    console.error(`error: installed pyodide is ${version}, the page uses ${job.pyodide}`);
+    process.exit(1);
+}
+
+const pyodide = await loadPyodide({ _makeSnapshot: true });
+
+for (const [name, path] of Object.entries(job.sources)) {
+    pyodide.FS.writeFile(`/home/pyodide/${name}`, readFileSync(path));
+}
+
+// Same module layout as PyScript's "files", but with the lazy pyscript stand-in,
+// and only imports: setup() touches the DOM and runs after the restore.
+pyodide.runPython(`
+import sys
+sys.path.insert(0, "/home/pyodide")
+import pyscriptShim
+sys.modules["pyscript"] = pyscriptShim
+import bootstrap
+bootstrap.preload()
+`);
+
+writeFileSync(job.output, pyodide.makeMemorySnapshot());
+console.log(`wrote ${job.output}`);
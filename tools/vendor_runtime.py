@@ -0,0 +1,165 @@
+"""
+Download the CDN assets of index.html into HTML/vendor/ so the service worker can precache them
+
+Vendored: the PyScript release (core.js and the chunks it imports), the Pyodide runtime
+it loads, the Google Fonts stylesheets with their font files, and remote images.
+HTML/vendor/vendor.json maps every CDN URL prefix to its local copy; sw.js serves the
+copy for requests to that prefix, so index.html keeps its CDN URLs unchanged.
+Needs network access once; run tools/build_sw_manifest.py afterwards.
+
+Usage:
+    python tools/vendor_runtime.py
+    python tools/vendor_runtime.py --pyodide 0.29.0   # if it can't be detected from core.js
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import urllib.request
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from build_sw_manifest import HTML_FILE, VENDOR_DIR, VENDOR_MAP_FILE
+
+# Files Pyodide's loader fetches for a plain interpreter (no extra packages)
+PYODIDE_FILES = ["pyodide.mjs", "pyodide.asm.js", "pyodide.asm.wasm", "python_stdlib.zip", "pyodide-lock.json"]
+PYODIDE_CDN = "https://cdn.jsdelivr.net/pyodide/v{version}/full/"
+
+# Browsers get woff2 only when they look like a browser
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+IMPORT_PATTERN = re.compile(r'''(?:from|import)\s*\(?\s*["'](\./[^"']+\.js)["']''')
+PYODIDE_PATTERN = re.compile(r'cdn\.jsdelivr\.net/pyodide/v([\d.]+(?:[a-z]+\d*)?)/full/')
+FONT_URL_PATTERN = re.compile(r'url\((https://fonts\.gstatic\.com/[^)]+)\)')
+
+
+class RemoteAssets(HTMLParser):
+    """CDN scripts, stylesheets and images referenced by a page"""
+
+    def __init__(self):
+        super().__init__()
+        self.scripts = []
+        self.stylesheets = []
+        self.images = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        url = attrs.get("src") or attrs.get("href") or ""
+        if not url.startswith("https://"):
+            return
+        if tag == "script":
+            self.scripts.append(url)
+        elif tag == "link" and attrs.get("rel") == "stylesheet":
+            self.stylesheets.append(url)
+        elif tag == "img":
+            self.images.append(url)
+
+
+def download(url):
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.read()
+
+
+def save(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    print(f"  {path.relative_to(VENDOR_DIR)} ({len(data) / 1024:.0f} KiB)")
+
+
+def vendor_pyscript(scripts, stylesheets, mapping):
+    """Returns the Pyodide version core.js asks for, if it can be found"""
+    releases = {url.rsplit("/", 1)[0] + "/" for url in scripts + stylesheets if "pyscript.net/releases/" in url}
+    pyodide_version = None
+
+    for base in releases:
+        target = VENDOR_DIR / "pyscript"
+        queue = [urljoin(base, "core.js"), urljoin(base, "core.css")]
+        seen = set()
+        while queue:
+            url = queue.pop()
+            if url in seen:
+                continue
+            seen.add(url)
+            data = download(url)
+            save(target / url[len(base):], data)
+
+            if url.endswith(".js"):
+                text = data.decode("utf-8", errors="replace")
+                queue.extend(urljoin(url, path) for path in IMPORT_PATTERN.findall(text))
+                found = PYODIDE_PATTERN.search(text)
+                if found:
+                    pyodide_version = found.group(1)
+
+        mapping[base] = "./vendor/pyscript/"
+    return pyodide_version
+
+
+def vendor_pyodide(version, mapping):
+    base = PYODIDE_CDN.format(version=version)
+    for name in PYODIDE_FILES:
+        save(VENDOR_DIR / "pyodide" / name, download(base + name))
+    mapping[base] = "./vendor/pyodide/"
+
+
+def vendor_fonts(stylesheets, mapping):
+    for url in stylesheets:
+        if urlparse(url).hostname != "fonts.googleapis.com":
+            continue
+        css = download(url).decode("utf-8")
+
+        def local(match):
+            font_url = match.group(1)
+            name = hashlib.sha1(font_url.encode("utf-8")).hexdigest()[:12] + Path(urlparse(font_url).path).suffix
+            save(VENDOR_DIR / "fonts" / name, download(font_url))
+            return f"url({name})"
+
+        css = FONT_URL_PATTERN.sub(local, css)
+        name = "fonts-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:8] + ".css"
+        save(VENDOR_DIR / "fonts" / name, css.encode("utf-8"))
+        mapping[url] = f"./vendor/fonts/{name}"
+
+
+def vendor_images(images, mapping):
+    for url in images:
+        suffix = Path(urlparse(url).path).suffix or ".img"
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12] + suffix
+        save(VENDOR_DIR / "images" / name, download(url))
+        mapping[url] = f"./vendor/images/{name}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pyodide", help="Pyodide version to vendor (default: detected from core.js)")
+    args = parser.parse_args(argv)
+
+    assets = RemoteAssets()
+    assets.feed(HTML_FILE.read_text(encoding="utf-8"))
+    mapping = {}
+
+    try:
+        print("PyScript:")
+        detected = vendor_pyscript(assets.scripts, assets.stylesheets, mapping)
+        version = args.pyodide or detected
+        if not version:
+            print("error: could not detect the Pyodide version, pass --pyodide")
+            return 1
+        print(f"Pyodide {version}:")
+        vendor_pyodide(version, mapping)
+        print("Fonts:")
+        vendor_fonts(assets.stylesheets, mapping)
+        print("Images:")
+        vendor_images(assets.images, mapping)
+    except OSError as e:
+        print(f"error: download failed: {e}")
+        return 1
+
+    VENDOR_MAP_FILE.write_text(json.dumps(mapping, indent=2) + "\n", encoding="utf-8")
+    print(f"wrote {VENDOR_MAP_FILE.relative_to(VENDOR_DIR.parent.parent)}, now run tools/build_sw_manifest.py")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())